@@ -0,0 +1,143 @@
+# Broadcast.py
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from StateProtocol import JSON, Payload
+
+logger = logging.getLogger(__name__)
+
+# A client with this many messages waiting gets them replaced by a snapshot.
+MAX_PENDING = 32
+# A client whose oldest waiting message is older than this is disconnected.
+LAG_BUDGET_S = 2.0
+CLOSE_TOO_SLOW = 1008
+
+
+class ClientOutbox:
+    """Encoded messages waiting to go to one websocket, oldest first.
+
+    Each outbox is drained by its own task, so a slow connection only ever
+    delays its own messages.
+    """
+
+    def __init__(self, websocket, wire_format: str = JSON):
+        self.websocket = websocket
+        self.wire_format = wire_format
+        self.pending: Deque[Tuple[float, Payload]] = deque()  # (enqueued at, message)
+        # enqueue time of the message being sent, while a send is in flight
+        self.sending_since: Optional[float] = None
+        self.ready = asyncio.Event()
+        self.coalesced = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def push(self, enqueued_at: float, message: Payload):
+        self.pending.append((enqueued_at, message))
+        self.ready.set()
+
+    def lag_s(self, now: float) -> float:
+        """Age of the oldest message not yet handed to the socket."""
+        if self.sending_since is not None:
+            return now - self.sending_since
+        return now - self.pending[0][0] if self.pending else 0.0
+
+    async def drain(self):
+        try:
+            while True:
+                await self.ready.wait()
+                while self.pending:
+                    self.sending_since, message = self.pending.popleft()
+                    await self.websocket.send(message)
+                    self.sending_since = None
+                self.ready.clear()
+        except Exception as e:
+            logger.debug("Outbox of %s stopped: %s", getattr(self.websocket, "remote_address", "?"), e)
+
+
+class Broadcaster:
+    """Fans encoded messages out to every client of a room.
+
+    `publish()` takes a message that was serialised once per wire format
+    (``{format: payload}``) and appends the client's encoding to each
+    bounded `ClientOutbox`; it never awaits a socket.  When a client falls
+    `max_pending` messages behind, everything it has waiting is superseded
+    by one fresh snapshot from ``snapshot(wire_format)``.  A client that
+    still has not caught up after `lag_budget_s` is disconnected; lag is
+    checked on every publish and, so that quiet rooms are covered too,
+    every ``lag_budget_s / 2`` by a watchdog task while clients remain.
+
+    All methods must be called on the event loop thread.
+    """
+
+    def __init__(self, snapshot: Callable[[str], Payload], max_pending: int = MAX_PENDING,
+                 lag_budget_s: float = LAG_BUDGET_S, clock: Callable[[], float] = time.monotonic):
+        self.snapshot = snapshot
+        self.max_pending = max_pending
+        self.lag_budget_s = lag_budget_s
+        self.clock = clock
+        self.outboxes: Dict[object, ClientOutbox] = {}
+        self.dropped = 0
+        self._watchdog: Optional[asyncio.Task] = None
+
+    def add(self, websocket, wire_format: str = JSON):
+        """Start sending to *websocket*, beginning with a full snapshot."""
+        box = ClientOutbox(websocket, wire_format)
+        box.push(self.clock(), self.snapshot(wire_format))
+        loop = asyncio.get_running_loop()
+        box.task = loop.create_task(box.drain())
+        self.outboxes[websocket] = box
+        if self._watchdog is None:
+            self._watchdog = loop.create_task(self._watch())
+
+    def remove(self, websocket):
+        box = self.outboxes.pop(websocket, None)
+        if box is not None and box.task is not None:
+            box.task.cancel()
+        if not self.outboxes and self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+
+    def resync(self, websocket):
+        """Replace whatever *websocket* has waiting with a fresh snapshot."""
+        box = self.outboxes.get(websocket)
+        if box is not None:
+            self._coalesce(box, self.snapshot(box.wire_format))
+
+    def publish(self, message: Dict[str, Payload]):
+        now = self.clock()
+        for websocket, box in list(self.outboxes.items()):
+            if len(box.pending) < self.max_pending:
+                box.push(now, message[box.wire_format])
+            else:
+                # the snapshot already includes *message*
+                self._coalesce(box, self.snapshot(box.wire_format))
+            if box.lag_s(now) > self.lag_budget_s:
+                self._drop(websocket, box.lag_s(now))
+
+    def check_lag(self):
+        """Disconnect every client over the lag budget, published to or not."""
+        now = self.clock()
+        for websocket, box in list(self.outboxes.items()):
+            if box.lag_s(now) > self.lag_budget_s:
+                self._drop(websocket, box.lag_s(now))
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.lag_budget_s / 2)
+            self.check_lag()
+
+    def _coalesce(self, box: ClientOutbox, snapshot: Payload):
+        # keep the oldest timestamp: coalescing does not reset the lag clock
+        enqueued_at = box.pending[0][0] if box.pending else self.clock()
+        box.pending.clear()
+        box.push(enqueued_at, snapshot)
+        box.coalesced += 1
+
+    def _drop(self, websocket, lag_s: float):
+        logger.warning("Disconnecting %s: %.1f s behind", getattr(websocket, "remote_address", "?"), lag_s)
+        self.remove(websocket)
+        self.dropped += 1
+        asyncio.get_running_loop().create_task(websocket.close(CLOSE_TOO_SLOW, "client too slow"))
@@ -0,0 +1,157 @@
+# GameRooms.py
+
+import asyncio
+import logging
+import pathlib
+import threading
+from typing import Dict, Optional
+
+from Command import Command
+from Game import Game, IDLE_WAKE_MS, REORDER_WINDOW_MS
+from GameFactory import create_game
+from ServerGameObserver import ServerGameObserver
+from StateProtocol import JSON
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOM_ID = "default"
+
+
+def room_id_from_path(path: Optional[str]) -> str:
+    """Map a websocket request path such as ``/rooms/abc`` to a room id."""
+    if not path:
+        return DEFAULT_ROOM_ID
+    segment = path.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+    return segment or DEFAULT_ROOM_ID
+
+
+class GameRoom:
+    """One match: a headless `Game`, its connected websockets and the
+    observer that broadcasts its events to them."""
+
+    def __init__(self, room_id: str, game: Game, loop: asyncio.AbstractEventLoop):
+        self.room_id = room_id
+        self.game = game
+        self.clients: set = set()
+        self.observer = ServerGameObserver(game, loop)
+        self.finished = False
+
+    def poll(self) -> Optional[int]:
+        """Advance the game if anything is due; see `Game.poll()`."""
+        if self.finished:
+            return None
+        if self.game.is_over():
+            self.finished = True
+            self.game.notify("game_end", timestamp=self.game.game_time_ms())
+            logger.info("Room %s: game over", self.room_id)
+            return None
+        return self.game.poll()
+
+
+class GameRoomManager:
+    """Hosts many independent games in one process.
+
+    Games are created on demand with `GameFactory.create_game` and all of them
+    are ticked from a single scheduler thread, which sleeps until the earliest
+    deadline of any room or until a command is submitted.
+    """
+
+    def __init__(self, pieces_root: pathlib.Path, img_factory, loop: asyncio.AbstractEventLoop):
+        self.pieces_root = pathlib.Path(pieces_root)
+        self.img_factory = img_factory
+        self.loop = loop
+        self.rooms: Dict[str, GameRoom] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ─── rooms ───────────────────────────────────────────────────────────
+    def get_or_create(self, room_id: str) -> GameRoom:
+        with self._lock:
+            room = self.rooms.get(room_id)
+            if room is None:
+                game = create_game(self.pieces_root, self.img_factory)
+                # remote commands race over the network: run them by stamp
+                game.reorder_window_ms = REORDER_WINDOW_MS
+                room = GameRoom(room_id, game, self.loop)
+                game.start_simulation()
+                self.rooms[room_id] = room
+                logger.info("Room %s created (%d rooms)", room_id, len(self.rooms))
+        self._wake.set()
+        return room
+
+    def join(self, room_id: str, websocket, wire_format: str = JSON) -> GameRoom:
+        """Add *websocket* to a room; it is sent a board snapshot, then deltas,
+        encoded in *wire_format*.
+
+        Must be called on the event loop thread.
+        """
+        room = self.get_or_create(room_id)
+        room.clients.add(websocket)
+        room.observer.broadcaster.add(websocket, wire_format)
+        return room
+
+    def leave(self, room: GameRoom, websocket):
+        """Detach *websocket*; a room is closed once its last client leaves."""
+        room.observer.broadcaster.remove(websocket)
+        room.clients.discard(websocket)
+        if not room.clients:
+            self.close_room(room.room_id)
+
+    def close_room(self, room_id: str):
+        with self._lock:
+            room = self.rooms.pop(room_id, None)
+        if room is not None:
+            room.game.running = False
+            room.game.unsubscribe(room.observer)
+            logger.info("Room %s closed (%d rooms)", room_id, len(self.rooms))
+
+    def submit(self, room: GameRoom, cmd: Command):
+        """Queue *cmd* for *room* and wake the scheduler.
+
+        Runs on the caller's thread with no hop to the scheduler, so it may
+        be called directly on the event loop.  It is not lock-free: waking
+        the scheduler is a `threading.Event.set()`, which briefly takes the
+        event's lock, but only when the event is not already set, and
+        the scheduler never holds that lock while it sleeps.
+        """
+        room.game.submit(cmd)
+        if not self._wake.is_set():
+            self._wake.set()
+
+    # ─── shared scheduler ────────────────────────────────────────────────
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_scheduler, name="GameRoomScheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def poll_rooms(self) -> float:
+        """Poll every room once; return seconds until the next one is due."""
+        with self._lock:
+            rooms = list(self.rooms.values())
+        wait_s = IDLE_WAKE_MS / 1000
+        for room in rooms:
+            try:
+                wait_ms = room.poll()
+            except Exception:
+                logger.exception("Room %s crashed; closing it", room.room_id)
+                self.close_room(room.room_id)
+                continue
+            if wait_ms is not None:
+                wait_s = min(wait_s, wait_ms / (1000 * room.game._time_factor))
+        return wait_s
+
+    def _run_scheduler(self):
+        while not self._stop.is_set():
+            # clear before polling so a submit() during the pass is not lost
+            self._wake.clear()
+            wait_s = self.poll_rooms()
+            if wait_s > 0:
+                self._wake.wait(wait_s)
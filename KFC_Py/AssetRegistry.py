@@ -0,0 +1,156 @@
+# KFC_Py/AssetRegistry.py
+
+import csv, json, os, pathlib, threading, types
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from Moves import Moves
+from SpriteAtlas import SpriteAtlas
+
+
+@dataclass(frozen=True)
+class StateAssets:
+    """Everything a piece state loads from disk, shared by all pieces."""
+    name: str
+    cfg: dict
+    moves: Optional[Moves]
+    sprites_dir: pathlib.Path
+
+
+@dataclass(frozen=True)
+class PieceAssets:
+    """Parsed `<piece>/states/` tree of one piece type."""
+    piece_type: str
+    states: Dict[str, StateAssets]
+    transitions: Dict[str, Dict[str, str]]  # from_state -> {event: to_state}
+
+
+def _path_key(path) -> str:
+    # plain string keys: resolving symlinks on every lookup costs more than
+    # the occasional duplicate entry for two spellings of one path
+    return os.path.abspath(path)
+
+
+def _loader_key(img_loader: Callable):
+    # Loader objects (ImgFactory, MockImgFactory, ...) are stateless, so all
+    # instances of one class produce the same images.
+    if isinstance(img_loader, (types.FunctionType, types.MethodType)):
+        return img_loader
+    return type(img_loader)
+
+
+class AssetRegistry:
+    """Process-wide cache of piece assets.
+
+    Each `config.json`, `moves.txt`, `transitions.csv` and sprite sequence is
+    read once and handed out as a shared reference; `Game`s, `PieceFactory`s
+    and `Graphics` objects must treat them as read-only and keep their own
+    mutable state (current frame, physics position, ...).
+    """
+
+    def __init__(self):
+        self._pieces: Dict[tuple, PieceAssets] = {}
+        self._frames: Dict[tuple, tuple] = {}
+        self._images: Dict[tuple, object] = {}
+        self._templates: Dict[tuple, object] = {}
+        self._atlases: Dict[tuple, Optional[SpriteAtlas]] = {}
+        self._lock = threading.RLock()
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+            self._atlases.clear()
+            self._pieces.clear()
+            self._frames.clear()
+            self._images.clear()
+
+    # ─── piece definitions ───────────────────────────────────────────────
+    def piece(self, piece_dir: pathlib.Path, board_size: Tuple[int, int]) -> PieceAssets:
+        key = (_path_key(piece_dir), board_size)
+        with self._lock:
+            assets = self._pieces.get(key)
+            if assets is None:
+                assets = self._pieces[key] = self._load_piece(pathlib.Path(piece_dir), board_size)
+            return assets
+
+    def template(self, piece_dir: pathlib.Path, board_size: Tuple[int, int], build: Callable[[], object]):
+        """Memoised `PieceTemplate` of a piece type, created by *build*."""
+        key = (_path_key(piece_dir), board_size)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is None:
+                template = self._templates[key] = build()
+            return template
+
+    @staticmethod
+    def _load_transitions(states_dir: pathlib.Path) -> Dict[str, Dict[str, str]]:
+        transitions: Dict[str, Dict[str, str]] = {}
+        csv_path = states_dir / "transitions.csv"
+        if not csv_path.exists():
+            return transitions
+
+        with csv_path.open(newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                frm, ev, nxt = row["from_state"], row["event"], row["to_state"]
+                transitions.setdefault(frm, {})[ev] = nxt
+        return transitions
+
+    def _load_piece(self, piece_dir: pathlib.Path, board_size: Tuple[int, int]) -> PieceAssets:
+        states: Dict[str, StateAssets] = {}
+        for state_dir in (piece_dir / "states").iterdir():
+            if not state_dir.is_dir():
+                continue
+            cfg_path = state_dir / "config.json"
+            cfg = json.loads(cfg_path.read_text()) if cfg_path.exists() else {}
+            moves_path = state_dir / "moves.txt"
+            moves = Moves(moves_path, board_size) if moves_path.exists() else None
+            states[state_dir.name] = StateAssets(state_dir.name, cfg, moves, state_dir / "sprites")
+
+        return PieceAssets(piece_dir.name, states, self._load_transitions(piece_dir / "states"))
+
+    # ─── images ──────────────────────────────────────────────────────────
+    def frames(self, sprites_dir: pathlib.Path, cell_size: Tuple[int, int], img_loader: Callable) -> tuple:
+        """Sorted PNG frames of *sprites_dir*, loaded once per size/loader."""
+        key = (_path_key(sprites_dir), tuple(cell_size), _loader_key(img_loader))
+        with self._lock:
+            frames = self._frames.get(key)
+            if frames is None:
+                frames = tuple(img_loader(p, cell_size, keep_aspect=False)
+                               for p in sorted(pathlib.Path(sprites_dir).glob("*.png")))
+                if not frames:
+                    raise ValueError(f"No frames found in {sprites_dir}")
+                self._frames[key] = frames
+            return frames
+
+    def atlas(self, pieces_root: pathlib.Path, cell_size: Tuple[int, int],
+              img_loader: Callable) -> Optional[SpriteAtlas]:
+        """Pack every sprite under *pieces_root* into one `SpriteAtlas`.
+
+        Afterwards `frames()` serves those folders as views into the atlas.
+        Returns None (and changes nothing) for loaders without real pixels.
+        """
+        size = tuple(cell_size)
+        key = (_path_key(pieces_root), size, _loader_key(img_loader))
+        with self._lock:
+            if key in self._atlases:
+                return self._atlases[key]
+            dirs = {_path_key(d): d for d in sorted(pathlib.Path(pieces_root).glob("*/states/*/sprites"))
+                    if d.is_dir()}
+            atlas = self._atlases[key] = SpriteAtlas.build(dirs, size, img_loader)
+            if atlas is not None:
+                for dir_key in atlas.index:
+                    self._frames[(dir_key, size, key[2])] = atlas.frames(dir_key)
+            return atlas
+
+    def image(self, path: pathlib.Path, size: Optional[Tuple[int, int]], img_loader: Callable):
+        """A single shared image (board, background)."""
+        key = (_path_key(path), None if size is None else tuple(size), _loader_key(img_loader))
+        with self._lock:
+            img = self._images.get(key)
+            if img is None:
+                img = self._images[key] = img_loader(path, size, keep_aspect=False)
+            return img
+
+
+# Shared by every factory in the process unless one is passed explicitly.
+ASSET_REGISTRY = AssetRegistry()
@@ -0,0 +1,74 @@
+# KFC_Py/Benchmarks/bench_draw.py
+"""Throughput of `Game._draw()` on the standard board.
+
+Measures frames per second for a static board and for a board with one
+piece moving, mid-game (full move lists on screen), next to the original
+full-frame compositing (background copy + board + every sprite + every
+label).  Run from KFC_Py:
+
+    python Benchmarks/bench_draw.py
+"""
+
+import os, pathlib, sys, time
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from Clock import VirtualClock
+from Command import Command
+from GameFactory import create_game
+from GraphicsFactory import ImgFactory
+
+PIECES_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent / "pieces"
+
+
+def full_frame_draw(game):
+    """The original `_draw()`: recompose the whole canvas every frame."""
+    game.main_canvas.img = game.initial_main_canvas_img_data.copy()
+    game.board.img.draw_on(game.main_canvas, game.board_offset_x, game.board_offset_y)
+    for p in game.pieces:
+        x_pix, y_pix = p.state.physics.get_pos_pix()
+        p.state.graphics.get_img().draw_on(game.main_canvas, game.board_offset_x + x_pix,
+                                           game.board_offset_y + y_pix)
+    game.score_display.draw(game.main_canvas)
+    game.move_list_display.draw(game.main_canvas)
+    game.text_overlay_display.draw(game.main_canvas)
+
+
+def _fill_move_lists(game):
+    for i in range(game.move_list_display.max_moves_to_show):
+        c = i % 8
+        game.move_list_display.update("move", piece_id="PW", from_cell=(6, c), to_cell=(5, c), player=1)
+        game.move_list_display.update("move", piece_id="PB", from_cell=(1, c), to_cell=(2, c), player=2)
+
+
+def _fps(game, draw, frames: int, moving: bool) -> float:
+    if moving:
+        pw = game.pos[(6, 4)][0]
+        game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(6, 4), (4, 4)], 1))
+    game.step(1)
+    draw()
+    started = time.perf_counter()
+    for _ in range(frames):
+        if moving:
+            game.step(2)  # ~1 px per frame at the default speed
+        draw()
+    return frames / (time.perf_counter() - started)
+
+
+def main(frames: int = 300):
+    for moving in (False, True):
+        label = "one piece moving" if moving else "static board"
+        results = []
+        for name in ("full frame", "_draw"):
+            game = create_game(PIECES_ROOT, ImgFactory(), clock=VirtualClock())
+            game.start_simulation()
+            game.simulate(5_000)  # let the welcome overlay expire
+            _fill_move_lists(game)
+            draw = (lambda g=game: full_frame_draw(g)) if name == "full frame" else game._draw
+            results.append(f"{name} {_fps(game, draw, frames, moving):7.0f} fps")
+        print(f"{label:>17}: " + " | ".join(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# KFC_Py/Benchmarks/bench_input_latency.py
+"""Command latency of the graphical game loop behind a slow display.
+
+Replaces `_show()` with a 30 ms sleep (a slow ``imshow``/``waitKey``) and
+measures how long a queued command waits before the game applies it:
+once with the original single-threaded loop (tick, draw, show) and once
+with the simulation thread + render loop of `Game.run()`.  Run from
+KFC_Py:
+
+    python Benchmarks/bench_input_latency.py
+"""
+
+import os, pathlib, statistics, sys, threading, time
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from Command import Command
+from GameFactory import create_game
+from GraphicsFactory import ImgFactory
+
+PIECES_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent / "pieces"
+SHOW_MS = 30
+
+
+def single_threaded_loop(game):
+    """The original `_run_game_loop(is_with_graphics=True)`."""
+    while game.running:
+        game._tick(game.game_time_ms())
+        game._draw()
+        game._show()
+
+
+def _latencies(threaded: bool, commands: int):
+    game = create_game(PIECES_ROOT, ImgFactory())
+    game.start_simulation()
+    game._show = lambda: time.sleep(SHOW_MS / 1000)
+    applied = {}
+    process = game._process_input
+
+    def timed_process(cmd):
+        applied.setdefault(cmd.piece_id, time.perf_counter())
+        process(cmd)
+    game._process_input = timed_process
+
+    if threaded:
+        sim = threading.Thread(target=game._run_game_loop, kwargs={"is_with_graphics": True})
+        loop = threading.Thread(target=game._render_loop, args=(sim,))
+        sim.start()
+    else:
+        loop = threading.Thread(target=single_threaded_loop, args=(game,))
+    loop.start()
+
+    sent = {}
+    for i in range(commands):
+        time.sleep(0.013 * (1 + i % 3))  # uncorrelated with the display period
+        piece_id = f"bench{i}"
+        sent[piece_id] = time.perf_counter()
+        game.user_input_queue.put(Command(game.game_time_ms(), piece_id, "jump", [(0, 0)], 1))
+    time.sleep(0.1)
+    game.running = False
+    loop.join()
+    return [(applied[k] - t) * 1000 for k, t in sent.items()]
+
+
+def main(commands: int = 60):
+    for name, threaded in (("single thread", False), ("sim + render", True)):
+        lat = sorted(_latencies(threaded, commands))
+        print(f"{name:>14}: median {statistics.median(lat):5.1f} ms | "
+              f"p95 {lat[int(0.95 * len(lat)) - 1]:5.1f} ms | max {lat[-1]:5.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
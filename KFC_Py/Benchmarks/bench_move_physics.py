@@ -0,0 +1,73 @@
+# KFC_Py/Benchmarks/bench_move_physics.py
+"""Micro-benchmark of `MovePhysics.update()` / `reset()`.
+
+Compares the current float-only implementation with the previous
+NumPy-based one (kept below as `LegacyMovePhysics`).  Run from KFC_Py:
+
+    python Benchmarks/bench_move_physics.py
+"""
+
+import math, pathlib, sys, timeit
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from Board import Board
+from Command import Command
+from Physics import MovePhysics
+from img import Img
+
+
+class LegacyMovePhysics(MovePhysics):
+    """`MovePhysics` as it was before reset() precomputed the path."""
+
+    def reset(self, cmd: Command):
+        self._start_cell = cmd.params[0]
+        self._end_cell = cmd.params[1]
+        self._start_ms = cmd.timestamp
+        self._curr_pos_m = self.board.cell_to_m(self._start_cell)
+        start_pos = np.array(self.board.cell_to_m(self._start_cell))
+        end_pos = np.array(self.board.cell_to_m(self._end_cell))
+        self._movement_vector = end_pos - start_pos
+        self._movement_vector_length = math.hypot(*self._movement_vector)
+        if self._movement_vector_length == 0:
+            self._movement_vector = np.array([0.0, 0.0])
+            self._duration_s = 0
+        else:
+            self._movement_vector = self._movement_vector / self._movement_vector_length
+            self._duration_s = self._movement_vector_length / self._speed_m_s
+
+    def update(self, now_ms: int):
+        seconds_passed = (now_ms - self._start_ms) / 1000
+        self._curr_pos_m = np.array(
+            self.board.cell_to_m(self._start_cell)) + self._movement_vector * seconds_passed * self._speed_m_s
+
+        if seconds_passed >= self._duration_s:
+            return Command(now_ms, None, "done", [self._end_cell])
+
+        return None
+
+
+def _rate(physics_cls, what: str, number: int) -> float:
+    board = Board(77, 77, 8, 8, Img())
+    physics = physics_cls(board, 1.0)
+    cmd = Command(0, "QW", "move", [(7, 0), (0, 7)])
+    physics.reset(cmd)
+    if what == "update":
+        stmt = lambda: physics.update(1234)
+    else:
+        stmt = lambda: physics.reset(cmd)
+    best = min(timeit.repeat(stmt, number=number, repeat=5))
+    return number / best
+
+
+def main(number: int = 200_000):
+    for what in ("update", "reset"):
+        before = _rate(LegacyMovePhysics, what, number)
+        after = _rate(MovePhysics, what, number)
+        print(f"{what:>6}: {before / 1e6:6.2f} M/s -> {after / 1e6:6.2f} M/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# KFC_Py/Clock.py
+
+import time
+from abc import ABC, abstractmethod
+
+
+class Clock(ABC):
+    """Source of game time in milliseconds since the game started."""
+
+    @abstractmethod
+    def now_ms(self) -> int: ...
+
+
+class WallClock(Clock):
+    """Real time, read from `time.monotonic_ns()` and optionally sped up."""
+
+    def __init__(self, time_factor: int = 1):
+        self.start_ns = time.monotonic_ns()
+        self.time_factor = time_factor
+
+    def now_ms(self) -> int:
+        return self.time_factor * (time.monotonic_ns() - self.start_ns) // 1_000_000
+
+
+class VirtualClock(Clock):
+    """Deterministic clock that only moves when it is explicitly advanced.
+
+    Used for headless simulation: tests, replays and bot self-play advance
+    the game with `Game.step(dt_ms)` instead of sleeping on wall time.
+    """
+
+    def __init__(self, start_ms: int = 0):
+        self._now_ms = start_ms
+
+    def now_ms(self) -> int:
+        return self._now_ms
+
+    def advance(self, dt_ms: int) -> int:
+        """Move the clock forward by *dt_ms* and return the new time."""
+        if dt_ms < 0:
+            raise ValueError(f"cannot move clock backwards (dt_ms={dt_ms})")
+        self._now_ms += dt_ms
+        return self._now_ms
+
+    def set(self, now_ms: int) -> int:
+        """Jump the clock to *now_ms* (never backwards)."""
+        return self.advance(now_ms - self._now_ms)
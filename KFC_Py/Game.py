@@ -1,18 +1,25 @@
 # KFC_Py/Game.py
 
-import queue, threading, time, math, logging
-from typing import List, Dict, Tuple, Optional, Set
-from collections import defaultdict
+import dataclasses, heapq, itertools, queue, threading, time, math, logging
+from typing import List, Dict, Tuple, Optional
+from collections import deque
 
 import cv2
+import numpy as np
 from Board import Board
 from Command import Command
 from Piece import Piece
 from img import Img
 from KeyboardInput import KeyboardProcessor, KeyboardProducer 
-from GraphicsFactory import GraphicsFactory 
-
-from EventSystem import Publisher, Observer 
+from GraphicsFactory import GraphicsFactory, ImgFactory
+from AssetRegistry import ASSET_REGISTRY
+from Clock import Clock, WallClock, VirtualClock
+from OccupancyIndex import OccupancyIndex
+from Renderer import DirtyRectRenderer, Frame, FrameBuffer, FramePacer, FrameStats, SceneItem, rect_item, sprite_item, text_item
+from PieceStore import PieceStore
+from StateMachine import PieceRecord
+
+from EventSystem import Publisher
 from GameObservers import ScoreDisplay, TextOverlayDisplay 
 from GameObservers import MoveListDisplay
 from GameObservers import SoundPlayer 
@@ -20,12 +27,25 @@ from GameObservers import SoundPlayer
 
 logger = logging.getLogger(__name__)
 
+# Fixed simulation step used by step()/simulate() when no dt is given.
+SIM_TICK_MS = 10
+# Longest a headless loop sleeps with nothing scheduled, so it still notices
+# `running` being cleared from another thread.
+IDLE_WAKE_MS = 500
+# Default frame-rate cap of the graphical loop (see FramePacer).
+TARGET_FPS = 60
+# How far a remote client may back-date a command (see accept_time()).
+MAX_COMMAND_AGE_MS = 250
+# Reorder window used by server rooms (see Game.reorder_window_ms).
+REORDER_WINDOW_MS = 100
+
 
 class InvalidBoard(Exception): ...
 
 
 class Game(Publisher):
-    def __init__(self, pieces: List[Piece], board: Board, pieces_root=None, graphics_factory=None, img_factory=None):
+    def __init__(self, pieces: List[Piece], board: Board, pieces_root=None, graphics_factory=None, img_factory=None,
+                 clock: Optional[Clock] = None, piece_store: bool = False, target_fps: float = TARGET_FPS):
         super().__init__()
         if not self._validate(pieces):
             raise InvalidBoard("missing kings")
@@ -34,11 +54,24 @@ class Game(Publisher):
         self.pieces_root = pieces_root
         self.graphics_factory = graphics_factory
         self.img_factory = img_factory
-        self.START_NS = time.monotonic_ns()
-        self._time_factor = 1
+        # Injectable time source: WallClock for live play, VirtualClock for
+        # deterministic headless simulation driven by step().
+        self.clock: Clock = clock or WallClock()
         self.user_input_queue = queue.Queue()
-
-        self.pos: Dict[Tuple[int, int], List[Piece]] = defaultdict(list)
+        # commands submitted without locking (see submit()) or taken off the
+        # queue while waiting, run on the next tick
+        self._pending_input: deque = deque()
+        # Commands are held until game time reaches their stamp plus this
+        # window, so ones that arrive out of order still run in stamp
+        # order.  0 (local play) runs each tick's commands straight away.
+        self.reorder_window_ms = 0
+        self._held: List[Tuple[int, int, Command]] = []  # heap of (stamp, arrival, cmd)
+        self._arrivals = itertools.count()
+
+        self.pos: OccupancyIndex = OccupancyIndex(pieces, board.W_cells)
+        # Optional NumPy mirror of the pieces: headless ticks then only call
+        # Piece.update() for pieces whose cell or timer actually changed.
+        self.store: Optional[PieceStore] = PieceStore(board, pieces) if piece_store else None
         self.piece_by_id: Dict[str, Piece] = {p.id: p for p in pieces}
 
         self.selected_id_1: Optional[str] = None
@@ -48,6 +81,9 @@ class Game(Publisher):
 
         self.keyboard_processor: Optional[KeyboardProcessor] = None
         self.keyboard_producer: Optional[KeyboardProducer] = None
+        # per-player cursors, created by start_user_input_thread()
+        self.kp1: Optional[KeyboardProcessor] = None
+        self.kp2: Optional[KeyboardProcessor] = None
         
         self.running = True
 
@@ -55,11 +91,27 @@ class Game(Publisher):
         if not full_bg_path.exists():
             raise FileNotFoundError(f"Missing background image: {full_bg_path}")
         
-        self.main_canvas = Img().read(full_bg_path, size=None, keep_aspect=False)
-        self.initial_main_canvas_img_data = self.main_canvas.img.copy()
+        # The background is loaded once per process and shared read-only;
+        # _draw() composes each frame on a private copy of it.
+        background = ASSET_REGISTRY.image(full_bg_path, None, ImgFactory())
+        background.img.setflags(write=False)
+        self.main_canvas = Img()
+        self.main_canvas.img = background.img
+        self.initial_main_canvas_img_data = background.img
 
         self.canvas_width = self.main_canvas.img.shape[1]
         self.canvas_height = self.main_canvas.img.shape[0]
+        # _draw() only recomposes the regions that changed since last frame,
+        # on top of the static background+board layer (see _static_layer())
+        self.renderer = DirtyRectRenderer(self.main_canvas, self.initial_main_canvas_img_data)
+        self._static_sources: Optional[tuple] = None
+        # display name -> (labels list, its text items); see _scene()
+        self._label_items: Dict[str, Tuple[list, List[SceneItem]]] = {}
+        # frames published by the simulation thread for the render loop
+        self.frames = FrameBuffer()
+        # caps how often frames are published and presented; see frame_stats()
+        self.pacer = FramePacer(target_fps)
+        self._next_frame_ms = 0
 
         self.board_offset_x = 308 
         self.board_offset_y = 98 
@@ -80,10 +132,7 @@ class Game(Publisher):
         text_display_pos = (self.canvas_width // 2, self.canvas_height // 2) # מרכז המסך
         self.text_overlay_display = TextOverlayDisplay(self, text_display_pos, welcome_text, goodbye_text, duration_ms=3000)
         self.subscribe(self.text_overlay_display)
-                # יצירת חלון המשחק הראשי ומיקומו
         self.game_window_name = "KungFu Chess"
-        cv2.namedWindow(self.game_window_name, cv2.WINDOW_AUTOSIZE) 
-        cv2.moveWindow(self.game_window_name, 0, 0) 
 
         sounds_folder_path = self.pieces_root / "sounds" 
         self.sound_player = SoundPlayer(sounds_folder_path)
@@ -91,7 +140,17 @@ class Game(Publisher):
 
 
     def game_time_ms(self) -> int:
-        return self._time_factor * (time.monotonic_ns() - self.START_NS) // 1_000_000
+        return self.clock.now_ms()
+
+    @property
+    def _time_factor(self) -> int:
+        # speed-up of a WallClock; build one with time_factor to change it
+        return getattr(self.clock, "time_factor", 1)
+
+    def _open_window(self):
+        # יצירת חלון המשחק הראשי ומיקומו
+        cv2.namedWindow(self.game_window_name, cv2.WINDOW_AUTOSIZE)
+        cv2.moveWindow(self.game_window_name, 0, 0)
 
     def clone_board(self) -> Board:
         return self.board.clone()
@@ -128,30 +187,156 @@ class Game(Publisher):
 
 
     def _update_cell2piece_map(self):
-        self.pos.clear()
+        """Full re-index; the tick loop keeps `self.pos` current incrementally."""
+        self.pos.rebuild(self.pieces)
+        if self.store is not None:
+            self.store.rebuild(self.pieces)
+
+    def _piece_reset(self, piece: Piece):
+        """Re-index *piece* after its state was reset to a new command."""
+        self.pos.sync(piece)
+        if self.store is not None:
+            self.store.load(piece)
+
+    def _tick(self, now: int, is_with_graphics: bool = False):
+        """Run one iteration of the game logic at game time *now*."""
+        if self.store is None or is_with_graphics:
+            # every sprite is drawn this tick, so every piece must advance
+            touched = self.pieces
+        else:
+            touched = self.store.update(now)
+        changed: List[str] = []
+        for p in touched:
+            state_changed = p.update(now)
+            if state_changed:
+                self._piece_reset(p)
+                # capture rules depend on the state, so re-check this cell
+                self.pos.mark_dirty(self.pos.cell_of(p))
+                changed.append(p.id)
+            elif p.state.physics.is_in_motion():
+                self.pos.sync(p)
+
+        for cmd in self._due_commands(now):
+            self._process_input(cmd)
+
+        self._resolve_collisions()
+
+        # landings and rests ending are not commands, so observers would not
+        # otherwise hear about them; one event covers the whole tick
+        if changed:
+            self.notify("state_changed", piece_ids=changed, timestamp=now)
+
+        # frames are only built at the target rate, however often we tick
+        if is_with_graphics and now >= self._next_frame_ms:
+            self._next_frame_ms = now + int(1000 * self.pacer.period_s)
+            self.frames.publish(now, self._scene())
+
+    def _due_commands(self, now: int) -> List[Command]:
+        """Commands to run at *now*, in intended (stamp) order.
+
+        Without a reorder window that is everything queued since the last
+        tick.  With one, a command waits until ``stamp + reorder_window_ms``
+        so a rival stamped earlier but delivered later can still overtake
+        it; equal stamps keep their arrival order.
+        """
+        held = self._held
+        while self._pending_input:
+            cmd = self._pending_input.popleft()
+            heapq.heappush(held, (cmd.timestamp, next(self._arrivals), cmd))
+        while not self.user_input_queue.empty():
+            cmd = self.user_input_queue.get()
+            heapq.heappush(held, (cmd.timestamp, next(self._arrivals), cmd))
+        due = []
+        window = self.reorder_window_ms
+        while held and (window == 0 or held[0][0] + window <= now):
+            due.append(heapq.heappop(held)[2])
+        return due
+
+    def submit(self, cmd: Command):
+        """Queue *cmd* for the next tick from any thread.
+
+        A deque append is atomic, so unlike ``user_input_queue.put()`` this
+        skips the queue's lock and condition and is cheap enough to call
+        straight from an event loop, with no hop to another thread.  It
+        does not wake `_wait_for_next_event()`; callers that drive the game
+        with `poll()` wake their own scheduler.
+        """
+        self._pending_input.append(cmd)
+
+    def accept_time(self, stamp_ms) -> int:
+        """Game time to run a remote command at, given the time its client
+        stamped on it (see ``StateProtocol.ClockSync``).
+
+        Stamps are trusted within ``[now - MAX_COMMAND_AGE_MS, now]`` so
+        network delay does not decide races; anything older is clamped to
+        the window, and future, missing or non-finite stamps mean now.
+        """
+        now = self.game_time_ms()
+        if not isinstance(stamp_ms, (int, float)) or isinstance(stamp_ms, bool) \
+                or not math.isfinite(stamp_ms):
+            return now
+        return int(min(max(stamp_ms, now - MAX_COMMAND_AGE_MS), now))
+
+    def next_deadline_ms(self) -> Optional[int]:
+        """Earliest game time at which some piece needs a tick (an arrival,
+        a cell crossing or a rest/jump cooldown expiring) or a held command
+        is due, or None if every piece is idle and nothing is held."""
+        now = self.game_time_ms()
+        # a held command is due when its reorder window closes
+        deadline = self._held[0][0] + self.reorder_window_ms if self._held else None
+        if self.store is not None:
+            t = self.store.next_deadline_ms(now)
+            return t if deadline is None or (t is not None and t < deadline) else deadline
         for p in self.pieces:
-            self.pos[p.current_cell()].append(p)
+            t = p.state.physics.next_event_ms(now)
+            if t is not None and (deadline is None or t < deadline):
+                deadline = t
+        return deadline
+
+    def _wait_for_next_event(self, max_wait_ms: int = IDLE_WAKE_MS):
+        """Block on the input queue until the next deadline.
+
+        Used by the game loop instead of spinning: an idle game sleeps
+        until a command arrives (waking every *max_wait_ms* to check
+        `running`), a busy one until its next physics deadline.
+        """
+        if self._pending_input:
+            return
+        now = self.game_time_ms()
+        deadline = self.next_deadline_ms()
+        wait_ms = max_wait_ms if deadline is None else min(deadline - now, max_wait_ms)
+        if wait_ms <= 0:
+            return
+        try:
+            cmd = self.user_input_queue.get(timeout=wait_ms / (1000 * self._time_factor))
+        except queue.Empty:
+            return
+        self._pending_input.append(cmd)
+
+    def poll(self) -> Optional[int]:
+        """Run a headless tick if input is queued or a deadline has passed.
+
+        Lets one external scheduler drive many games (see GameRooms.py).
+        Returns the game-time ms until this game next needs polling, or None
+        while it is idle until input arrives.
+        """
+        now = self.game_time_ms()
+        deadline = self.next_deadline_ms()
+        if self._pending_input or not self.user_input_queue.empty() or \
+                (deadline is not None and deadline <= now):
+            self._tick(now)
+            deadline = self.next_deadline_ms()
+        if deadline is None:
+            return None
+        return max(0, deadline - self.game_time_ms())
+
+    def is_over(self) -> bool:
+        return self._is_win() or not self.running
 
     def _run_game_loop(self, num_iterations=None, is_with_graphics=True):
         it_counter = 0
         while not self._is_win() and self.running: 
-            now = self.game_time_ms()
-
-            for p in self.pieces:
-                p.update(now)
-
-            self._update_cell2piece_map()
-
-            while not self.user_input_queue.empty():
-                cmd: Command = self.user_input_queue.get()
-                
-                self._process_input(cmd)
-
-            if is_with_graphics:
-                self._draw()
-                self._show()
-
-            self._resolve_collisions()
+            self._tick(self.game_time_ms(), is_with_graphics)
 
             if num_iterations is not None:
                 it_counter += 1
@@ -159,16 +344,82 @@ class Game(Publisher):
                     self.running = False
                     return
 
+            if is_with_graphics:
+                # wake for input, a deadline or the next frame, whichever is first
+                self._wait_for_next_event(self._next_frame_ms - self.game_time_ms())
+            else:
+                self._wait_for_next_event()
+
+    # ─── headless fixed-timestep simulation ──────────────────────────────
+    def start_simulation(self):
+        """Prepare a headless game that is advanced with `step()`.
+
+        Resets every piece at the current clock time and publishes
+        `game_start`, like `run()` does, but starts no threads or windows.
+        """
+        now = self.game_time_ms()
+        for p in self.pieces:
+            p.reset(now)
+        self._update_cell2piece_map()
+        self.running = True
+        self.notify("game_start", timestamp=now)
+
+    def step(self, dt_ms: int = SIM_TICK_MS) -> int:
+        """Advance the virtual clock by *dt_ms* and run a single tick.
+
+        Returns the new game time. Requires the game to be built with a
+        `VirtualClock`; wall-clock games are driven by `run()`.
+        """
+        if not isinstance(self.clock, VirtualClock):
+            raise RuntimeError("Game.step() requires a VirtualClock")
+        now = self.clock.advance(dt_ms)
+        self._tick(now)
+        return now
+
+    def simulate(self, duration_ms: int, dt_ms: Optional[int] = SIM_TICK_MS) -> int:
+        """Step the game for *duration_ms* of game time or until it is over.
+
+        With ``dt_ms=None`` the clock jumps straight from one deadline to the
+        next (see `next_deadline_ms()`), so idle stretches cost a single tick.
+        Returns the number of ticks that were run.
+        """
+        end_ms = self.game_time_ms() + duration_ms
+        ticks = 0
+        while self.running and not self._is_win() and self.game_time_ms() < end_ms:
+            now = self.game_time_ms()
+            if dt_ms is not None:
+                target = now + dt_ms
+            elif self._pending_input or not self.user_input_queue.empty():
+                target = now
+            else:
+                deadline = self.next_deadline_ms()
+                target = end_ms if deadline is None else deadline
+            self.step(min(max(target - now, 1), end_ms - now))
+            ticks += 1
+        return ticks
+
     def run(self, num_iterations=None, is_with_graphics=True):
+        if is_with_graphics:
+            self._open_window()
         self.start_user_input_thread()
-        start_ms = self.START_NS
+        start_ms = self.game_time_ms()
         for p in self.pieces:
             p.reset(start_ms)
+        self._update_cell2piece_map()
 
         self.running = True
         self.notify("game_start", timestamp=self.game_time_ms()) # פרסום אירוע game_start
 
-        self._run_game_loop(num_iterations, is_with_graphics)
+        if is_with_graphics:
+            # game logic runs on its own thread; this (GUI) thread only
+            # composes and shows the frames it publishes
+            sim = threading.Thread(target=self._run_game_loop, args=(num_iterations, True),
+                                   name="simulation", daemon=True)
+            sim.start()
+            self._render_loop(sim)
+            sim.join()
+        else:
+            self._run_game_loop(num_iterations, is_with_graphics)
 
         self._announce_win()
 
@@ -185,16 +436,69 @@ class Game(Publisher):
         # mixer.quit() # סגור את המיקסר של Pygame בסיום המשחק
 
 
-    def _draw(self):
-        self.main_canvas.img = self.initial_main_canvas_img_data.copy()
+    def _render_loop(self, sim: threading.Thread):
+        """Compose and show published frames until *sim* finishes.
 
-        self.board.img.draw_on(self.main_canvas, self.board_offset_x, self.board_offset_y)
+        Paced by `self.pacer`: at most `target_fps` frames are composed per
+        second, frames published while the previous one was being shown are
+        skipped, and the window keeps pumping events (ESC / close clear
+        `running`) even when nothing changes.
+        """
+        seq = 0
+        pacer = self.pacer
+        while sim.is_alive():
+            frame = self.frames.wait(seq, timeout=pacer.period_s)
+            if frame is None:
+                self._show()
+                continue
+            started = pacer.clock()
+            skipped, seq = frame.seq - seq - 1, frame.seq
+            self._compose(frame)
+            self._show()
+            time.sleep(pacer.frame_done(started, skipped))
+
+    def frame_stats(self) -> FrameStats:
+        """Timing of the recently presented frames (see `FrameStats`)."""
+        return self.pacer.stats()
+
+    def _compose(self, frame: Frame):
+        self._static_layer()
+        self.renderer.render(frame.items)
+
+    def _draw(self):
+        """Publish and compose a frame of the current state on this thread."""
+        self._compose(self.frames.publish(self.game_time_ms(), self._scene()))
+
+    def _static_layer(self) -> np.ndarray:
+        """Background with the board composited on it.
+
+        Neither changes during play, so the blend is done once and the
+        result becomes the renderer's base layer; it is rebuilt only if the
+        background, board image or board placement changes (e.g. a resize).
+        """
+        background, board_img = self.initial_main_canvas_img_data, self.board.img.img
+        offsets = (self.board_offset_x, self.board_offset_y)
+        cached = self._static_sources
+        if cached is None or cached[0] is not background or cached[1] is not board_img or cached[2] != offsets:
+            layer = Img()
+            layer.img = self.initial_main_canvas_img_data.copy()
+            self.board.img.draw_on(layer, self.board_offset_x, self.board_offset_y)
+            layer.img.setflags(write=False)
+            self._static_sources = (background, board_img, offsets)
+            self.renderer.background = layer.img
+            self.renderer.invalidate()
+        return self.renderer.background
+
+    def _scene(self) -> List[SceneItem]:
+        """Everything drawn over the static layer this frame, back to front."""
+        ox, oy = self.board_offset_x, self.board_offset_y
+        cell = (self.board.cell_W_pix, self.board.cell_H_pix)
+        items: List[SceneItem] = []
 
         for p in self.pieces:
             x_pix, y_pix = p.state.physics.get_pos_pix() 
             sprite = p.state.graphics.get_img()
-            
-            sprite.draw_on(self.main_canvas, self.board_offset_x + x_pix, self.board_offset_y + y_pix)
+            items.append(sprite_item(p.id, sprite, ox + x_pix, oy + y_pix, cell))
 
         if self.kp1 and self.kp2:
             for player, kp, last in (
@@ -202,23 +506,29 @@ class Game(Publisher):
                     (2, self.kp2, 'last_cursor2')
             ):
                 r, c = kp.get_cursor()
-                y1 = r * self.board.cell_H_pix + self.board_offset_y
-                x1 = c * self.board.cell_W_pix + self.board_offset_x
+                y1 = r * self.board.cell_H_pix + oy
+                x1 = c * self.board.cell_W_pix + ox
                 y2 = y1 + self.board.cell_H_pix - 1
                 x2 = x1 + self.board.cell_W_pix - 1
                 color = (0, 255, 0, 255) if player == 1 else (255, 0, 0, 255) 
-                self.main_canvas.draw_rect(x1, y1, x2, y2, color)
+                items.append(rect_item(("cursor", player), x1, y1, x2, y2, color))
 
                 prev = getattr(self, last)
                 if prev != (r, c):
                     logger.debug("Marker P%s moved to (%s, %s)", player, r, c)
                     setattr(self, last, (r, c))
 
-        self.score_display.draw(self.main_canvas)
-        self.move_list_display.draw(self.main_canvas)
-                
-        # הקריאה למתודת הציור של TextOverlayDisplay
-        self.text_overlay_display.draw(self.main_canvas)
+        for name, display in (("score", self.score_display),
+                              ("moves", self.move_list_display),
+                              ("overlay", self.text_overlay_display)):
+            labels = display.labels()
+            cached = self._label_items.get(name)
+            if cached is None or cached[0] is not labels:
+                # displays hand back the same list until their text changes
+                cached = (labels, [text_item((name, i), *label) for i, label in enumerate(labels)])
+                self._label_items[name] = cached
+            items.extend(cached[1])
+        return items
 
 
     def _show(self):
@@ -235,6 +545,9 @@ class Game(Publisher):
         return piece_id[1]
 
     def _process_input(self, cmd: Command):
+        if not isinstance(cmd.piece_id, str):
+            logger.debug("Rejected command with piece id %r", cmd.piece_id)
+            return
         mover = self.piece_by_id.get(cmd.piece_id)
         if not mover:
             logger.debug("Unknown piece id %s", cmd.piece_id)
@@ -247,8 +560,25 @@ class Game(Publisher):
             return
 
         original_cell = mover.current_cell() 
-
-        move_successful_in_state_machine = mover.on_command(cmd, self.pos)
+        # remote commands leave the source cell to be read here, on the
+        # thread that owns the pieces
+        if cmd.params and cmd.params[0] is None:
+            cmd = dataclasses.replace(cmd, params=[original_cell, *cmd.params[1:]])
+
+        # a back-dated command cannot start before the piece's current state
+        start_ms = mover.state.physics.get_start_ms()
+        if cmd.timestamp < start_ms:
+            cmd = dataclasses.replace(cmd, timestamp=start_ms)
+
+        try:
+            move_successful_in_state_machine = mover.on_command(cmd, self.pos)
+        except (TypeError, ValueError) as e:
+            # malformed command (e.g. stale source cell from a remote client)
+            logger.debug("Rejected command %s: %s", cmd, e)
+            return
+        if move_successful_in_state_machine:
+            self._piece_reset(mover)
+            self.pos.mark_dirty(self.pos.cell_of(mover))
 
         # פרסם אירוע אם המהלך חוקי
         if move_successful_in_state_machine and cmd.type in ["move", "jump"]:
@@ -266,11 +596,15 @@ class Game(Publisher):
             print(f"DEBUG: Game did NOT publish '{cmd.type}' event for {cmd.piece_id} (state machine rejected or not a move/jump).")
 
     def _resolve_collisions(self):
-        self._update_cell2piece_map()
-        occupied = self.pos
-
-        for cell, plist in occupied.items():
-            if len(plist) < 2:
+        """Resolve captures and promotions in cells changed since the last call.
+
+        Only cells whose occupancy or occupants' state changed can produce a
+        new outcome, so a quiet board costs nothing here.
+        """
+        dirty = self.pos.pop_dirty()
+        for cell in dirty:
+            plist = self.pos.get(cell)
+            if not plist or len(plist) < 2:
                 continue
 
             moving_pieces = [p for p in plist if getattr(p.state.physics, '_start_cell', cell) != cell]
@@ -294,6 +628,7 @@ class Game(Publisher):
                         from Command import Command
                         cmd = Command(now, winner.id, move_type, [start_cell, start_cell])
                         winner.state.reset(cmd)
+                        self._piece_reset(winner)
                     continue
             else:
                 if any(p is not winner and self._side_of(p.id) == winner_side for p in plist):
@@ -304,6 +639,7 @@ class Game(Publisher):
                         from Command import Command
                         cmd = Command(now, winner.id, move_type, [start_cell, start_cell])
                         winner.state.reset(cmd)
+                        self._piece_reset(winner)
                     continue
 
             if not winner.state.can_capture():
@@ -318,6 +654,9 @@ class Game(Publisher):
             for p in to_remove:
                 if p in self.pieces:
                     self.pieces.remove(p)
+                    self.pos.remove(p)
+                    if self.store is not None:
+                        self.store.remove(p)
                     captured_piece_type = p.id[0] 
                     captured_by_player_side = winner_side 
                     self.notify("piece_captured", 
@@ -328,21 +667,27 @@ class Game(Publisher):
 
 
         # --- Pawn Promotion ---
-        from PieceFactory import PieceFactory # ייבוא כאן כדי למנוע תלות מעגלית
         to_promote = []
-        for p in list(self.pieces):
-            if p.id.startswith('PW') and p.current_cell()[0] == 0:
-                to_promote.append((p, 'QW'))
-            elif p.id.startswith('PB') and p.current_cell()[0] == self.board.H_cells - 1:
-                to_promote.append((p, 'QB'))
+        for cell in dirty:
+            if cell[0] not in (0, self.board.H_cells - 1):
+                continue
+            for p in list(self.pos.get(cell, ())):
+                if p.id.startswith('PW') and p.current_cell()[0] == 0:
+                    to_promote.append((p, 'QW'))
+                elif p.id.startswith('PB') and p.current_cell()[0] == self.board.H_cells - 1:
+                    to_promote.append((p, 'QB'))
         if to_promote:
-            gfx_factory = self.graphics_factory or (GraphicsFactory(self.img_factory) if self.img_factory else None)
-            factory = PieceFactory(self.board, self.pieces_root, graphics_factory=gfx_factory)
+            factory = self._piece_factory()
             for pawn, queen_type in to_promote:
                 cell = pawn.current_cell()
                 self.pieces.remove(pawn)
+                self.pos.remove(pawn)
                 queen = factory.create_piece(queen_type, cell)
                 self.pieces.append(queen)
+                self.pos.add(queen)
+                if self.store is not None:
+                    self.store.remove(pawn)
+                    self.store.add(queen)
                 self.piece_by_id[queen.id] = queen
                 if pawn.id in self.piece_by_id:
                     del self.piece_by_id[pawn.id]
@@ -355,6 +700,63 @@ class Game(Publisher):
                 logger.info(f"PAWN PROMOTED: {pawn.id} to {queen.id}. Notifying observers.")
 
 
+    # ─── move generation ─────────────────────────────────────────────────
+    def legal_commands(self, side: str) -> List[Command]:
+        """All move and jump commands *side* ('W' or 'B') may issue right now.
+
+        Uses the same rules `State.on_command` enforces – each piece's current
+        state must accept the event, move tags and clear-path requirements
+        are honoured – so every returned command would be accepted by the
+        next tick.  Pieces in rest/move states have no such transitions and
+        contribute nothing.  A jump is offered in place, as the keyboard
+        issues it.
+        """
+        now = self.game_time_ms()
+        player = 1 if side == 'W' else 2
+        commands: List[Command] = []
+        for p in self.pieces:
+            if p.id[1] != side:
+                continue
+            state = p.state
+            cell = p.current_cell()
+            if state.moves is not None and "move" in state.transitions:
+                for dst in state.moves.legal_destinations(cell, self.pos, state.physics.is_need_clear_path(), side):
+                    commands.append(Command(now, p.id, "move", [cell, dst], player))
+            if "jump" in state.transitions:
+                commands.append(Command(now, p.id, "jump", [cell, cell], player))
+        return commands
+
+    def _piece_factory(self):
+        from PieceFactory import PieceFactory # ייבוא כאן כדי למנוע תלות מעגלית
+        gfx_factory = self.graphics_factory or (GraphicsFactory(self.img_factory) if self.img_factory else None)
+        return PieceFactory(self.board, self.pieces_root, graphics_factory=gfx_factory)
+
+    # ─── snapshots ───────────────────────────────────────────────────────
+    def snapshot(self) -> Tuple[PieceRecord, ...]:
+        """Cheap copy of the game position: one small record per piece."""
+        return tuple(p.snapshot() for p in self.pieces)
+
+    def restore(self, snapshot: Tuple[PieceRecord, ...]):
+        """Return the pieces to a `snapshot()`; captured pieces are recreated.
+
+        The clock is left alone – rewind a VirtualClock separately if needed.
+        """
+        existing = {p.id: p for p in self.pieces}
+        factory = None
+        pieces = []
+        for record in snapshot:
+            piece = existing.get(record.piece_id)
+            if piece is None:
+                factory = factory or self._piece_factory()
+                piece = factory.create_piece(record.piece_id.split("_")[0], record.start_cell)
+                piece.id = record.piece_id
+            piece.restore(record)
+            pieces.append(piece)
+        self.pieces = pieces
+        self.piece_by_id = {p.id: p for p in self.pieces}
+        self._update_cell2piece_map()
+        self._held.clear()
+
     def _validate(self, pieces):
         """Ensure both kings present and no two pieces share a cell."""
         has_white_king = has_black_king = False
@@ -2,20 +2,28 @@ import pathlib
 from typing import Union
 from Board import Board
 from PieceFactory import PieceFactory
-from Game import Game
+from Game import Game, TARGET_FPS
 from GraphicsFactory import ImgFactory # ודא ש-ImgFactory מיובא
+from Clock import Clock
+from AssetRegistry import ASSET_REGISTRY
 
 
 # הגדרת גודל התא בפיקסלים, מכאן יגזר גודל הלוח (8*64 = 512)
 CELL_PX = 77
 
 
-def create_game(pieces_root: Union[str, pathlib.Path], img_factory) -> Game:
+def create_game(pieces_root: Union[str, pathlib.Path], img_factory, clock: Clock = None,
+                piece_store: bool = False, target_fps: float = TARGET_FPS) -> Game:
     """Build a *Game* from the on-disk asset hierarchy rooted at *pieces_root*.
 
     This reads *board.csv* located inside *pieces_root*, creates a blank board
     (or loads board.png if present), instantiates every piece via PieceFactory
     and returns a ready-to-run *Game* instance.
+
+    Pass a `VirtualClock` as *clock* to get a deterministic headless game
+    that is advanced with `Game.step()` instead of wall time, and
+    ``piece_store=True`` to track pieces in a vectorised `PieceStore`.
+    *target_fps* caps the frame rate of the graphical loop.
     """
     pieces_root = pathlib.Path(pieces_root)
     board_csv = pieces_root / "board.csv"
@@ -27,13 +35,15 @@ def create_game(pieces_root: Union[str, pathlib.Path], img_factory) -> Game:
     if not board_png.exists():
         raise FileNotFoundError(board_png)
 
-    loader = img_factory
-
-    board_img = loader(board_png, (CELL_PX*8, CELL_PX*8), keep_aspect=False)
+    # the board image is never drawn into, so every game shares one copy
+    board_img = ASSET_REGISTRY.image(board_png, (CELL_PX*8, CELL_PX*8), img_factory)
 
     # צור את אובייקט ה-Board
     board = Board(CELL_PX, CELL_PX, 8, 8, board_img)
 
+    # decode every sprite once, up front, into a single shared atlas
+    ASSET_REGISTRY.atlas(pieces_root, (CELL_PX, CELL_PX), img_factory)
+
     from GraphicsFactory import GraphicsFactory
     gfx_factory = GraphicsFactory(img_factory)
     pf = PieceFactory(board, pieces_root, graphics_factory=gfx_factory)
@@ -46,7 +56,8 @@ def create_game(pieces_root: Union[str, pathlib.Path], img_factory) -> Game:
                     pieces.append(pf.create_piece(code, (r, c)))
 
     # העבר את pieces_root ל-Game כדי לטעון שם את full.jpg
-    game = Game(pieces, board, pieces_root=pieces_root, graphics_factory=gfx_factory, img_factory=img_factory)
+    game = Game(pieces, board, pieces_root=pieces_root, graphics_factory=gfx_factory, img_factory=img_factory,
+                clock=clock, piece_store=piece_store, target_fps=target_fps)
     # Blue cursor (player 2) on top black pawn, green cursor (player 1) on bottom white pawn
     pb_cell = (1, 4)
     pw_cell = (6, 4)
@@ -6,10 +6,11 @@ from typing import Dict, Tuple, List
 import threading 
 from pathlib import Path 
 
-import cv2
 import pygame
 from EventSystem import Observer
 from img import Img
+from Renderer import draw_text
+from TextCache import TEXT_CACHE
 
 try:
     import pygame.mixer as mixer # **שנה שורה זו**
@@ -21,6 +22,35 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Loaded sounds are shared by every SoundPlayer (i.e. every game) in the
+# process, keyed by path.  They belong to one mixer initialisation, so the
+# cache is emptied whenever the mixer (or its init settings) changes.
+_SOUND_CACHE: Dict[str, 'pygame.mixer.Sound'] = {}
+_SOUND_CACHE_MIXER: tuple = (None, None)  # (mixer, mixer.get_init()) of the cache
+
+
+def _load_sound(path_str: str) -> 'pygame.mixer.Sound':
+    global _SOUND_CACHE_MIXER
+    get_init = getattr(mixer, "get_init", None)
+    current = (mixer, get_init() if get_init else None)
+    if current[0] is not _SOUND_CACHE_MIXER[0] or current[1] != _SOUND_CACHE_MIXER[1]:
+        _SOUND_CACHE.clear()
+        _SOUND_CACHE_MIXER = current
+    sound_obj = _SOUND_CACHE.get(path_str)
+    if sound_obj is None:
+        sound_obj = _SOUND_CACHE[path_str] = mixer.Sound(path_str)
+    return sound_obj
+
+
+# (text, x, y, font_size, color, thickness) – one line of overlay text
+Label = Tuple[str, int, int, float, Tuple[int, int, int, int], int]
+
+
+def draw_labels(canvas: Img, labels: List[Label]):
+    for text, x, y, font_size, color, thickness in labels:
+        draw_text(canvas, text, x, y, font_size, color, thickness)
+
+
 class ScoreDisplay(Observer):
     PIECE_VALUES = {
         'P': 1,  # Pawn
@@ -36,6 +66,7 @@ class ScoreDisplay(Observer):
         self.player1_score_pos = player1_score_pos
         self.player2_score_pos = player2_score_pos
         self.scores = {'W': 0, 'B': 0}
+        self._labels: Tuple[tuple, List[Label]] = ((), [])
         logger.info("ScoreDisplay initialized and subscribed.")
 
     def update(self, event_type: str, *args, **kwargs):
@@ -60,17 +91,28 @@ class ScoreDisplay(Observer):
             logger.info(f"Game ended. Final Score: White: {self.scores['W']}, Black: {self.scores['B']}")
 
 
-    def draw(self, canvas: Img):
+    def labels(self) -> List[Label]:
+        # the same list is handed back until a score changes
+        key = (self.scores['W'], self.scores['B'], self.player1_score_pos, self.player2_score_pos)
+        if self._labels[0] == key:
+            return self._labels[1]
+
         font_size = 1.0 
         thickness = 2 
         
-        canvas.put_text(f"P1 (White) Score: {self.scores['W']}", 
-                        self.player1_score_pos[0], self.player1_score_pos[1], 
-                        font_size, color=(0, 255, 0, 255), thickness=thickness)
-        
-        canvas.put_text(f"P2 (Black) Score: {self.scores['B']}", 
-                        self.player2_score_pos[0], self.player2_score_pos[1], 
-                        font_size, color=(255, 0, 0, 255), thickness=thickness)
+        labels = [
+            (f"P1 (White) Score: {self.scores['W']}", 
+             self.player1_score_pos[0], self.player1_score_pos[1], 
+             font_size, (0, 255, 0, 255), thickness),
+            (f"P2 (Black) Score: {self.scores['B']}", 
+             self.player2_score_pos[0], self.player2_score_pos[1], 
+             font_size, (255, 0, 0, 255), thickness),
+        ]
+        self._labels = (key, labels)
+        return labels
+
+    def draw(self, canvas: Img):
+        draw_labels(canvas, self.labels())
 
 
 class MoveListDisplay(Observer):
@@ -80,6 +122,7 @@ class MoveListDisplay(Observer):
         self.max_moves_to_show = max_moves_to_show
         self.player1_moves: List[str] = []
         self.player2_moves: List[str] = []
+        self._labels: Tuple[tuple, List[Label]] = ((), [])
         logger.info("MoveListDisplay initialized and subscribed.")
 
     def update(self, event_type: str, *args, **kwargs):
@@ -117,24 +160,26 @@ class MoveListDisplay(Observer):
         elif event_type == "game_end":
             logger.info(f"Game ended. Total P1 moves: {len(self.player1_moves)}, P2 moves: {len(self.player2_moves)}")
 
-    def draw(self, canvas: Img):
+    def labels(self) -> List[Label]:
+        key = (tuple(self.player1_moves), tuple(self.player2_moves),
+               self.player1_display_pos, self.player2_display_pos)
+        if self._labels[0] == key:
+            return self._labels[1]
+
         font_size = 0.6
         thickness = 1
         line_height = 18 
 
-        current_y_p1 = self.player1_display_pos[1]
-        for i, move_str in enumerate(self.player1_moves):
-            canvas.put_text(move_str, 
-                            self.player1_display_pos[0], 
-                            current_y_p1 + (i * line_height), 
-                            font_size, color=(0, 0, 0, 255), thickness=thickness)
-        
-        current_y_p2 = self.player2_display_pos[1]
-        for i, move_str in enumerate(self.player2_moves):
-            canvas.put_text(move_str, 
-                            self.player2_display_pos[0], 
-                            current_y_p2 + (i * line_height), 
-                            font_size, color=(0, 0, 0, 255), thickness=thickness)
+        labels = []
+        for (x, y), moves in ((self.player1_display_pos, self.player1_moves),
+                              (self.player2_display_pos, self.player2_moves)):
+            for i, move_str in enumerate(moves):
+                labels.append((move_str, x, y + (i * line_height), font_size, (0, 0, 0, 255), thickness))
+        self._labels = (key, labels)
+        return labels
+
+    def draw(self, canvas: Img):
+        draw_labels(canvas, self.labels())
 
 
 class SoundPlayer(Observer):
@@ -172,9 +217,8 @@ class SoundPlayer(Observer):
         for event_type, path_str in list(self.sounds.items()): # path_str כי זה עדיין מחרוזת נתיב
             if path_str: 
                 try:
-                    # טען את הצליל כאובייקט mixer.Sound
-                    sound_obj = mixer.Sound(path_str) # **שנה שורה זו**
-                    self.sounds[event_type] = sound_obj
+                    # טען את הצליל כאובייקט mixer.Sound (פעם אחת לכל תהליך)
+                    self.sounds[event_type] = _load_sound(path_str)
                     logger.info(f"Loaded sound for '{event_type}': {path_str}")
                 except Exception as e:
                     logger.warning(f"Failed to load sound for '{event_type}' from '{path_str}': {e}. Sound will not play.")
@@ -235,11 +279,9 @@ class TextOverlayDisplay(Observer):
             self.display_start_time = timestamp
             logger.info(f"Displaying goodbye text: '{self.goodbye_text}'")
 
-    def draw(self, canvas: Img):
-        # **הדפסת Debug חדשה בתחילת מתודת draw**
-        
+    def labels(self) -> List[Label]:
         if not self.is_visible:
-            return
+            return []
 
         # חשב כמה זמן עבר מאז שהטקסט התחיל להופיע
         elapsed_time = self.game.game_time_ms() - self.display_start_time
@@ -247,7 +289,7 @@ class TextOverlayDisplay(Observer):
         if elapsed_time > self.duration_ms:
             self.is_visible = False # הטקסט נעלם לאחר משך הזמן שהוגדר
             self.current_text = ""
-            return
+            return []
 
         # אם הטקסט עדיין אמור להיות מוצג, צייר אותו
         font_size = 2.0 # גודל גופן גדול יותר לכיתובים מרכזיים
@@ -255,7 +297,7 @@ class TextOverlayDisplay(Observer):
         text_color = (0, 0, 255, 255) 
         
         # מרכז את הטקסט
-        text_size, _ = cv2.getTextSize(self.current_text, cv2.FONT_HERSHEY_SIMPLEX, font_size, thickness)
+        text_size, _ = TEXT_CACHE.measure(self.current_text, font_size, thickness)
         text_w, text_h = text_size
         
         canvas_center_x = self.game.canvas_width // 2
@@ -264,9 +306,13 @@ class TextOverlayDisplay(Observer):
         x = canvas_center_x - (text_w // 2)
         y = canvas_center_y + (text_h // 2) 
 
-        # **הדפסת Debug חדשה עם מיקום וגודל הטקסט**
-        print(f"DEBUG TextOverlay: Drawing text '{self.current_text}' at canvas_pos=({x}, {y}), text_size=({text_w}, {text_h}), font_size={font_size}")
-        canvas.put_text(self.current_text, x, y, font_size, color=text_color, thickness=thickness)
+        return [(self.current_text, x, y, font_size, text_color, thickness)]
+
+    def draw(self, canvas: Img):
+        labels = self.labels()
+        for text, x, y, font_size, _, _ in labels:
+            logger.debug("TextOverlay: drawing '%s' at (%s, %s), font_size=%s", text, x, y, font_size)
+        draw_labels(canvas, labels)
 
 
 
@@ -16,12 +16,15 @@ class Graphics:
                  cell_size: Tuple[int, int],
                  img_loader,
                  loop: bool = True,
-                 fps: float = 6.0):
+                 fps: float = 6.0,
+                 frames: Optional[Tuple[Img, ...]] = None):
 
         # injectable image loader for tests (defaults to Img().read)
         self._img_loader = img_loader
 
-        self.frames: List[Img] = self._load_sprites(sprites_folder, cell_size)
+        # *frames* are shared, read-only sprites (see AssetRegistry); only
+        # the playback position below is per-instance state.
+        self.frames: List[Img] = frames if frames is not None else self._load_sprites(sprites_folder, cell_size)
         self.loop, self.fps = loop, fps
         self.start_ms = 0
         self.cur_frame = 0
@@ -2,6 +2,7 @@
 import pathlib
 from typing import Tuple
 
+from AssetRegistry import ASSET_REGISTRY, AssetRegistry
 from Graphics import Graphics
 from img import Img
 from mock_img import MockImg
@@ -27,9 +28,10 @@ class MockImgFactory(ImgFactory):
 
 class GraphicsFactory:
 
-    def __init__(self, img_factory):
+    def __init__(self, img_factory, registry: AssetRegistry = None):
         # callable path, cell_size, keep_aspect -> Img
         self._img_factory = img_factory
+        self.registry = registry or ASSET_REGISTRY
 
     def load(self,
              sprites_dir: pathlib.Path,
@@ -40,5 +42,6 @@ class GraphicsFactory:
             cell_size=cell_size,
             img_loader=self._img_factory,
             loop=cfg.get("is_loop", True),
-            fps=cfg.get("frames_per_sec", 6.0)
+            fps=cfg.get("frames_per_sec", 6.0),
+            frames=self.registry.frames(sprites_dir, cell_size, self._img_factory)
         )
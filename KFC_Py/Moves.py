@@ -1,7 +1,9 @@
 # Moves.py
 from __future__ import annotations
-import pathlib
-from typing import List, Tuple
+import pathlib, logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
 
 _CAPTURE = 1  # tag flag
 _NON_CAPTURE = 0
@@ -20,10 +22,16 @@ class Moves:
 
         Args:
             moves_file: Path to moves.txt file
-            dims: Board dimensions (rows, cols)
+            dims: Board dimensions (rows, cols), i.e. ``(H_cells, W_cells)``
         """
         self.dims = dims
+        # row stride of the cell bitmasks: the board width, as used by
+        # OccupancyIndex(pieces, board.W_cells)
+        self.stride = dims[1]
         self.moves = {}  # (dr, dc) -> tag
+        # src cell -> {dst cell: (tag, intermediate cells, ray bitmask)},
+        # filled lazily by _targets_from()
+        self._tables: Dict[Tuple[int, int], Dict[Tuple[int, int], tuple]] = {}
 
         if not moves_file.exists():
             return
@@ -66,6 +74,70 @@ class Moves:
 
         return dr, dc, tag
 
+    def cell_bit(self, cell: Tuple[int, int]) -> int:
+        """Bit of *cell* in the side bitmasks (see `OccupancyIndex.side_mask`)."""
+        return 1 << (cell[0] * self.stride + cell[1])
+
+    def _targets_from(self, src_cell) -> Dict[Tuple[int, int], tuple]:
+        """Reachable destinations of *src_cell* with their path rays."""
+        table = self._tables.get(src_cell)
+        if table is not None:
+            return table
+        rows, cols = self.dims
+        table = {}
+        for (dr, dc), tag in self.moves.items():
+            dst = (src_cell[0] + dr, src_cell[1] + dc)
+            if not (0 <= dst[0] < rows and 0 <= dst[1] < cols):
+                continue
+            # same stepping as the original per-call walk, so uneven
+            # offsets keep visiting the same intermediate cells
+            steps = max(abs(dr), abs(dc))
+            ray = tuple((src_cell[0] + int(i * dr / steps), src_cell[1] + int(i * dc / steps))
+                        for i in range(1, steps))
+            mask = 0
+            for cell in ray + (dst,):
+                mask |= self.cell_bit(cell)
+            table[dst] = (tag, ray, mask)
+        self._tables[src_cell] = table
+        return table
+
+    def destinations(self, src_cell) -> List[Tuple[int, int]]:
+        """On-board cells reachable from *src_cell*, ignoring occupancy."""
+        return list(self._targets_from(src_cell))
+
+    def legal_destinations(self, src_cell, cell2piece, is_need_clear_path, my_color) -> List[Tuple[int, int]]:
+        """Every destination `State.on_command` would accept from *src_cell*.
+
+        Same rules as `is_valid` plus the state's friendly-destination check,
+        evaluated in one pass over the precomputed table.
+        """
+        friendly = cell2piece.side_mask(my_color) if getattr(cell2piece, "stride", None) == self.stride else None
+        result = []
+        for dst, (move_tag, ray, ray_mask) in self._targets_from(tuple(src_cell)).items():
+            if friendly is not None:
+                if friendly & (ray_mask if is_need_clear_path else self.cell_bit(dst)):
+                    continue
+            elif not self._path_is_clear(ray if is_need_clear_path else (), dst, ray_mask, self.stride,
+                                         cell2piece, my_color):
+                continue
+            # untagged moves do not care what is on the destination
+            if move_tag == "" or self._tag_allows(move_tag, cell2piece.get(dst), my_color):
+                result.append(dst)
+        return result
+
+    @staticmethod
+    def _tag_allows(move_tag, dst_pieces, my_color) -> bool:
+        if move_tag == "":  # No tag = can both capture/non-capture
+            return True
+
+        if move_tag == "capture":
+            return dst_pieces is not None and any(p.id[1] != my_color for p in dst_pieces)
+
+        if move_tag == "non_capture":
+            return dst_pieces is None
+
+        return False  # Invalid tag
+
     def is_dst_cell_valid(self, dr, dc, dst_pieces = None, my_color = None, dst_has_piece: bool | None = None):
         if dst_has_piece is not None and dst_pieces is None:
             # synthesise minimal placeholder list when a piece is present
@@ -78,55 +150,40 @@ class Moves:
         if (dr, dc) not in self.moves:
             return False
 
-        move_tag = self.moves[(dr, dc)]
-        if move_tag == "":  # No tag = can both capture/non-capture
-            return True
-
-        if move_tag == "capture":
-            return dst_pieces is not None and len([p for p in dst_pieces if p.id[1] != my_color]) > 0
-
-        if move_tag == "non_capture":
-            return dst_pieces is None
-
-        return False  # Invalid tag
+        return self._tag_allows(self.moves[(dr, dc)], dst_pieces, my_color)
 
     def is_valid(self, src_cell, dst_cell, cell2piece, is_need_clear_path, my_color):
-        # Check board boundaries
-        if not (0 <= dst_cell[0] < self.dims[0] and 0 <= dst_cell[1] < self.dims[1]):
+        """O(path length) check of a move against the precomputed tables.
+
+        Off-board and unknown destinations are simply absent from the table
+        of *src_cell*.  With an `OccupancyIndex` the clear-path test is a
+        single AND against the friendly side bitmask (when both use the same
+        row stride); plain dicts fall back to looking up the ray's cells.
+        """
+        entry = self._targets_from(tuple(src_cell)).get(tuple(dst_cell))
+        if entry is None:
             return False
+        move_tag, ray, ray_mask = entry
 
-        dr, dc = dst_cell[0] - src_cell[0], dst_cell[1] - src_cell[1]
-        if not self.is_dst_cell_valid(dr, dc, cell2piece.get(dst_cell), my_color):
+        if not self._tag_allows(move_tag, cell2piece.get(dst_cell), my_color):
             return False
 
-        if is_need_clear_path and not self._path_is_clear(src_cell, dst_cell, cell2piece, my_color):
+        if is_need_clear_path and not self._path_is_clear(ray, dst_cell, ray_mask, self.stride, cell2piece, my_color):
             return False
 
         return True
 
-    def _path_is_clear(self, src_cell, dst_cell, cell2piece_all, my_color):
-        """Check if there are any pieces blocking the path between src and dst."""
-        dr = dst_cell[0] - src_cell[0]
-        dc = dst_cell[1] - src_cell[1]
-        cell2piece = \
-            {k: v for k, v in cell2piece_all.items() \
-             if any(piece.id[1] == my_color for piece in v)}
-
-        if dst_cell in cell2piece:
-            print(f"Path not clear at {dst_cell}")
-            return False
-
-        # Get unit vector for movement direction
-        steps = max(abs(dr), abs(dc))
-        step_r = dr / steps
-        step_c = dc / steps
-
-        # Check each cell along the path (excluding src and dst)
-        for i in range(1, steps):
-            r = src_cell[0] + int(i * step_r)
-            c = src_cell[1] + int(i * step_c)
-            if (r, c) in cell2piece:
-                print(f"Path not clear at {(r,c)}")
+    @staticmethod
+    def _path_is_clear(ray, dst_cell, ray_mask, stride, cell2piece, my_color) -> bool:
+        """Only friendly pieces block: on the destination or any cell between."""
+        if getattr(cell2piece, "stride", None) == stride:
+            if cell2piece.side_mask(my_color) & ray_mask:
+                logger.debug("Path not clear between %s and %s", ray, dst_cell)
                 return False
+            return True
 
+        for cell in (dst_cell,) + ray:
+            if any(piece.id[1] == my_color for piece in cell2piece.get(cell) or ()):
+                logger.debug("Path not clear at %s", cell)
+                return False
         return True
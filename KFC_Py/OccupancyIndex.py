@@ -0,0 +1,117 @@
+# KFC_Py/OccupancyIndex.py
+
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+Cell = Tuple[int, int]
+
+
+class OccupancyIndex(Mapping):
+    """Incrementally maintained ``cell -> [pieces]`` map.
+
+    Replaces rebuilding a ``defaultdict(list)`` every tick: the game calls
+    `sync()` for a piece only when its cell may have changed (state
+    transitions and `MovePhysics` cell crossings), so lookups are O(1) and
+    quiet pieces cost nothing.  Every cell whose occupancy changes is
+    recorded in `dirty` until the game consumes it with `pop_dirty()`.
+
+    Behaves like the read-only dict the rest of the engine expects
+    (`get`, `in`, `items`, ...); indexing a free cell returns ``[]``.
+
+    It also keeps one bitmask per side (bit ``row * stride + col``) so
+    `Moves` can test a whole path for friendly pieces with a single AND.
+    """
+
+    def __init__(self, pieces: Iterable = (), stride: int = 8):
+        self.stride = stride
+        self._cells: Dict[Cell, List] = {}
+        self._cell_of: Dict[object, Cell] = {}
+        # side -> {cell: number of that side's pieces in it}
+        self._side_counts: Dict[str, Dict[Cell, int]] = {}
+        self._side_masks: Dict[str, int] = {}
+        self.dirty: Set[Cell] = set()
+        self.rebuild(pieces)
+
+    # ─── mapping protocol ────────────────────────────────────────────────
+    def __getitem__(self, cell: Cell) -> List:
+        return self._cells.get(cell, [])
+
+    def __iter__(self) -> Iterator[Cell]:
+        return iter(self._cells)
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __contains__(self, cell) -> bool:
+        return cell in self._cells
+
+    def get(self, cell: Cell, default=None):
+        return self._cells.get(cell, default)
+
+    # ─── updates ─────────────────────────────────────────────────────────
+    def rebuild(self, pieces: Iterable):
+        """Re-index *pieces* from scratch and mark every occupied cell dirty."""
+        self._cells.clear()
+        self._cell_of.clear()
+        self._side_counts.clear()
+        self._side_masks.clear()
+        for p in pieces:
+            self.add(p)
+
+    def add(self, piece, cell: Optional[Cell] = None):
+        cell = piece.current_cell() if cell is None else cell
+        self._cell_of[piece] = cell
+        self._cells.setdefault(cell, []).append(piece)
+        self.dirty.add(cell)
+        counts = self._side_counts.setdefault(piece.id[1], {})
+        counts[cell] = counts.get(cell, 0) + 1
+        if counts[cell] == 1:
+            self._side_masks[piece.id[1]] = self._side_masks.get(piece.id[1], 0) | self._bit(cell)
+
+    def remove(self, piece):
+        cell = self._cell_of.pop(piece, None)
+        if cell is None:
+            return
+        plist = self._cells[cell]
+        plist.remove(piece)
+        if not plist:
+            del self._cells[cell]
+        self.dirty.add(cell)
+        counts = self._side_counts[piece.id[1]]
+        counts[cell] -= 1
+        if not counts[cell]:
+            del counts[cell]
+            self._side_masks[piece.id[1]] &= ~self._bit(cell)
+
+    def sync(self, piece) -> bool:
+        """Move *piece* to its current cell; return True if the cell changed."""
+        cell = piece.current_cell()
+        old = self._cell_of.get(piece)
+        if old == cell:
+            return False
+        if old is not None:
+            self.remove(piece)
+        self.add(piece, cell)
+        return True
+
+    # ─── queries ─────────────────────────────────────────────────────────
+    def _bit(self, cell: Cell) -> int:
+        row, col = cell
+        if not (0 <= col < self.stride and row >= 0):
+            return 0  # off-board pieces never block a path
+        return 1 << (row * self.stride + col)
+
+    def side_mask(self, side: str) -> int:
+        """Bitmask of the cells holding at least one piece of *side*."""
+        return self._side_masks.get(side, 0)
+
+    def cell_of(self, piece) -> Optional[Cell]:
+        return self._cell_of.get(piece)
+
+    def mark_dirty(self, cell: Cell):
+        self.dirty.add(cell)
+
+    def pop_dirty(self) -> Set[Cell]:
+        """Return the cells changed since the last call and reset the set."""
+        dirty, self.dirty = self.dirty, set()
+        return dirty
@@ -6,7 +6,6 @@ import math, logging
 
 from Command import Command
 from Board import Board
-import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +32,12 @@ class BasePhysics(ABC):  # Interface/base class
     @abstractmethod
     def update(self, now_ms: int) -> Optional[Command]: ...
 
+    def next_event_ms(self, now_ms: int) -> Optional[int]:
+        """Earliest game time after *now_ms* at which `update()` can change
+        anything the game logic sees (a cell crossing or a "done" event).
+        None means the physics is inert until it receives a new command."""
+        return None
+
     # ------------------------------------------------------------------
     # Utilities common to all subclasses
     # ---------------- public helpers ------------------------------------
@@ -57,6 +62,10 @@ class BasePhysics(ABC):  # Interface/base class
 
     def is_movement_blocker(self) -> bool: return False
 
+    def is_in_motion(self) -> bool:
+        """True while the piece may cross cells without a state transition."""
+        return False
+
     def is_need_clear_path(self) -> bool:
         return self.do_i_need_clear_path
 
@@ -92,32 +101,67 @@ class MovePhysics(BasePhysics):
         self._start_cell = cmd.params[0]
         self._end_cell = cmd.params[1]
         self._start_ms = cmd.timestamp
-        # Always animate movement, even for knights (do_i_need_clear_path=False)
-        self._curr_pos_m = self.board.cell_to_m(self._start_cell)
-        start_pos = np.array(self.board.cell_to_m(self._start_cell))
-        end_pos = np.array(self.board.cell_to_m(self._end_cell))
-        self._movement_vector = end_pos - start_pos
-        self._movement_vector_length = math.hypot(*self._movement_vector)
-        if self._movement_vector_length == 0:
-            self._movement_vector = np.array([0.0, 0.0])
+        # Always animate movement, even for knights (do_i_need_clear_path=False).
+        # The whole path is precomputed as plain floats so update() is a
+        # couple of multiply-adds with no NumPy temporaries.
+        x0, y0 = self.board.cell_to_m(self._start_cell)
+        x1, y1 = self.board.cell_to_m(self._end_cell)
+        length = math.hypot(x1 - x0, y1 - y0)
+        self._x0_m, self._y0_m = x0, y0
+        self._curr_pos_m = (x0, y0)
+        if length == 0:
+            self._vx_m_ms = self._vy_m_ms = 0.0
             self._duration_s = 0
         else:
-            self._movement_vector = self._movement_vector / self._movement_vector_length
-            self._duration_s = self._movement_vector_length / self._speed_m_s
+            per_ms = self._speed_m_s / length / 1000
+            self._vx_m_ms = (x1 - x0) * per_ms
+            self._vy_m_ms = (y1 - y0) * per_ms
+            self._duration_s = length / self._speed_m_s
 
     def update(self, now_ms: int):
-        seconds_passed = (now_ms - self._start_ms) / 1000
-        self._curr_pos_m = np.array(
-            self.board.cell_to_m(self._start_cell)) + self._movement_vector * seconds_passed * self._speed_m_s
+        elapsed_ms = now_ms - self._start_ms
+        self._curr_pos_m = (self._x0_m + self._vx_m_ms * elapsed_ms,
+                            self._y0_m + self._vy_m_ms * elapsed_ms)
 
-        if seconds_passed >= self._duration_s:
+        # same arrival time as next_event_ms() and PieceStore, to the bit
+        if now_ms >= self._start_ms + self._duration_s * 1000:
             return Command(now_ms, None, "done", [self._end_cell])
 
         return None
 
+    def next_event_ms(self, now_ms: int) -> Optional[int]:
+        duration_ms = self._duration_s * 1000
+        arrival_ms = self._start_ms + duration_ms
+        if now_ms >= arrival_ms:
+            return now_ms
+        # The cell changes whenever a coordinate passes a half-cell boundary:
+        # for a move of d cells along an axis that happens at (k - 0.5) / d
+        # of the way, k = 1..d.
+        # The arrival is due on the first whole millisecond at or after it,
+        # as for StaticTemporaryPhysics.  Rounding a position that sits
+        # exactly on a half-cell boundary may not change the cell yet, so a
+        # crossing is due on the first whole millisecond strictly past it.
+        nxt = math.ceil(arrival_ms)
+        for d in (abs(self._end_cell[0] - self._start_cell[0]),
+                  abs(self._end_cell[1] - self._start_cell[1])):
+            for k in range(1, d + 1):
+                t = self._start_ms + (k - 0.5) / d * duration_ms
+                if t > now_ms:
+                    nxt = min(nxt, math.floor(t) + 1)
+                    break
+        return nxt
+
     def get_pos_m(self):
         return self._curr_pos_m
 
+    def is_in_motion(self) -> bool:
+        return True
+
+    def motion(self) -> Tuple[Tuple[int, int], Tuple[int, int], int, float]:
+        """``(start cell, end cell, start ms, speed m/s)``: everything needed
+        to replay this move elsewhere, e.g. on a client."""
+        return self._start_cell, self._end_cell, self._start_ms, self._speed_m_s
+
     def get_pos_pix(self):
         return super().get_pos_pix()
 
@@ -139,6 +183,9 @@ class StaticTemporaryPhysics(BasePhysics):
 
         return None
 
+    def next_event_ms(self, now_ms: int) -> Optional[int]:
+        return max(now_ms, math.ceil(self._start_ms + self.duration_s * 1000))
+
 
 class JumpPhysics(StaticTemporaryPhysics):
     def reset(self, cmd: Command):
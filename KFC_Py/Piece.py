@@ -2,13 +2,16 @@ from __future__ import annotations
 
 from Board import Board
 from Command import Command
+from StateMachine import PieceRecord
 from typing import Callable, Dict, List, Tuple
 
 
 class Piece:
-    def __init__(self, piece_id: str, init_state):
+    def __init__(self, piece_id: str, init_state, states=None):
         self.id = piece_id
         self.state = init_state
+        # PieceStates of the shared template (None for hand-built pieces)
+        self.states = states
 
     def on_command(self, cmd: Command, cell2piece: Dict[Tuple[int, int], List["Piece"]]):
         """
@@ -24,8 +27,26 @@ class Piece:
         cell = self.current_cell()
         self.state.reset(Command(start_ms, self.id, "idle", [cell]))
 
-    def update(self, now_ms: int):
+    def update(self, now_ms: int) -> bool:
+        """Advance the piece to *now_ms*; return True if its state changed."""
+        original_state = self.state
         self.state = self.state.update(now_ms)
+        return self.state is not original_state
+
+    def snapshot(self) -> PieceRecord:
+        """Compact record of everything that is per-piece runtime state."""
+        physics = self.state.physics
+        return PieceRecord(self.id, self.state.name, physics.get_start_ms(),
+                           physics._start_cell, physics._end_cell, self.state.graphics.cur_frame)
+
+    def restore(self, record: PieceRecord):
+        """Put the piece back into the state captured by `snapshot()`."""
+        state = self.states.get(record.state) if self.states is not None else None
+        if state is None:
+            raise ValueError(f"{self.id} has no state '{record.state}' to restore")
+        state.reset(Command(record.start_ms, self.id, record.state, [record.start_cell, record.end_cell]))
+        state.graphics.cur_frame = record.frame
+        self.state = state
 
     def is_movement_blocker(self) -> bool:
         return self.state.physics.is_movement_blocker()
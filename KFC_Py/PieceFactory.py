@@ -1,16 +1,17 @@
 # PieceFactory.py
 from __future__ import annotations
-import csv, json, pathlib
+import pathlib
 from plistlib import InvalidFileException
 from typing import Dict, Tuple
 
+from AssetRegistry import ASSET_REGISTRY, AssetRegistry
 from Board import Board
 from Command import Command
 from GraphicsFactory import GraphicsFactory
-from Moves import Moves
 from PhysicsFactory import PhysicsFactory
 from Piece import Piece
 from State import State
+from StateMachine import LazyTransitions, PieceStates, PieceTemplate, StateTemplate
 
 
 class PieceFactory:
@@ -18,106 +19,92 @@ class PieceFactory:
                  board: Board,
                  pieces_root,
                  graphics_factory=None,
-                 physics_factory=None):
+                 physics_factory=None,
+                 registry: AssetRegistry = None):
 
         self.board = board
         self.graphics_factory = graphics_factory or GraphicsFactory()
         self.physics_factory = physics_factory or PhysicsFactory(board)
         self._pieces_root = pieces_root
+        # config/moves/transitions are parsed once per process and shared
+        self.registry = registry or ASSET_REGISTRY
 
     # ──────────────────────────────────────────────────────────────
-    @staticmethod
-    def _load_master_csv(pieces_root: pathlib.Path) -> Dict[str, Dict[str, str]]:
-        _global_trans: Dict[str, Dict[str, str]] = {}
-        csv_path = pieces_root / "transitions.csv"
-        if not csv_path.exists():
-            return _global_trans
+    def _piece_template(self, piece_dir: pathlib.Path) -> PieceTemplate:
+        board_size = (self.board.H_cells, self.board.W_cells)  # (rows, cols)
+        return self.registry.template(piece_dir, board_size,
+                                      lambda: self._make_template(piece_dir, board_size))
 
-        with csv_path.open(newline="", encoding="utf-8") as f:
-            rdr = csv.DictReader(f)
-            for row in rdr:
-                frm, ev, nxt = row["from_state"], row["event"], row["to_state"]
-                _global_trans.setdefault(frm, {})[ev] = nxt
+    def _make_template(self, piece_dir: pathlib.Path, board_size: Tuple[int, int]) -> PieceTemplate:
+        assets = self.registry.piece(piece_dir, board_size)
+        transitions: Dict[str, Dict[str, str]] = {name: {} for name in assets.states}
 
-        return _global_trans
-
-    # ──────────────────────────────────────────────────────────────
-    def _build_state_machine(self, piece_dir: pathlib.Path) -> State:
-        board_size = (self.board.W_cells, self.board.H_cells)
-        cell_px = (self.board.cell_W_pix, self.board.cell_H_pix)
-        _global_trans = self._load_master_csv(piece_dir / "states")
+        # apply master CSV overrides
+        for frm, ev_map in assets.transitions.items():
+            if frm not in transitions:
+                continue
+            for ev, nxt in ev_map.items():
+                if nxt in transitions:
+                    transitions[frm][ev] = nxt
 
-        states: Dict[str, State] = {}
+        # --- Custom jump logic: idle->jump, jump->short_rest, short_rest->idle ---
+        # (JumpPhysics already makes the piece invulnerable during the jump)
+        if "idle" in transitions and "jump" in transitions:
+            transitions["idle"]["jump"] = "jump"
+        if "jump" in transitions and "short_rest" in transitions:
+            transitions["jump"]["done"] = "short_rest"
+        if "short_rest" in transitions and "idle" in transitions:
+            transitions["short_rest"]["done"] = "idle"
 
         # There is no longer a piece-wide fall-back. Each state must provide its own
         # `moves.txt`; if it does not, the state will have *no* legal moves.
-        # ── load every <piece>/states/<state>/ ───────────────────
-        for state_dir in (piece_dir / "states").iterdir():
-            if not state_dir.is_dir():
-                continue
-            name = state_dir.name
-
-            cfg_path = state_dir / "config.json"
-            cfg = json.loads(cfg_path.read_text()) if cfg_path.exists() else {}
-
-            moves_path = state_dir / "moves.txt"
-            moves = Moves(moves_path, board_size) if moves_path.exists() else None
-            graphics = self.graphics_factory.load(state_dir / "sprites",
-                                                  cfg.get("graphics", {}), cell_px)
-
-
+        states: Dict[str, StateTemplate] = {}
+        for name, state_assets in assets.states.items():
+            cfg = state_assets.cfg
             physics_cfg = cfg.get("physics", {})
-            physics = self.physics_factory.create((0, 0), name, physics_cfg)
             # Always force do_i_need_clear_path=False for knight (NB/NW) in move state
             if (piece_dir.name in ["NB", "NW"]) and name == "move":
-                physics.do_i_need_clear_path = False
+                need_clear_path = False
             elif ("need_clear_path" in cfg and cfg["need_clear_path"] is False) or ("need_clear_path" in physics_cfg and physics_cfg["need_clear_path"] is False):
-                physics.do_i_need_clear_path = False
+                need_clear_path = False
             elif "need_clear_path" in cfg:
-                physics.do_i_need_clear_path = cfg["need_clear_path"]
+                need_clear_path = cfg["need_clear_path"]
             elif "need_clear_path" in physics_cfg:
-                physics.do_i_need_clear_path = physics_cfg["need_clear_path"]
+                need_clear_path = physics_cfg["need_clear_path"]
             else:
-                physics.do_i_need_clear_path = True
+                need_clear_path = True
 
-            st = State(moves, graphics, physics)
-            st.name = name
-            states[name] = st
+            states[name] = StateTemplate(name, state_assets.moves, state_assets.sprites_dir,
+                                         cfg.get("graphics", {}), physics_cfg,
+                                         need_clear_path, transitions[name])
 
-        # apply master CSV overrides
-        for frm, ev_map in _global_trans.items():
-            src = states.get(frm)
-            if not src:
-                continue
-            for ev, nxt in ev_map.items():
-                dst = states.get(nxt)
-                if not dst:
-                    continue
-                src.set_transition(ev, dst)
+        # always start at idle
+        return PieceTemplate(piece_dir.name, states, initial="idle")
 
-        # --- Custom jump logic: idle->jump, jump->short_rest, short_rest->idle ---
-        idle = states.get("idle")
-        jump = states.get("jump")
-        short_rest = states.get("short_rest")
-        if idle and jump:
-            idle.set_transition("jump", jump)
-        if jump and short_rest:
-            jump.set_transition("done", short_rest)
-            # Make the piece invulnerable during jump
-            if hasattr(jump.physics, "can_be_captured"):
-                jump.physics.can_be_captured = lambda: False
-        if short_rest and idle:
-            short_rest.set_transition("done", idle)
+    def _build_state(self, st: StateTemplate, states: PieceStates) -> State:
+        """Per-piece runtime objects for one state of the shared template."""
+        cell_px = (self.board.cell_W_pix, self.board.cell_H_pix)
+        graphics = self.graphics_factory.load(st.sprites_dir, st.graphics_cfg, cell_px)
+        physics = self.physics_factory.create((0, 0), st.name, st.physics_cfg)
+        physics.do_i_need_clear_path = st.need_clear_path
 
-        # always start at idle
-        return states.get("idle")
+        state = State(st.moves, graphics, physics)
+        state.name = st.name
+        state.transitions = LazyTransitions(st.transitions, states)
+        return state
+
+    def _new_states(self, piece_dir: pathlib.Path) -> PieceStates:
+        return PieceStates(self._piece_template(piece_dir), self._build_state)
+
+    def _build_state_machine(self, piece_dir: pathlib.Path) -> State:
+        return self._new_states(piece_dir).initial()
 
     # ──────────────────────────────────────────────────────────────
     def create_piece(self, p_type: str, cell: Tuple[int, int]) -> Piece:
         p_dir = self._pieces_root / p_type
-        state = self._build_state_machine(p_dir)
+        states = self._new_states(p_dir)
 
-        piece = Piece(f"{p_type}_{cell}", state)
+        piece = Piece(f"{p_type}_{cell}", states.initial(), states=states)
         piece.state.reset(Command(0, piece.id, "idle", [cell]))
 
         return piece
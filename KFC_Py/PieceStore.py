@@ -0,0 +1,201 @@
+# KFC_Py/PieceStore.py
+
+import math
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from Board import Board
+from Physics import IdlePhysics, MovePhysics, StaticTemporaryPhysics
+
+# Row kinds: how the store can predict a piece without calling into it.
+INERT = 0    # idle – nothing happens until a command arrives
+MOVING = 1   # MovePhysics – straight line at constant speed, then "done"
+TIMED = 2    # StaticTemporaryPhysics (rest, jump) – "done" after a cooldown
+SCALAR = 3   # unknown physics – always handed back to the caller
+
+_INITIAL_CAPACITY = 64
+
+
+class PieceStore:
+    """Struct-of-arrays mirror of the pieces' physics.
+
+    Keeps one row per piece in NumPy columns (kind, start/end time, origin
+    and velocity in metres, current cell, side, type and state codes) so that
+    `update()` can advance every moving piece and recompute its cell in a
+    handful of vectorised operations.  It returns only the pieces that need
+    the regular `Piece.update()` call this tick – those whose cell changed or
+    whose timer expired – so quiet and mid-cell pieces cost nothing.
+
+    The `Piece` objects stay authoritative; the game calls `load()` whenever
+    a piece's state is reset so the row reflects the new physics.
+    """
+
+    def __init__(self, board: Board, pieces: Iterable = ()):
+        self.board = board
+        self.pieces: List = []
+        self._row_of: Dict[object, int] = {}
+        self.type_codes: Dict[str, int] = {}
+        self.state_codes: Dict[str, int] = {}
+        self._alloc(_INITIAL_CAPACITY)
+        self.rebuild(pieces)
+
+    def _alloc(self, capacity: int):
+        n = len(self.pieces)
+        old = getattr(self, "kind", None)
+        columns = {
+            "kind": np.zeros(capacity, np.int8),
+            "start_ms": np.zeros(capacity, np.float64),
+            "end_ms": np.full(capacity, np.inf),
+            "origin_m": np.zeros((capacity, 2), np.float64),
+            "vel_m_ms": np.zeros((capacity, 2), np.float64),
+            "span": np.zeros((capacity, 2), np.int64),
+            "cell": np.zeros((capacity, 2), np.int64),
+            "side": np.zeros(capacity, np.int8),
+            "ptype": np.zeros(capacity, np.int16),
+            "state": np.zeros(capacity, np.int16),
+        }
+        for name, col in columns.items():
+            if old is not None:
+                col[:n] = getattr(self, name)[:n]
+            setattr(self, name, col)
+
+    def __len__(self) -> int:
+        return len(self.pieces)
+
+    def __contains__(self, piece) -> bool:
+        return piece in self._row_of
+
+    # ─── rows ────────────────────────────────────────────────────────────
+    def rebuild(self, pieces: Iterable):
+        self.pieces = []
+        self._row_of.clear()
+        for p in pieces:
+            self.add(p)
+
+    def add(self, piece):
+        i = len(self.pieces)
+        if i == len(self.kind):
+            self._alloc(2 * i)
+        self.pieces.append(piece)
+        self._row_of[piece] = i
+        self.side[i] = 0 if piece.id[1] == "W" else 1
+        self.ptype[i] = self.type_codes.setdefault(piece.id[0], len(self.type_codes))
+        self.load(piece)
+
+    def remove(self, piece):
+        """Drop *piece*; the last row is moved into its slot."""
+        i = self._row_of.pop(piece, None)
+        if i is None:
+            return
+        last = len(self.pieces) - 1
+        if i != last:
+            moved = self.pieces[last]
+            self.pieces[i] = moved
+            self._row_of[moved] = i
+            for name in ("kind", "start_ms", "end_ms", "origin_m", "vel_m_ms",
+                         "span", "cell", "side", "ptype", "state"):
+                col = getattr(self, name)
+                col[i] = col[last]
+        self.pieces.pop()
+
+    def load(self, piece):
+        """Refresh the row of *piece* from its current state and physics."""
+        i = self._row_of[piece]
+        state = piece.state
+        ph = state.physics
+        self.state[i] = self.state_codes.setdefault(state.name, len(self.state_codes))
+        self.start_ms[i] = ph.get_start_ms()
+        self.cell[i] = piece.current_cell()
+
+        if isinstance(ph, MovePhysics):
+            (r0, c0), (r1, c1) = ph._start_cell, ph._end_cell
+            self.kind[i] = MOVING
+            self.end_ms[i] = ph.get_start_ms() + ph._duration_s * 1000
+            self.origin_m[i] = self.board.cell_to_m(ph._start_cell)
+            self.vel_m_ms[i] = (ph._vx_m_ms, ph._vy_m_ms)
+            self.span[i] = (abs(r1 - r0), abs(c1 - c0))
+        elif isinstance(ph, StaticTemporaryPhysics):
+            self.kind[i] = TIMED
+            self.end_ms[i] = ph.get_start_ms() + ph.duration_s * 1000
+        elif isinstance(ph, IdlePhysics):
+            self.kind[i] = INERT
+            self.end_ms[i] = np.inf
+        else:
+            self.kind[i] = SCALAR
+            self.end_ms[i] = np.inf
+
+    # ─── per tick ────────────────────────────────────────────────────────
+    def update(self, now_ms: int) -> List:
+        """Advance all rows to *now_ms*; return the pieces needing a tick.
+
+        A piece is returned when its cell changed since the last call, when
+        its move/cooldown is over, or when the store cannot predict it.
+        """
+        n = len(self.pieces)
+        if n == 0:
+            return []
+        kind = self.kind[:n]
+        touched = (now_ms >= self.end_ms[:n]) | (kind == SCALAR)
+
+        moving = np.flatnonzero(kind == MOVING)
+        if moving.size:
+            start = self.start_ms[moving]
+            t = np.clip(now_ms - start, 0.0, self.end_ms[moving] - start)
+            pos = self.origin_m[moving] + self.vel_m_ms[moving] * t[:, None]
+            cells = np.empty((moving.size, 2), np.int64)
+            cells[:, 0] = np.rint(pos[:, 1] / self.board.cell_H_m)
+            cells[:, 1] = np.rint(pos[:, 0] / self.board.cell_W_m)
+            changed = (cells != self.cell[moving]).any(axis=1)
+            if changed.any():
+                rows = moving[changed]
+                self.cell[rows] = cells[changed]
+                touched[rows] = True
+
+        pieces = self.pieces
+        return [pieces[i] for i in np.flatnonzero(touched)]
+
+    def next_deadline_ms(self, now_ms: int) -> Optional[int]:
+        """Vectorised `min(p.state.physics.next_event_ms(now_ms))`."""
+        n = len(self.pieces)
+        if n == 0:
+            return None
+        kind = self.kind[:n]
+        start, end = self.start_ms[:n], self.end_ms[:n]
+        best = math.inf
+
+        timed = kind == TIMED
+        if timed.any():
+            best = max(now_ms, math.ceil(end[timed].min()))
+
+        moving = np.flatnonzero(kind == MOVING)
+        if moving.size:
+            s, e = start[moving], end[moving]
+            if (now_ms >= e).any():
+                return now_ms
+            # next half-cell crossing on each axis, see MovePhysics.next_event_ms
+            dur = e - s
+            progress = (now_ms - s) / np.where(dur > 0, dur, 1.0)
+            span = self.span[moving]
+            nxt = np.full_like(e, np.inf)
+            for axis in (0, 1):
+                d = span[:, axis]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    k = np.floor(progress * d + 0.5) + 1
+                    t = s + (k - 0.5) / d * dur
+                    # rounding can land exactly on *now*; take the next one
+                    k = np.where(t > now_ms, k, k + 1)
+                    t = s + (k - 0.5) / d * dur
+                ok = (d > 0) & (k <= d) & (t > now_ms)
+                nxt = np.where(ok, np.minimum(nxt, t), nxt)
+            # arrivals are due at, crossings strictly past, their time
+            best = min(best, math.ceil(e.min()))
+            if np.isfinite(nxt).any():
+                best = min(best, math.floor(nxt.min()) + 1)
+
+        for i in np.flatnonzero(kind == SCALAR):
+            t = self.pieces[i].state.physics.next_event_ms(now_ms)
+            if t is not None:
+                best = min(best, t)
+
+        return None if best == math.inf else int(best)
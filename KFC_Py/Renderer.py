@@ -0,0 +1,283 @@
+# KFC_Py/Renderer.py
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from img import Img
+from TextCache import TEXT_CACHE
+
+Rect = Tuple[int, int, int, int]  # x0, y0, x1, y1 (x1/y1 exclusive)
+
+# Once the dirty area covers this share of the canvas a full redraw is
+# cheaper than many small restores.
+FULL_REDRAW_RATIO = 0.5
+
+
+class SceneItem(NamedTuple):
+    """One drawable on the canvas.
+
+    *signature* captures everything that affects its pixels (sprite frame,
+    position, text, ...); an item is redrawn only when it changes.  *draw*
+    is called as ``draw(view, ox, oy)`` where *view* is an `Img` of the
+    region being recomposed and (ox, oy) its top-left canvas coordinate.
+    """
+    key: Hashable
+    rect: Rect
+    signature: Hashable
+    draw: Callable[[Img, int, int], None]
+
+
+def blit(sprite: Img, view: Img, x: int, y: int):
+    """`sprite.draw_on(view, x, y)`, clipped to *view* instead of skipped."""
+    pixels = sprite.img
+    if not isinstance(pixels, np.ndarray):
+        sprite.draw_on(view, x, y)  # headless images draw nothing real
+        return
+    h, w = pixels.shape[:2]
+    H, W = view.img.shape[:2]
+    x0, y0, x1, y1 = max(x, 0), max(y, 0), min(x + w, W), min(y + h, H)
+    if x0 >= x1 or y0 >= y1:
+        return
+    if (x0, y0, x1, y1) == (x, y, x + w, y + h):
+        sprite.draw_on(view, x, y)
+    else:
+        sprite.sub_image(x0 - x, y0 - y, x1 - x0, y1 - y0).draw_on(view, x0, y0)
+
+
+def sprite_item(key: Hashable, sprite: Img, x: int, y: int, size: Tuple[int, int]) -> SceneItem:
+    pixels = sprite.img
+    w, h = (pixels.shape[1], pixels.shape[0]) if isinstance(pixels, np.ndarray) else size
+    return SceneItem(key, (x, y, x + w, y + h), (id(pixels), x, y),
+                     lambda view, ox, oy: blit(sprite, view, x - ox, y - oy))
+
+
+def draw_text(view: Img, text: str, x: int, y: int, font_size: float,
+              color: Tuple[int, ...], thickness: int):
+    """`view.put_text(...)` through the shared `TEXT_CACHE` sprite."""
+    if not isinstance(view.img, np.ndarray):
+        view.put_text(text, x, y, font_size, color=color, thickness=thickness)
+        return
+    sprite, dx, dy = TEXT_CACHE.sprite(text, font_size, color, thickness)
+    blit(sprite, view, x + dx, y + dy)
+
+
+def text_item(key: Hashable, text: str, x: int, y: int, font_size: float,
+              color: Tuple[int, ...], thickness: int) -> SceneItem:
+    (w, h), baseline = TEXT_CACHE.measure(text, font_size, thickness)
+    pad = thickness + 2  # stroke width plus anti-aliasing
+    rect = (x - pad, y - h - pad, x + w + pad, y + baseline + pad)
+    return SceneItem(key, rect, (text, x, y, font_size, color, thickness),
+                     lambda view, ox, oy: draw_text(view, text, x - ox, y - oy, font_size,
+                                                    color, thickness))
+
+
+def rect_item(key: Hashable, x1: int, y1: int, x2: int, y2: int, color: Tuple[int, ...]) -> SceneItem:
+    # Img.draw_rect strokes 2 px centred on the outline
+    rect = (x1 - 2, y1 - 2, x2 + 3, y2 + 3)
+    return SceneItem(key, rect, (x1, y1, x2, y2, color),
+                     lambda view, ox, oy: view.draw_rect(x1 - ox, y1 - oy, x2 - ox, y2 - oy, color))
+
+
+def _overlaps(a: Rect, b: Rect) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _merge(rects: List[Rect]) -> List[Rect]:
+    """Union overlapping rectangles until no two overlap."""
+    merged: List[Rect] = []
+    for r in rects:
+        while True:
+            for i, m in enumerate(merged):
+                if _overlaps(r, m):
+                    r = (min(r[0], m[0]), min(r[1], m[1]), max(r[2], m[2]), max(r[3], m[3]))
+                    del merged[i]
+                    break
+            else:
+                break
+        merged.append(r)
+    return merged
+
+
+class DirtyRectRenderer:
+    """Recomposes only the canvas regions whose contents changed.
+
+    Each frame the game describes the scene as an ordered list of
+    `SceneItem`s (back to front).  Items that appeared, disappeared, moved
+    or changed signature mark their old and new rectangles dirty; only those
+    regions are restored from *background* and redrawn, with every item
+    intersecting them drawn clipped in scene order.  A static frame costs a
+    dictionary comparison.
+    """
+
+    def __init__(self, canvas: Img, background: np.ndarray):
+        self.canvas = canvas
+        self.background = background
+        self._prev: Dict[Hashable, Tuple[Rect, Hashable]] = {}
+        self._full = True
+        self.last_dirty: List[Rect] = []
+
+    def invalidate(self):
+        """Force the next `render()` to redraw the whole canvas."""
+        self._full = True
+
+    def _dirty_rects(self, items: List[SceneItem]) -> List[Rect]:
+        prev = self._prev
+        dirty: List[Rect] = []
+        seen = set()
+        for item in items:
+            seen.add(item.key)
+            old = prev.get(item.key)
+            if old is None:
+                dirty.append(item.rect)
+            elif old != (item.rect, item.signature):
+                dirty.append(old[0])
+                dirty.append(item.rect)
+        for key, (rect, _) in prev.items():
+            if key not in seen:
+                dirty.append(rect)
+        return dirty
+
+    def render(self, items: Sequence[SceneItem]) -> List[Rect]:
+        """Bring the canvas up to date with *items*; return the redrawn rects."""
+        H, W = self.background.shape[:2]
+        img = self.canvas.img
+        if img is None or not img.flags.writeable or img.shape != self.background.shape:
+            self.canvas.img = self.background.copy()
+            self._full = True
+
+        if self._full:
+            rects = [(0, 0, W, H)]
+        else:
+            clipped = []
+            for x0, y0, x1, y1 in self._dirty_rects(items):
+                r = (max(x0, 0), max(y0, 0), min(x1, W), min(y1, H))
+                if r[0] < r[2] and r[1] < r[3]:
+                    clipped.append(r)
+            rects = _merge(clipped)
+            if sum((r[2] - r[0]) * (r[3] - r[1]) for r in rects) > FULL_REDRAW_RATIO * W * H:
+                rects = [(0, 0, W, H)]
+
+        canvas = self.canvas.img
+        for r in rects:
+            x0, y0, x1, y1 = r
+            canvas[y0:y1, x0:x1] = self.background[y0:y1, x0:x1]
+            view = Img()
+            view.img = canvas[y0:y1, x0:x1]
+            for item in items:
+                if _overlaps(item.rect, r):
+                    item.draw(view, x0, y0)
+
+        self._prev = {item.key: (item.rect, item.signature) for item in items}
+        self._full = False
+        self.last_dirty = rects
+        return rects
+
+
+class Frame(NamedTuple):
+    """Immutable snapshot of the scene at one game time.
+
+    Scene items capture positions, sprites and text by value when they are
+    built, so a frame can be composed on another thread while the
+    simulation keeps mutating the pieces.
+    """
+    seq: int
+    time_ms: int
+    items: Tuple[SceneItem, ...]
+
+
+class FrameBuffer:
+    """Hands frames from the simulation thread to the render thread.
+
+    The simulation builds the next frame off to the side (the back buffer)
+    and `publish()` swaps it in as the front frame in one step; the
+    renderer always takes the newest front frame, so a slow display skips
+    frames instead of holding the simulation back.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._front: Optional[Frame] = None
+        self._seq = 0
+
+    def publish(self, time_ms: int, items: Sequence[SceneItem]) -> Frame:
+        frame = Frame(self._seq + 1, time_ms, tuple(items))
+        with self._cond:
+            self._seq = frame.seq
+            self._front = frame
+            self._cond.notify_all()
+        return frame
+
+    def latest(self) -> Optional[Frame]:
+        return self._front
+
+    def wait(self, after_seq: int, timeout: Optional[float] = None) -> Optional[Frame]:
+        """The front frame once it is newer than *after_seq*, or None on timeout."""
+        with self._cond:
+            if self._cond.wait_for(lambda: self._seq > after_seq, timeout):
+                return self._front
+            return None
+
+
+class FrameStats(NamedTuple):
+    frames: int      # frames presented
+    skipped: int     # frames published but superseded before being composed
+    dropped: int     # display slots missed because a frame ran late
+    fps: float       # presentation rate over the recent window
+    avg_ms: float    # compose + show time over the recent window
+    max_ms: float
+
+
+class FramePacer:
+    """Holds a render loop to *target_fps* and keeps per-frame timing stats.
+
+    The loop calls `frame_done(started)` after presenting and sleeps for
+    the returned time, so frames start at most once per period.  A frame
+    that overruns its period is not caught up with a burst: the slots it
+    covered are counted as dropped and the next frame starts right away.
+    """
+
+    def __init__(self, target_fps: float = 60, window: int = 120, clock: Callable[[], float] = time.perf_counter):
+        self.target_fps = target_fps
+        self.clock = clock
+        self.frames = self.skipped = self.dropped = 0
+        self._work = deque(maxlen=window)
+        self._stamps = deque(maxlen=window)
+
+    @property
+    def target_fps(self) -> float:
+        return self._target_fps
+
+    @target_fps.setter
+    def target_fps(self, value: float):
+        if value <= 0:
+            raise ValueError("target_fps must be positive")
+        self._target_fps = value
+        self.period_s = 1 / value
+
+    def frame_done(self, started: float, skipped: int = 0) -> float:
+        """Record a frame whose work began at *started*; return the seconds
+        to wait before starting the next one."""
+        now = self.clock()
+        self.frames += 1
+        self.skipped += skipped
+        self._work.append(now - started)
+        self._stamps.append(now)
+
+        slot = started + self.period_s
+        if now > slot:
+            self.dropped += int((now - started) // self.period_s)
+            return 0.0
+        return slot - now
+
+    def stats(self) -> FrameStats:
+        work, stamps = self._work, self._stamps
+        span = stamps[-1] - stamps[0] if len(stamps) > 1 else 0.0
+        return FrameStats(
+            self.frames, self.skipped, self.dropped,
+            (len(stamps) - 1) / span if span > 0 else 0.0,
+            1000 * sum(work) / len(work) if work else 0.0,
+            1000 * max(work) if work else 0.0)
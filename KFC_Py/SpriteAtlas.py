@@ -0,0 +1,91 @@
+# KFC_Py/SpriteAtlas.py
+
+import pathlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from img import Img
+
+
+class SpriteAtlas:
+    """Every sprite frame of a pieces tree packed into one contiguous array.
+
+    ``pixels`` holds all frames back to back as an ``(N, h, w, 4)`` BGRA
+    array, with matching premultiplied-colour and inverse-alpha planes for
+    `Img.draw_on`.  ``index`` maps a sprites folder to its ``(first, count)``
+    slice; `frames()` hands out `Img` objects that are zero-copy views into
+    the atlas with their blend planes already filled in.
+    """
+
+    def __init__(self, frame_size: Tuple[int, int], groups: Dict[str, List[np.ndarray]]):
+        w, h = frame_size
+        n = sum(len(frames) for frames in groups.values())
+        self.frame_size = frame_size
+        self.pixels = np.empty((n, h, w, 4), np.uint8)
+        self.index: Dict[str, Tuple[int, int]] = {}
+
+        i = 0
+        for key, frames in groups.items():
+            self.index[key] = (i, len(frames))
+            for frame in frames:
+                self.pixels[i] = frame
+                i += 1
+
+        opaque = (self.pixels[..., 3] == 255).reshape(n, -1).all(axis=1)
+        if opaque.all():
+            # nothing to blend: premultiplied == straight, no inverse plane
+            self.premul = self.pixels
+            self.inv_alpha = np.broadcast_to(np.zeros((), np.uint8), self.pixels.shape)
+        else:
+            # one pass over the whole atlas, viewed as a single tall image
+            flat = self.pixels.reshape(n * h, w, 4)
+            alpha = cv2.merge([flat[..., 3]] * 4)
+            self.premul = cv2.multiply(flat, alpha, scale=1 / 255).reshape(n, h, w, 4)
+            self.inv_alpha = cv2.subtract(np.full_like(alpha, 255), alpha).reshape(n, h, w, 4)
+        for arr in (self.pixels, self.premul, self.inv_alpha):
+            if arr.flags.writeable:
+                arr.setflags(write=False)
+
+        self._frames: Dict[str, Tuple[Img, ...]] = {}
+        for key, (first, count) in self.index.items():
+            views = []
+            for j in range(first, first + count):
+                frame = Img()
+                frame.img = self.pixels[j]
+                frame._blend = (frame.img, self.premul[j], self.inv_alpha[j], bool(opaque[j]))
+                views.append(frame)
+            self._frames[key] = tuple(views)
+
+    def __len__(self) -> int:
+        return len(self.pixels)
+
+    def frames(self, key: str) -> Optional[Tuple[Img, ...]]:
+        return self._frames.get(key)
+
+    @classmethod
+    def build(cls, sprite_dirs: Dict[str, pathlib.Path], cell_size: Tuple[int, int],
+              img_loader: Callable) -> Optional["SpriteAtlas"]:
+        """Load every ``*.png`` of *sprite_dirs* (key -> folder) through *img_loader*.
+
+        Returns None when the loader does not produce real pixel arrays of
+        size *cell_size* (e.g. the headless `MockImg`), in which case callers
+        keep loading frames one folder at a time.
+        """
+        w, h = cell_size
+        groups: Dict[str, List[np.ndarray]] = {}
+        for key, folder in sprite_dirs.items():
+            frames = []
+            for p in sorted(pathlib.Path(folder).glob("*.png")):
+                pixels = getattr(img_loader(p, cell_size, keep_aspect=False), "img", None)
+                if not isinstance(pixels, np.ndarray) or pixels.shape[:2] != (h, w):
+                    return None
+                if pixels.shape[2] == 3:
+                    pixels = cv2.cvtColor(pixels, cv2.COLOR_BGR2BGRA)
+                frames.append(pixels)
+            if frames:
+                groups[key] = frames
+        if not groups:
+            return None
+        return cls(cell_size, groups)
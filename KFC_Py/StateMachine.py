@@ -0,0 +1,117 @@
+# KFC_Py/StateMachine.py
+
+from __future__ import annotations
+
+import pathlib
+from dataclasses import dataclass
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from Moves import Moves
+
+
+@dataclass(frozen=True)
+class StateTemplate:
+    """Immutable description of one state of a piece type."""
+    name: str
+    moves: Optional[Moves]
+    sprites_dir: pathlib.Path
+    graphics_cfg: dict
+    physics_cfg: dict
+    need_clear_path: bool
+    transitions: Dict[str, str]  # event -> target state name
+
+
+@dataclass(frozen=True)
+class PieceTemplate:
+    """State-machine graph of a piece type, shared by all its pieces."""
+    piece_type: str
+    states: Dict[str, StateTemplate]
+    initial: str = "idle"
+
+
+class PieceRecord(NamedTuple):
+    """Compact runtime record of a piece, cheap to snapshot and restore."""
+    piece_id: str
+    state: str
+    start_ms: int
+    start_cell: Tuple[int, int]
+    end_cell: Tuple[int, int]
+    frame: int
+
+
+class PieceStates:
+    """The `State` objects of one piece, instantiated on first use.
+
+    Most pieces spend the whole game in a couple of states, so building
+    graphics/physics for every state up front (as the factory used to)
+    wastes allocations.  *build* turns a `StateTemplate` into a `State`.
+    """
+
+    def __init__(self, template: PieceTemplate, build: Callable[[StateTemplate, "PieceStates"], object]):
+        self.template = template
+        self._build = build
+        self._states: Dict[str, object] = {}
+
+    def get(self, name: str):
+        state = self._states.get(name)
+        if state is None:
+            st = self.template.states.get(name)
+            if st is None:
+                return None
+            state = self._states[name] = self._build(st, self)
+        return state
+
+    def __getitem__(self, name: str):
+        state = self.get(name)
+        if state is None:
+            raise KeyError(name)
+        return state
+
+    def initial(self):
+        return self.get(self.template.initial)
+
+    def built(self) -> Dict[str, object]:
+        """States instantiated so far (for diagnostics and tests)."""
+        return dict(self._states)
+
+
+class LazyTransitions:
+    """``event -> State`` map resolving targets through `PieceStates`.
+
+    Stands in for the plain dict in `State.transitions`; explicit
+    `set_transition()` calls still take precedence.
+    """
+
+    def __init__(self, by_name: Dict[str, str], states: PieceStates):
+        self._by_name = by_name
+        self._states = states
+        self._overrides: Dict[str, object] = {}
+
+    def get(self, event: str, default=None):
+        if event in self._overrides:
+            return self._overrides[event]
+        name = self._by_name.get(event)
+        if name is None:
+            return default
+        return self._states.get(name) or default
+
+    def __getitem__(self, event: str):
+        target = self.get(event)
+        if target is None:
+            raise KeyError(event)
+        return target
+
+    def __setitem__(self, event: str, target):
+        self._overrides[event] = target
+
+    def __contains__(self, event) -> bool:
+        return event in self._overrides or event in self._by_name
+
+    def __iter__(self):
+        return iter(set(self._by_name) | set(self._overrides))
+
+    def __len__(self) -> int:
+        return len(set(self._by_name) | set(self._overrides))
+
+    def items(self):
+        return [(ev, self[ev]) for ev in self]
@@ -0,0 +1,108 @@
+import asyncio
+
+from Broadcast import Broadcaster, CLOSE_TOO_SLOW, MAX_PENDING
+from StateProtocol import JSON
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _Socket:
+    """A websocket whose sends either complete at once or never return."""
+
+    remote_address = ("test", 0)
+
+    def __init__(self, stuck: bool = False):
+        self.stuck = stuck
+        self.sent = []
+        self.closed = None
+
+    async def send(self, message):
+        if self.stuck:
+            await asyncio.Event().wait()
+        self.sent.append(message)
+
+    async def close(self, code, reason):
+        self.closed = (code, reason)
+
+
+def _broadcaster(clock, **kwargs):
+    snapshots = []
+
+    def snapshot(wire_format):
+        snapshots.append(wire_format)
+        return f"snapshot {len(snapshots)}"
+    return Broadcaster(snapshot, clock=clock, **kwargs)
+
+
+def test_lagging_client_is_coalesced_into_one_snapshot():
+    async def run():
+        clock = _Clock()
+        bc = _broadcaster(clock)
+        fast, slow = _Socket(), _Socket(stuck=True)
+        bc.add(fast, JSON)
+        bc.add(slow, JSON)
+        await asyncio.sleep(0)  # the slow client's join snapshot is now in flight
+
+        for i in range(MAX_PENDING + 5):
+            bc.publish({JSON: f"delta {i}"})
+            await asyncio.sleep(0)
+
+        box = bc.outboxes[slow]
+        # the 33rd message superseded everything waiting; later ones queue behind it
+        assert [m for _, m in box.pending] == ["snapshot 3"] + [f"delta {i}" for i in range(MAX_PENDING + 1, MAX_PENDING + 5)]
+        assert box.coalesced == 1
+        assert fast.sent == ["snapshot 1"] + [f"delta {i}" for i in range(MAX_PENDING + 5)]
+        assert bc.dropped == 0
+        bc.remove(fast)
+        bc.remove(slow)
+
+    asyncio.run(run())
+
+
+def test_stuck_client_is_closed_with_1008_when_publishing():
+    async def run():
+        clock = _Clock()
+        bc = _broadcaster(clock, lag_budget_s=2.0)
+        slow = _Socket(stuck=True)
+        bc.add(slow, JSON)
+        await asyncio.sleep(0)
+
+        clock.now = 1.5
+        bc.publish({JSON: "delta 1"})
+        assert slow in bc.outboxes
+
+        clock.now = 2.5
+        bc.publish({JSON: "delta 2"})
+        await asyncio.sleep(0)
+        assert slow not in bc.outboxes
+        assert bc.dropped == 1
+        assert slow.closed == (CLOSE_TOO_SLOW, "client too slow")
+
+    asyncio.run(run())
+
+
+def test_stuck_client_in_quiet_room_is_dropped_by_watchdog():
+    async def run():
+        clock = _Clock()
+        bc = _broadcaster(clock, lag_budget_s=0.02)
+        fast, slow = _Socket(), _Socket(stuck=True)
+        bc.add(fast, JSON)
+        bc.add(slow, JSON)
+        await asyncio.sleep(0)
+
+        # nothing is published; only the watchdog notices
+        clock.now = 1.0
+        await asyncio.sleep(0.05)
+        assert list(bc.outboxes) == [fast]
+        assert slow.closed == (CLOSE_TOO_SLOW, "client too slow")
+
+        bc.remove(fast)
+        assert bc._watchdog is None
+
+    asyncio.run(run())
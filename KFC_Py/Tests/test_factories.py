@@ -73,4 +73,130 @@ def test_piece_factory_generates_all_pieces():
             if i >= board.W_cells:
                 i = 0
                 j += 1
-    assert len(piece_ids) == num_pieces_created
\ No newline at end of file
+    assert len(piece_ids) == num_pieces_created
+
+# ---------------------------------------------------------------------------
+#                            SHARED ASSET CACHE
+# ---------------------------------------------------------------------------
+
+def test_pieces_share_assets_but_not_runtime_state():
+    from AssetRegistry import AssetRegistry
+
+    registry = AssetRegistry()
+    board = _board()
+    gfx_factory = GraphicsFactory(MockImgFactory(), registry=registry)
+    pf1 = PieceFactory(board, pieces_root=PIECES_DIR, graphics_factory=gfx_factory, registry=registry)
+    pf2 = PieceFactory(board, pieces_root=PIECES_DIR, graphics_factory=gfx_factory, registry=registry)
+
+    a = pf1.create_piece("RW", (7, 0))
+    b = pf2.create_piece("RW", (7, 7))
+
+    # read-only assets are the very same objects …
+    assert a.state.moves is b.state.moves
+    assert a.state.graphics.frames is b.state.graphics.frames
+    # … while per-piece state stays separate
+    assert a.state is not b.state
+    assert a.state.graphics is not b.state.graphics
+    assert a.state.physics is not b.state.physics
+    assert a.current_cell() == (7, 0) and b.current_cell() == (7, 7)
+
+
+def test_piece_states_are_built_lazily_from_shared_template():
+    board = _board()
+    pf = PieceFactory(board, pieces_root=PIECES_DIR, graphics_factory=GraphicsFactory(MockImgFactory()))
+    a = pf.create_piece("QW", (7, 3))
+    b = pf.create_piece("QW", (0, 3))
+
+    assert a.states.template is b.states.template
+    assert set(a.states.built()) == {"idle"}
+
+    # following a transition instantiates the target state on demand
+    move = a.state.transitions.get("move")
+    assert move.name == "move"
+    assert move.transitions.get("done") is a.states["long_rest"]
+    assert set(a.states.built()) == {"idle", "move", "long_rest"}
+    assert set(b.states.built()) == {"idle"}
+
+
+def test_sprite_atlas_serves_frames_as_views():
+    import os
+    from AssetRegistry import AssetRegistry
+    from GraphicsFactory import ImgFactory
+    from img import Img
+
+    registry = AssetRegistry()
+    atlas = registry.atlas(PIECES_DIR, (16, 16), ImgFactory())
+    assert atlas is not None
+    assert atlas.pixels.shape[1:] == (16, 16, 4)
+    assert len(atlas) == len(list(PIECES_DIR.glob("*/states/*/sprites/*.png")))
+
+    sprites = PIECES_DIR / "QW" / "states" / "move" / "sprites"
+    gfx = GraphicsFactory(ImgFactory(), registry=registry).load(sprites, {}, (16, 16))
+    first, count = atlas.index[os.path.abspath(sprites)]
+    assert len(gfx.frames) == count
+    assert all(np.shares_memory(f.img, atlas.pixels) for f in gfx.frames)
+    assert gfx.get_img().img.base is not None and not gfx.get_img().img.flags.writeable
+
+    canvas = Img.create_blank(40, 40)
+    gfx.get_img().draw_on(canvas, 4, 4)
+    assert (canvas.img[4:20, 4:20] == atlas.pixels[first]).all()
+
+    # headless loaders have no pixels to pack
+    assert registry.atlas(PIECES_DIR, (16, 16), MockImgFactory()) is None
+
+
+# ---------------------------------------------------------------------------
+#                        RESTORING SERVER-REPORTED STATES
+# ---------------------------------------------------------------------------
+
+def test_restore_puts_piece_in_every_state_the_server_reports():
+    """The websocket client builds each piece once and follows the server
+    with `Piece.restore()`; every state of every piece must round-trip."""
+    from StateMachine import PieceRecord
+
+    board = _board()
+    pf = PieceFactory(board, pieces_root=PIECES_DIR, graphics_factory=GraphicsFactory(MockImgFactory()))
+    for piece_dir in sorted(p for p in PIECES_DIR.iterdir() if (p / "states").is_dir()):
+        piece = pf.create_piece(piece_dir.name, (3, 3))
+        for name in piece.states.template.states:
+            end = (3, 5) if name == "move" else (3, 3)
+            piece.restore(PieceRecord(piece.id, name, 1_000, (3, 3), end, 0))
+
+            assert piece.state is piece.states[name]
+            assert piece.state.physics.get_start_ms() == 1_000
+            assert piece.state.graphics.start_ms == 1_000 and piece.state.graphics.cur_frame == 0
+            assert piece.current_cell() == (3, 3)
+            assert piece.state.physics.is_in_motion() == (name == "move")
+
+        # a landing reported after a move stops the move animation and slide
+        piece.restore(PieceRecord(piece.id, "move", 1_000, (3, 3), (3, 5), 0))
+        move_graphics = piece.state.graphics
+        piece.restore(PieceRecord(piece.id, "long_rest", 3_000, (3, 5), (3, 5), 0))
+        assert piece.state.graphics is not move_graphics
+        assert not piece.state.physics.is_in_motion()
+        assert piece.current_cell() == (3, 5)
+
+    piece = pf.create_piece("PW", (6, 0))
+    with pytest.raises(ValueError):
+        piece.restore(PieceRecord(piece.id, "no_such_state", 0, (6, 0), (6, 0), 0))
+
+
+def test_moves_on_non_square_board_share_the_occupancy_stride():
+    from OccupancyIndex import OccupancyIndex
+
+    board = Board(cell_H_pix=32, cell_W_pix=32, W_cells=10, H_cells=4, img=MockImg())
+    pf = PieceFactory(board, pieces_root=PIECES_DIR, graphics_factory=GraphicsFactory(MockImgFactory()))
+    rook, blocker = pf.create_piece("RW", (3, 0)), pf.create_piece("PW", (3, 5))
+    moves = rook.state.moves
+    assert moves.dims == (4, 10) and moves.stride == board.W_cells
+
+    index = OccupancyIndex([rook, blocker], board.W_cells)
+    assert index.side_mask("W") == moves.cell_bit((3, 0)) | moves.cell_bit((3, 5))
+    # columns past H_cells are on the board; rows past it are not
+    assert moves.is_valid((3, 0), (3, 4), index, True, "W")
+    assert not moves.is_valid((3, 0), (3, 9), index, True, "W")
+    assert not moves.is_valid((3, 0), (-1, 0), index, True, "W")
+
+    cells = {c: list(v) for c, v in index.items()}
+    assert sorted(moves.legal_destinations((3, 0), index, True, "W")) == \
+        sorted(moves.legal_destinations((3, 0), cells, True, "W"))
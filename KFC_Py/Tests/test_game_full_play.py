@@ -4,6 +4,7 @@ from GraphicsFactory import MockImgFactory
 from Game import Game
 from Command import Command
 from GameFactory import create_game
+from Clock import WallClock
 
 import numpy as np
 
@@ -21,8 +22,7 @@ BOARD_CSV = PIECES_ROOT / "board.csv"
 
 
 def test_gameplay_pawn_move_and_capture():
-    game = create_game(PIECES_ROOT, MockImgFactory())
-    game._time_factor = 1_000_000_000
+    game = create_game(PIECES_ROOT, MockImgFactory(), clock=WallClock(time_factor=1_000_000_000))
     game._update_cell2piece_map()
     pw = game.pos[(6, 0)][0]
     pb = game.pos[(1, 1)][0]
@@ -49,8 +49,7 @@ def test_gameplay_pawn_move_and_capture():
 
 def test_piece_blocked_by_own_color():
     """A rook cannot move through a friendly pawn that blocks its path."""
-    game = create_game(PIECES_ROOT, MockImgFactory())
-    game._time_factor = 1_000_000_000  # speed-up time for fast tests
+    game = create_game(PIECES_ROOT, MockImgFactory(), clock=WallClock(time_factor=1_000_000_000))  # sped up for fast tests
     game._update_cell2piece_map()
 
     rook = game.pos[(7, 0)][0]  # White rook initially at a1
@@ -66,8 +65,7 @@ def test_piece_blocked_by_own_color():
 
 def test_illegal_move_rejected():
     """A bishop attempting a vertical move (illegal) should be rejected."""
-    game = create_game(PIECES_ROOT, MockImgFactory())
-    game._time_factor = 1_000_000_000
+    game = create_game(PIECES_ROOT, MockImgFactory(), clock=WallClock(time_factor=1_000_000_000))
     game._update_cell2piece_map()
 
     bishop = game.pos[(7, 2)][0]  # White bishop on c1
@@ -82,8 +80,7 @@ def test_illegal_move_rejected():
 
 def test_knight_jumps_over_friendly_pieces():
     """A knight should be able to jump over friendly pieces."""
-    game = create_game(PIECES_ROOT, MockImgFactory())
-    game._time_factor = 1_000_000_000
+    game = create_game(PIECES_ROOT, MockImgFactory(), clock=WallClock(time_factor=1_000_000_000))
     game._update_cell2piece_map()
 
     knight = game.pos[(7, 1)][0]  # White knight on b1
@@ -98,8 +95,7 @@ def test_knight_jumps_over_friendly_pieces():
 
 def test_piece_capture():
     """Knight captures an opposing pawn after a sequence of moves."""
-    game = create_game(PIECES_ROOT, MockImgFactory())
-    game._time_factor = 1_000_000_000
+    game = create_game(PIECES_ROOT, MockImgFactory(), clock=WallClock(time_factor=1_000_000_000))
     game._update_cell2piece_map()
 
     # 1. Advance the black pawn from d7 to d5.
@@ -122,8 +118,7 @@ def test_piece_capture():
 
 def test_pawn_double_step_only_first_move():
     """Pawn may move two squares only on its initial move; afterwards only one square."""
-    game = create_game(PIECES_ROOT, MockImgFactory())
-    game._time_factor = 1_000_000_000
+    game = create_game(PIECES_ROOT, MockImgFactory(), clock=WallClock(time_factor=1_000_000_000))
     game._update_cell2piece_map()
 
     pawn = game.pos[(6, 4)][0]  # White pawn on e2
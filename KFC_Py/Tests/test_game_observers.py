@@ -353,6 +353,24 @@ def test_sound_player_update_unhandled_event(sound_player_instance):
             assert not sound_player_instance.sounds[sound_type].play_called
 
 
+def test_sound_cache_is_shared_until_the_mixer_is_reinitialised(tmp_path, mock_mixer):
+    """Players share loaded sounds by path; a re-initialised mixer reloads them."""
+    import GameObservers
+
+    mock_mixer.get_init = Mock(return_value=(44100, -16, 2))
+    with patch('GameObservers.mixer', new=mock_mixer):
+        first = SoundPlayer(tmp_path)
+        assert SoundPlayer(tmp_path).sounds["jump"] is first.sounds["jump"]
+        cached = dict(GameObservers._SOUND_CACHE)
+        assert str(tmp_path / "jump.wav") in cached
+
+        mock_mixer.get_init.return_value = (22050, -16, 1)
+        again = SoundPlayer(tmp_path)
+        assert again.sounds["jump"] is not first.sounds["jump"]
+        # the old mixer's sounds were dropped, not kept beside the new ones
+        assert GameObservers._SOUND_CACHE.keys() == cached.keys()
+
+
 @patch('GameObservers.mixer', new_callable=Mock) # Patch mixer at module level
 def test_sound_player_mixer_not_available_no_errors(mock_mixer_module):
     """Edge case: SoundPlayer initializes and runs without errors if mixer is not available."""
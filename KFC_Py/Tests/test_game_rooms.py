@@ -0,0 +1,102 @@
+import asyncio
+import pathlib
+import time
+
+from GraphicsFactory import MockImgFactory
+from Command import Command
+from Game import IDLE_WAKE_MS, REORDER_WINDOW_MS
+from GameRooms import DEFAULT_ROOM_ID, GameRoomManager, room_id_from_path
+from StateProtocol import BINARY
+
+PIECES_ROOT = pathlib.Path(__file__).parent.parent.parent / "pieces"
+
+
+class _Socket:
+    remote_address = ("test", 0)
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+def test_room_id_from_path():
+    assert room_id_from_path("/rooms/abc") == "abc"
+    assert room_id_from_path("/rooms/abc/") == "abc"
+    assert room_id_from_path("/rooms/abc?side=W") == "abc"
+    assert room_id_from_path("/") == DEFAULT_ROOM_ID
+    assert room_id_from_path("") == DEFAULT_ROOM_ID
+    assert room_id_from_path(None) == DEFAULT_ROOM_ID
+
+
+def test_rooms_are_shared_by_id_and_closed_with_their_last_client():
+    async def run():
+        manager = GameRoomManager(PIECES_ROOT, MockImgFactory(), asyncio.get_running_loop())
+        a, b, c = _Socket(), _Socket(), _Socket()
+
+        room = manager.join("r1", a)
+        assert manager.join("r1", b, BINARY) is room
+        other = manager.join("r2", c)
+        assert other is not room and other.game is not room.game
+        assert manager.get_or_create("r1") is room
+        assert room.clients == {a, b}
+        await asyncio.sleep(0)
+        # every client starts from a snapshot, in its own wire format
+        assert isinstance(a.sent[0], str) and isinstance(b.sent[0], bytes)
+
+        manager.leave(room, a)
+        assert "r1" in manager.rooms and room.game.running
+        manager.leave(room, b)
+        assert "r1" not in manager.rooms and set(manager.rooms) == {"r2"}
+        assert not room.game.running
+        assert room.observer not in room.game._subscribers
+        manager.leave(other, c)
+        assert manager.rooms == {}
+
+    asyncio.run(run())
+
+
+def test_submit_wakes_the_scheduler():
+    async def run():
+        manager = GameRoomManager(PIECES_ROOT, MockImgFactory(), asyncio.get_running_loop())
+        room = manager.join("r1", _Socket())
+        assert room.game.reorder_window_ms == REORDER_WINDOW_MS
+        manager.start()
+        try:
+            # let the scheduler go idle: nothing is due for IDLE_WAKE_MS
+            await asyncio.sleep(0.05)
+            pw = room.game.pos[(6, 0)][0]
+            started = time.perf_counter()
+            manager.submit(room, Command(room.game.game_time_ms(), pw.id, "move", [None, (4, 0)]))
+            while pw.state.name != "move" and time.perf_counter() - started < 2:
+                await asyncio.sleep(0.001)
+            assert pw.state.name == "move"
+            assert time.perf_counter() - started < IDLE_WAKE_MS / 1000 / 2
+        finally:
+            manager.stop()
+
+    asyncio.run(run())
+
+
+def test_malformed_submit_leaves_the_room_running():
+    async def run():
+        manager = GameRoomManager(PIECES_ROOT, MockImgFactory(), asyncio.get_running_loop())
+        room = manager.join("r1", _Socket())
+        # run each command on the poll right after it
+        room.game.reorder_window_ms = 0
+        pw = room.game.pos[(6, 0)][0]
+        now = room.game.game_time_ms()
+        for bad in (Command(now, pw.id, "move", [None, ([4], [0])]),
+                    Command(now, [pw.id], "move", [None, (4, 0)]),
+                    Command(now, pw.id, "move", [None, (4,)])):
+            manager.submit(room, bad)
+            manager.poll_rooms()
+        assert manager.rooms == {"r1": room} and room.game.running
+        assert pw.state.name == "idle"
+
+        manager.submit(room, Command(room.game.game_time_ms(), pw.id, "move", [None, (4, 0)]))
+        manager.poll_rooms()
+        assert pw.state.name == "move"
+
+    asyncio.run(run())
@@ -123,3 +123,41 @@ def test_moves_board_bounds():
         assert not mv.is_valid((7, 4), (8, 4), {}, True, "X")
         assert not mv.is_valid((4, 0), (4, -1), {}, True, "X")
         assert not mv.is_valid((4, 7), (4, 8), {}, True, "X")
+
+
+def test_moves_tables_and_side_masks_block_only_friendly_paths():
+    from OccupancyIndex import OccupancyIndex
+
+    class _P:
+        def __init__(self, piece_id, cell):
+            self.id, self.cell = piece_id, cell
+
+        def current_cell(self):
+            return self.cell
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pathlib.Path(tmp) / "moves.txt"
+        path.write_text("".join(f"{-k},0:\n" for k in range(1, 8)))
+        mv = Moves(path, dims=(8, 8))
+
+        assert mv.destinations((2, 0)) == [(1, 0), (0, 0)]
+
+        friend, enemy = _P("PW1", (5, 0)), _P("PB1", (3, 0))
+        index = OccupancyIndex([friend, enemy])
+        assert index.side_mask("W") == mv.cell_bit((5, 0))
+
+        # a friendly piece on the ray blocks, an enemy one does not
+        assert not mv.is_valid((7, 0), (4, 0), index, True, "W")
+        assert mv.is_valid((7, 0), (4, 0), index, False, "W")
+        assert mv.is_valid((4, 0), (1, 0), index, True, "W")
+
+        # the dict fallback agrees with the bitmask path
+        cells = {c: list(v) for c, v in index.items()}
+        assert not mv.is_valid((7, 0), (4, 0), cells, True, "W")
+        assert mv.is_valid((4, 0), (1, 0), cells, True, "W")
+
+        friend.cell = (2, 0)
+        index.sync(friend)
+        assert index.side_mask("W") == mv.cell_bit((2, 0))
+        assert mv.is_valid((7, 0), (4, 0), index, True, "W")
+        assert not mv.is_valid((4, 0), (1, 0), index, True, "W")
@@ -44,6 +44,37 @@ def test_img_draw_and_rectangle():
 # ---------------------------------------------------------------------------
 
 
+
+def test_img_draw_on_blends_premultiplied_alpha():
+    rng = np.random.default_rng(0)
+    sprite = Img()
+    sprite.img = rng.integers(0, 256, (6, 5, 4), dtype=np.uint8)
+    canvas = Img.create_blank(12, 12, (40, 80, 120, 200))
+
+    sprite.draw_on(canvas, 3, 4)
+
+    # reference: straight-alpha blend on every channel in floating point
+    mask = sprite.img[..., 3:4] / 255.0
+    expected = (1 - mask) * np.array([40, 80, 120, 200]) + mask * sprite.img
+    roi = canvas.img[4:10, 3:8].astype(int)
+    assert np.abs(roi - expected).max() <= 1
+    assert (canvas.img[:4] == (40, 80, 120, 200)).all()
+
+    # 3-channel destinations take the colour planes only
+    bgr = Img()
+    bgr.img = np.full((12, 12, 3), 90, np.uint8)
+    sprite.draw_on(bgr, 0, 0)
+    assert np.abs(bgr.img[:6, :5].astype(int) - ((1 - mask) * 90 + mask * sprite.img[..., :3])).max() <= 1
+    # … from contiguous copies kept for the next BGR draw
+    planes = sprite._colour_planes(*sprite._blend_planes()[1:3])
+    assert all(p.flags.c_contiguous and p.shape == (6, 5, 3) for p in planes)
+    assert sprite._colour_planes(*sprite._blend_planes()[1:3])[0] is planes[0]
+
+    # replacing the pixels invalidates the cached planes; opaque copies through
+    sprite.img = np.full((6, 5, 4), (1, 2, 3, 255), np.uint8)
+    sprite.draw_on(canvas, 3, 4)
+    assert (canvas.img[4:10, 3:8] == (1, 2, 3, 255)).all()
+
 def test_moves_parsing_and_validation(tmp_path):
     moves_txt = """\
 1,0:capture
@@ -0,0 +1,84 @@
+import pathlib
+
+from Command import Command
+from Clock import VirtualClock
+from GameFactory import create_game
+from GraphicsFactory import MockImgFactory
+from OccupancyIndex import OccupancyIndex
+
+PIECES_ROOT = pathlib.Path(__file__).parent.parent.parent / "pieces"
+
+
+class _StubPiece:
+    """Bare object exposing the single accessor the index relies on."""
+
+    def __init__(self, piece_id, cell):
+        self.id = piece_id
+        self.cell = cell
+
+    def current_cell(self):
+        return self.cell
+
+
+def test_index_add_sync_remove_tracks_dirty_cells():
+    a, b = _StubPiece("PW_a", (6, 0)), _StubPiece("PB_b", (1, 0))
+    index = OccupancyIndex([a, b])
+    assert index.pop_dirty() == {(6, 0), (1, 0)}
+
+    # unchanged cell – nothing to do
+    assert not index.sync(a)
+    assert index.pop_dirty() == set()
+
+    a.cell = (5, 0)
+    assert index.sync(a)
+    assert index[(5, 0)] == [a]
+    assert (6, 0) not in index
+    assert index.get((6, 0)) is None
+    assert index[(6, 0)] == []
+    assert index.pop_dirty() == {(6, 0), (5, 0)}
+
+    index.remove(b)
+    assert index.cell_of(b) is None
+    assert len(index) == 1
+    assert index.pop_dirty() == {(1, 0)}
+
+
+def test_game_index_follows_moving_piece():
+    game = create_game(PIECES_ROOT, MockImgFactory(), clock=VirtualClock())
+    game.start_simulation()
+    pw = game.pos[(6, 0)][0]
+
+    game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(6, 0), (4, 0)]))
+    game.simulate(5_000)
+
+    assert game.pos.cell_of(pw) == (4, 0)
+    assert game.pos[(4, 0)] == [pw]
+    assert (6, 0) not in game.pos
+    assert sum(len(v) for v in game.pos.values()) == len(game.pieces)
+
+
+def test_quiet_board_leaves_no_dirty_cells():
+    game = create_game(PIECES_ROOT, MockImgFactory(), clock=VirtualClock())
+    game.start_simulation()
+    game.step()
+    assert game.pos.dirty == set()
+
+    game.simulate(1_000)
+    assert game.pos.dirty == set()
+
+
+def test_capture_resolved_from_dirty_cells():
+    game = create_game(PIECES_ROOT, MockImgFactory(), clock=VirtualClock())
+    game.start_simulation()
+    pw = game.pos[(6, 3)][0]
+    pb = game.pos[(1, 4)][0]
+
+    game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(6, 3), (4, 3)]))
+    game.user_input_queue.put(Command(game.game_time_ms(), pb.id, "move", [(1, 4), (3, 4)]))
+    game.simulate(6_000)
+    game.user_input_queue.put(Command(game.game_time_ms(), pb.id, "move", [(3, 4), (4, 3)]))
+    game.simulate(6_000)
+
+    assert pb.current_cell() == (4, 3)
+    assert pw not in game.pieces
+    assert game.pos[(4, 3)] == [pb]
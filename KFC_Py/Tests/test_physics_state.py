@@ -73,6 +73,35 @@ def test_move_physics_full_cycle():
     assert phys.get_curr_cell() == (0, 2)
 
 
+
+def test_move_physics_path_is_precomputed():
+    board = _board()
+    phys = MovePhysics(board, param=2.0)
+    phys.reset(Command(1000, "P", "move", [(4, 0), (0, 3)]))  # 5 m diagonal
+
+    assert phys._duration_s == 2.5
+    assert phys.update(2250) is None
+    x, y = phys.get_pos_m()
+    assert np.allclose((x, y), (1.5, 2.0))
+    assert type(x) is float and type(y) is float
+
+    phys.reset(Command(0, "P", "move", [(1, 1), (1, 1)]))
+    assert phys.update(0).type == "done"
+    assert phys.get_curr_cell() == (1, 1)
+
+
+def test_move_physics_motion_replays_elsewhere():
+    phys = MovePhysics(_board(), param=2.0)
+    phys.reset(Command(1000, "P", "move", [(4, 0), (0, 3)]))
+    start, end, start_ms, speed = phys.motion()
+    assert (start, end, start_ms, speed) == ((4, 0), (0, 3), 1000, 2.0)
+
+    replay = MovePhysics(_board(), param=speed)
+    replay.reset(Command(start_ms, "P", "move", [start, end]))
+    phys.update(2250)
+    replay.update(2250)
+    assert replay.get_pos_m() == phys.get_pos_m()
+
 def test_jump_and_rest_physics():
     board = _board()
 
@@ -125,4 +154,23 @@ def test_state_transitions_via_internal_done():
 
     # Advance time until JumpPhysics finishes → state machine auto-returns to idle
     piece.update(20)
-    assert piece.state is idle 
\ No newline at end of file
+    assert piece.state is idle 
+
+def test_physics_next_event_deadlines():
+    board = _board()
+
+    idle = IdlePhysics(board)
+    idle.reset(Command(0, "P", "idle", [(0, 0)]))
+    assert idle.next_event_ms(0) is None
+
+    # 1 cell/s over three cells: crossings at 0.5, 1.5, 2.5 s, arrival at 3 s
+    move = MovePhysics(board, param=1.0)
+    move.reset(Command(0, "P", "move", [(0, 0), (0, 3)]))
+    assert move.next_event_ms(0) == 501
+    assert move.next_event_ms(501) == 1501
+    assert move.next_event_ms(2600) == 3000
+    assert move.update(2999) is None and move.update(3000).type == "done"
+
+    rest = RestPhysics(board, param=1.5)
+    rest.reset(Command(200, "P", "long_rest", [(0, 0)]))
+    assert rest.next_event_ms(300) == 1700
@@ -0,0 +1,80 @@
+import pathlib
+
+from Command import Command
+from Clock import VirtualClock
+from GameFactory import create_game
+from GraphicsFactory import MockImgFactory
+from PieceStore import PieceStore, INERT, MOVING
+
+PIECES_ROOT = pathlib.Path(__file__).parent.parent.parent / "pieces"
+
+
+def _sim_game(piece_store=True):
+    game = create_game(PIECES_ROOT, MockImgFactory(), clock=VirtualClock(), piece_store=piece_store)
+    game.start_simulation()
+    return game
+
+
+def test_store_only_returns_pieces_whose_cell_or_timer_changed():
+    game = _sim_game()
+    store = game.store
+    pw = game.pos[(6, 0)][0]
+    assert store.update(0) == []
+
+    pw.on_command(Command(0, pw.id, "move", [(6, 0), (4, 0)]), game.pos)
+    store.load(pw)
+    assert store.kind[store._row_of[pw]] == MOVING
+
+    # still inside the start cell – nothing to do
+    assert store.update(100) == []
+    # arrival: the cell changed and the move is over
+    assert store.update(10_000) == [pw]
+    assert tuple(store.cell[store._row_of[pw]]) == (4, 0)
+
+
+def test_store_remove_keeps_rows_consistent():
+    game = _sim_game()
+    store = game.store
+    victim = store.pieces[3]
+    last = store.pieces[-1]
+
+    store.remove(victim)
+
+    assert victim not in store
+    assert len(store) == 31
+    assert store.pieces[3] is last
+    assert tuple(store.cell[3]) == last.current_cell()
+    assert store.kind[3] == INERT
+
+
+def test_store_matches_plain_simulation():
+    def play(piece_store, dt_ms):
+        game = _sim_game(piece_store)
+        pw, pb = game.pos[(6, 4)][0], game.pos[(1, 3)][0]
+        deadlines = []
+        game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(6, 4), (4, 4)]))
+        game.user_input_queue.put(Command(game.game_time_ms(), pb.id, "move", [(1, 3), (3, 3)]))
+        game.step(1)
+        deadlines.append(game.next_deadline_ms())
+        game.simulate(6_000, dt_ms)
+        game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(4, 4), (3, 3)]))
+        game.step(1)
+        deadlines.append(game.next_deadline_ms())
+        game.simulate(6_000, dt_ms)
+        cells = sorted((p.id, p.current_cell(), p.state.name) for p in game.pieces)
+        return cells, deadlines
+
+    for dt_ms in (10, None):
+        assert play(True, dt_ms) == play(False, dt_ms)
+
+
+def test_store_grows_past_initial_capacity():
+    game = _sim_game()
+    factory = game._piece_factory()
+    pieces = [factory.create_piece("RW", (r, c)) for r in range(8) for c in range(8)]
+    pieces += [factory.create_piece("RB", (r, c)) for r in range(8) for c in range(8)]
+    store = PieceStore(game.board, pieces)
+
+    assert len(store) == 128
+    assert [tuple(cell) for cell in store.cell[:len(store)]] == [p.current_cell() for p in pieces]
+    assert store.update(0) == []
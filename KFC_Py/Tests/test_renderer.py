@@ -0,0 +1,200 @@
+import pathlib, threading, time
+
+import numpy as np
+import pytest
+
+from Command import Command
+from Clock import VirtualClock
+from GameFactory import create_game
+from GraphicsFactory import ImgFactory
+from img import Img
+from GameObservers import MoveListDisplay
+from Renderer import DirtyRectRenderer, FrameBuffer, FramePacer, draw_text, rect_item, sprite_item, text_item
+from TextCache import TextCache
+
+PIECES_ROOT = pathlib.Path(__file__).parent.parent.parent / "pieces"
+
+
+def _sprite(color, alpha=255, size=8):
+    sprite = Img()
+    sprite.img = np.full((size, size, 4), (*color, alpha), np.uint8)
+    return sprite
+
+
+def _full_redraw(background, items):
+    canvas = Img()
+    DirtyRectRenderer(canvas, background).render(items)
+    return canvas.img
+
+
+def test_renderer_redraws_only_changed_regions():
+    background = np.full((60, 80, 4), 50, np.uint8)
+    canvas = Img()
+    renderer = DirtyRectRenderer(canvas, background)
+    red, blue = _sprite((0, 0, 255)), _sprite((255, 0, 0), alpha=128)
+
+    scene = [sprite_item("a", red, 10, 10, (8, 8)), sprite_item("b", blue, 14, 12, (8, 8)),
+             text_item("t", "12", 40, 30, 0.5, (0, 0, 0, 255), 1)]
+    assert renderer.render(scene) == [(0, 0, 80, 60)]
+
+    # nothing changed – nothing is touched
+    assert renderer.render(scene) == []
+
+    # move "b": its old and new rectangles (overlapping "a") are recomposed
+    scene[1] = sprite_item("b", blue, 30, 40, (8, 8))
+    dirty = renderer.render(scene)
+    assert sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in dirty) == 2 * 64
+    assert (canvas.img == _full_redraw(background, scene)).all()
+
+    # sprites partly off-canvas are clipped rather than dropped
+    scene.append(rect_item("cursor", 70, 50, 90, 70, (0, 255, 0, 255)))
+    scene[0] = sprite_item("a", red, -4, 55, (8, 8))
+    renderer.render(scene)
+    assert (canvas.img[56:60, 0:4] == (0, 0, 255, 255)).all()
+    assert (canvas.img == _full_redraw(background, scene)).all()
+
+    # removing an item restores what was underneath it
+    del scene[2]
+    renderer.render(scene)
+    assert (canvas.img == _full_redraw(background, scene)).all()
+
+
+def test_game_draw_matches_full_redraw_while_pieces_move():
+    game = create_game(PIECES_ROOT, ImgFactory(), clock=VirtualClock())
+    game.start_simulation()
+    game._draw()
+
+    pw = game.pos[(6, 4)][0]
+    game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(6, 4), (4, 4)], 1))
+    for _ in range(8):
+        game.step(250)
+        game._draw()
+        assert game.renderer.last_dirty != [(0, 0, game.canvas_width, game.canvas_height)]
+        incremental = game.main_canvas.img.copy()
+        game.renderer.invalidate()
+        game._draw()
+        assert (incremental == game.main_canvas.img).all()
+
+
+def test_static_layer_is_built_once_and_rebuilt_on_board_change():
+    game = create_game(PIECES_ROOT, ImgFactory(), clock=VirtualClock())
+    game.start_simulation()
+    game._draw()
+    layer = game._static_layer()
+
+    assert not layer.flags.writeable
+    game._draw()
+    assert game._static_layer() is layer
+
+    ox, oy = game.board_offset_x, game.board_offset_y
+    h, w = game.board.img.img.shape[:2]
+    assert (layer[oy:oy + h, ox:ox + w, :3] == game.board.img.img[..., :3]).all()
+
+    game.board_offset_x += 10
+    game._draw()
+    assert game._static_layer() is not layer
+    assert game.renderer.last_dirty == [(0, 0, game.canvas_width, game.canvas_height)]
+
+
+def test_frame_buffer_hands_over_the_newest_frame():
+    frames = FrameBuffer()
+    assert frames.wait(0, timeout=0.01) is None
+
+    frames.publish(10, [])
+    newest = frames.publish(20, [])
+    assert frames.wait(0, timeout=0.01) is newest
+    assert frames.wait(newest.seq, timeout=0.01) is None
+
+
+def test_published_frame_is_unaffected_by_later_ticks():
+    game = create_game(PIECES_ROOT, ImgFactory(), clock=VirtualClock())
+    game.start_simulation()
+    pw = game.pos[(6, 4)][0]
+    game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(6, 4), (4, 4)], 1))
+    game.step(500)
+    game._draw()
+    expected = game.main_canvas.img.copy()
+    frame = game.frames.latest()
+
+    game.step(1_000)
+    game.renderer.invalidate()
+    game._compose(frame)
+    assert (game.main_canvas.img == expected).all()
+
+
+def test_slow_display_does_not_hold_back_the_simulation():
+    game = create_game(PIECES_ROOT, ImgFactory())
+    game.start_simulation()
+    shown = []
+    game._show = lambda: (shown.append(game.frames.latest()), time.sleep(0.05))
+
+    sim = threading.Thread(target=game._run_game_loop,
+                           kwargs={"num_iterations": 30, "is_with_graphics": True})
+    started = time.perf_counter()
+    sim.start()
+    game._render_loop(sim)
+    sim.join()
+
+    # the simulation kept its own pace; the display showed only some frames
+    assert time.perf_counter() - started < 30 * 0.05
+    stats = game.frame_stats()
+    assert 0 < stats.frames < game.frames.latest().seq
+    assert stats.dropped > 0
+
+
+def test_frame_pacer_caps_rate_and_counts_late_frames():
+    now = [0.0]
+    pacer = FramePacer(target_fps=50, clock=lambda: now[0])
+
+    now[0] = 0.005
+    assert abs(pacer.frame_done(0.0) - 0.015) < 1e-9
+    now[0] = 0.065  # this frame took three periods
+    assert pacer.frame_done(0.020, skipped=2) == 0.0
+
+    stats = pacer.stats()
+    assert (stats.frames, stats.skipped, stats.dropped) == (2, 2, 2)
+    assert abs(stats.max_ms - 45) < 1e-6
+
+    with pytest.raises(ValueError):
+        pacer.target_fps = 0
+
+
+def test_graphical_loop_publishes_at_the_target_rate():
+    game = create_game(PIECES_ROOT, ImgFactory(), target_fps=20)
+    game.start_simulation()
+    game._show = lambda: None
+
+    sim = threading.Thread(target=game._run_game_loop, kwargs={"is_with_graphics": True})
+    sim.start()
+    threading.Timer(0.5, lambda: setattr(game, "running", False)).start()
+    game._render_loop(sim)
+    sim.join()
+
+    assert 5 <= game.frames.latest().seq <= 12
+    assert game.frame_stats().frames <= game.frames.latest().seq
+
+
+def test_text_cache_matches_put_text_and_rasterises_once():
+    cache = TextCache()
+    first = cache.sprite("P e2->e4", 0.6, (0, 255, 0, 255), 1)
+    assert cache.sprite("P e2->e4", 0.6, (0, 255, 0, 255), 1) is first
+    assert len(cache) == 1
+
+    for channels in (3, 4):
+        expected, cached = Img(), Img()
+        expected.img = np.full((60, 200, channels), 80, np.uint8)
+        cached.img = expected.img.copy()
+        expected.put_text("Score: 12", -5, 40, 1.0, color=(0, 0, 255, 255), thickness=2)
+        draw_text(cached, "Score: 12", -5, 40, 1.0, (0, 0, 255, 255), 2)
+        assert np.array_equal(expected.img[..., :3], cached.img[..., :3])
+
+
+def test_move_list_labels_are_rebuilt_only_on_change():
+    display = MoveListDisplay((10, 50), (100, 50))
+    display.update("move", piece_id="PW", from_cell=(6, 4), to_cell=(4, 4), player=1)
+    labels = display.labels()
+    assert display.labels() is labels
+
+    display.update("move", piece_id="PB", from_cell=(1, 3), to_cell=(3, 3), player=2)
+    assert display.labels() is not labels
+    assert [label[0] for label in display.labels()] == ["P e2->e4", "P d7->d5"]
@@ -0,0 +1,66 @@
+import json
+import pathlib
+
+from GraphicsFactory import MockImgFactory
+from Command import Command
+from Clock import VirtualClock
+from GameFactory import create_game
+from ServerGameObserver import ServerGameObserver
+import StateProtocol
+
+PIECES_ROOT = pathlib.Path(__file__).parent.parent.parent / "pieces"
+
+
+class _RecordingLoop:
+    """Stands in for the event loop: keeps what would have been broadcast."""
+
+    def __init__(self):
+        self.published = []
+
+    def call_soon_threadsafe(self, callback, message):
+        self.published.append(json.loads(message[StateProtocol.JSON]))
+
+
+def _observed_game():
+    game = create_game(PIECES_ROOT, MockImgFactory(), clock=VirtualClock())
+    loop = _RecordingLoop()
+    ServerGameObserver(game, loop)
+    game.start_simulation()
+    return game, loop
+
+
+def test_landing_and_rest_ending_publish_deltas():
+    game, loop = _observed_game()
+    pw = game.pos[(6, 0)][0]
+    game.submit(Command(game.game_time_ms(), pw.id, "move", [(6, 0), (5, 0)]))
+    game.step()
+    assert loop.published[-1]["event"] == "move"
+
+    # arrival happens inside the tick, with no command to announce it
+    while pw.state.name == "move":
+        game.clock.advance(100)
+        game.poll()
+    landed = loop.published[-1]
+    assert landed["event"] == "state_changed"
+    assert {"op": "state", "piece_id": pw.id, "state": pw.state.name} in landed["ops"]
+    assert {"op": "move", "piece_id": pw.id, "current_pos": [5, 0]} in landed["ops"]
+
+    game.simulate(10_000, dt_ms=None)
+    assert pw.state.name.startswith("idle")
+    assert loop.published[-1]["ops"] == [{"op": "state", "piece_id": pw.id, "state": pw.state.name}]
+    assert [m["seq"] for m in loop.published] == list(range(1, len(loop.published) + 1))
+
+
+def test_pieces_landing_in_one_tick_share_one_delta():
+    game, loop = _observed_game()
+    pawns = [game.pos[(6, col)][0] for col in range(3)]
+    for pw in pawns:
+        game.submit(Command(game.game_time_ms(), pw.id, "move", [pw.current_cell(), (5, pw.current_cell()[1])]))
+    game.step()
+    sent = len(loop.published)
+
+    game.simulate(1_000, dt_ms=None)
+    landings = loop.published[sent:]
+    assert len(landings) == 1 and landings[0]["event"] == "state_changed"
+    landed = {op["piece_id"] for op in landings[0]["ops"] if op["op"] == "state"}
+    assert landed == {pw.id for pw in pawns}
@@ -0,0 +1,310 @@
+import pathlib, time
+
+import pytest
+
+from GraphicsFactory import MockImgFactory
+from Command import Command
+from Clock import VirtualClock
+from EventSystem import Observer
+from GameFactory import create_game
+
+PIECES_ROOT = pathlib.Path(__file__).parent.parent.parent / "pieces"
+
+
+class _StateChanges(Observer):
+    def __init__(self):
+        self.times = {}
+
+    def update(self, event_type, **kwargs):
+        if event_type == "state_changed":
+            for piece_id in kwargs["piece_ids"]:
+                self.times.setdefault(piece_id, []).append(kwargs["timestamp"])
+
+
+def _sim_game():
+    game = create_game(PIECES_ROOT, MockImgFactory(), clock=VirtualClock())
+    game.start_simulation()
+    return game
+
+
+# ---------------------------------------------------------------------------
+#                              VIRTUAL CLOCK
+# ---------------------------------------------------------------------------
+
+
+def test_virtual_clock_only_moves_when_advanced():
+    clock = VirtualClock()
+    assert clock.now_ms() == 0
+    assert clock.advance(250) == 250
+    assert clock.set(1000) == 1000
+    with pytest.raises(ValueError):
+        clock.advance(-1)
+
+
+def test_step_requires_virtual_clock():
+    game = create_game(PIECES_ROOT, MockImgFactory())
+    with pytest.raises(RuntimeError):
+        game.step(10)
+
+
+# ---------------------------------------------------------------------------
+#                          FIXED-TIMESTEP GAMEPLAY
+# ---------------------------------------------------------------------------
+
+
+def test_step_moves_pawn_without_sleeping():
+    game = _sim_game()
+    pw = game.pos[(6, 0)][0]
+
+    game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(6, 0), (4, 0)]))
+    game.step()
+    assert pw.state.name == "move"
+
+    game.simulate(5_000)
+    assert pw.current_cell() == (4, 0)
+    assert game.game_time_ms() == 5_010
+
+
+def test_simulation_is_deterministic():
+    def play():
+        game = _sim_game()
+        pw = game.pos[(6, 4)][0]
+        pb = game.pos[(1, 3)][0]
+        game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(6, 4), (4, 4)]))
+        game.user_input_queue.put(Command(game.game_time_ms(), pb.id, "move", [(1, 3), (3, 3)]))
+        game.simulate(6_000)
+        game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(4, 4), (3, 3)]))
+        game.simulate(6_000)
+        return sorted((p.id, p.current_cell(), p.state.name) for p in game.pieces)
+
+    assert play() == play()
+
+
+def test_simulate_runs_faster_than_wall_time():
+    game = _sim_game()
+    started = time.perf_counter()
+    ticks = game.simulate(60_000)
+    elapsed = time.perf_counter() - started
+
+    assert ticks == 6_000
+    assert game.game_time_ms() == 60_000
+    # at least 100x real time even when ticking every 10 ms
+    assert elapsed < 60.0 / 100
+
+    # skipping idle time, an hour of play takes well under a second
+    started = time.perf_counter()
+    game.simulate(3_600_000, dt_ms=None)
+    assert time.perf_counter() - started < 1.0
+    assert game.game_time_ms() == 3_660_000
+
+
+# ---------------------------------------------------------------------------
+#                         DEADLINE-DRIVEN SCHEDULING
+# ---------------------------------------------------------------------------
+
+
+def test_idle_game_has_no_deadline():
+    game = _sim_game()
+    assert game.next_deadline_ms() is None
+
+    pw = game.pos[(6, 0)][0]
+    game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(6, 0), (4, 0)]))
+    game.step()
+    assert game.next_deadline_ms() is not None
+
+
+def test_event_driven_simulation_skips_idle_time():
+    game = _sim_game()
+    pw = game.pos[(6, 0)][0]
+    game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(6, 0), (4, 0)]))
+
+    ticks = game.simulate(60_000, dt_ms=None)
+
+    assert pw.current_cell() == (4, 0)
+    assert game.next_deadline_ms() is None
+    assert game.game_time_ms() == 60_000
+    assert ticks < 20
+
+
+def test_event_driven_arrival_matches_fixed_timestep():
+    def landing_ms(dt_ms):
+        game = _sim_game()
+        pw, rw = game.pos[(6, 0)][0], game.pos[(7, 0)][0]
+        game.submit(Command(game.game_time_ms(), pw.id, "move", [(6, 0), (4, 0)]))
+        game.simulate(5_000, dt_ms=dt_ms)
+        game.submit(Command(game.game_time_ms(), pw.id, "move", [(4, 0), (3, 0)]))
+        game.simulate(5_000, dt_ms=dt_ms)
+
+        # three cells at 1.5 m/s: arrives exactly 2 s after it sets off
+        changes = _StateChanges()
+        game.subscribe(changes)
+        started = game.game_time_ms()
+        game.submit(Command(started, rw.id, "move", [(7, 0), (4, 0)]))
+        game.simulate(5_000, dt_ms=dt_ms)
+        return changes.times[rw.id][0] - started
+
+    assert landing_ms(None) == landing_ms(10) == 2_000
+
+
+def test_headless_loop_sleeps_until_input():
+    import threading
+
+    game = create_game(PIECES_ROOT, MockImgFactory())
+    pw = game.pos[(6, 0)][0]
+    loop = threading.Thread(target=game._run_game_loop,
+                            kwargs={"num_iterations": 2, "is_with_graphics": False})
+    started = time.perf_counter()
+    loop.start()
+    time.sleep(0.05)
+    game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(6, 0), (4, 0)]))
+    loop.join(timeout=2)
+
+    assert not loop.is_alive()
+    assert pw.state.name == "move"
+    assert time.perf_counter() - started < 0.4
+
+
+def test_submitted_command_runs_on_next_poll():
+    game = _sim_game()
+    pw = game.pos[(6, 0)][0]
+    assert game.poll() is None
+
+    game.submit(Command(game.game_time_ms(), pw.id, "move", [(6, 0), (4, 0)]))
+    assert game.poll() is not None
+    assert pw.state.name == "move"
+
+
+def test_command_without_source_cell_starts_from_current_cell():
+    game = _sim_game()
+    pw = game.pos[(6, 0)][0]
+    game.submit(Command(game.game_time_ms(), pw.id, "move", [None, (4, 0)]))
+    game.step()
+    assert pw.state.name == "move"
+
+    game.simulate(10_000, dt_ms=None)
+    game.submit(Command(game.game_time_ms(), pw.id, "move", [None, (3, 0)]))
+    game.step()
+    assert pw.state.physics.motion()[:2] == ((4, 0), (3, 0))
+
+
+def test_accept_time_keeps_stamps_within_window():
+    from Game import MAX_COMMAND_AGE_MS
+
+    game = _sim_game()
+    game.clock.advance(1_000)
+    assert game.accept_time(900) == 900
+    assert game.accept_time(0) == 1_000 - MAX_COMMAND_AGE_MS
+    assert game.accept_time(5_000) == 1_000
+    assert game.accept_time(None) == game.accept_time("soon") == 1_000
+    # JSON allows NaN and Infinity; neither may reach int()
+    assert game.accept_time(float("nan")) == 1_000
+    assert game.accept_time(float("inf")) == game.accept_time(float("-inf")) == 1_000
+
+
+def test_commands_in_one_tick_run_in_stamp_order():
+    game = _sim_game()
+    game.clock.advance(1_000)
+    pw = game.pos[(6, 0)][0]
+
+    # arrives first but was issued later; the piece can only take one
+    game.submit(Command(990, pw.id, "jump", [(6, 0)]))
+    game.submit(Command(960, pw.id, "move", [(6, 0), (4, 0)]))
+    game.step()
+
+    assert pw.state.name == "move"
+    assert pw.state.physics.get_start_ms() == 960
+
+
+def test_reorder_window_runs_late_arrivals_in_stamp_order():
+    game = _sim_game()
+    game.reorder_window_ms = 50
+    game.clock.advance(1_000)
+    pw = game.pos[(6, 0)][0]
+
+    # issued later but delivered first, a tick before its rival
+    game.submit(Command(990, pw.id, "jump", [(6, 0)]))
+    game.step()
+    assert pw.state.name == "idle"
+    assert game.next_deadline_ms() == 1_040
+
+    game.submit(Command(960, pw.id, "move", [(6, 0), (4, 0)]))
+    game.simulate(100, dt_ms=None)
+    assert pw.state.name == "move"
+    assert pw.state.physics.get_start_ms() == 960
+
+
+def test_back_dated_command_does_not_predate_current_state():
+    game = _sim_game()
+    game.clock.advance(1_000)
+    pw = game.pos[(6, 0)][0]
+    game.submit(Command(1_000, pw.id, "move", [(6, 0), (5, 0)]))
+    game.simulate(10_000, dt_ms=None)
+    idle_since = pw.state.physics.get_start_ms()
+    assert pw.state.name.startswith("idle") and idle_since > 1_000
+
+    game.submit(Command(idle_since - 100, pw.id, "move", [(5, 0), (4, 0)]))
+    game.step()
+    assert pw.state.physics.get_start_ms() == idle_since
+
+
+# ---------------------------------------------------------------------------
+#                              SNAPSHOTS
+# ---------------------------------------------------------------------------
+
+
+def test_snapshot_and_restore_position():
+    game = _sim_game()
+    before = game.snapshot()
+    pw = game.pos[(6, 3)][0]
+    pb = game.pos[(1, 4)][0]
+
+    game.user_input_queue.put(Command(game.game_time_ms(), pw.id, "move", [(6, 3), (4, 3)]))
+    game.user_input_queue.put(Command(game.game_time_ms(), pb.id, "move", [(1, 4), (3, 4)]))
+    game.simulate(6_000)
+    game.user_input_queue.put(Command(game.game_time_ms(), pb.id, "move", [(3, 4), (4, 3)]))
+    game.simulate(6_000)
+    assert pw not in game.pieces
+
+    game.restore(before)
+
+    assert len(game.pieces) == 32
+    assert game.snapshot() == before
+    assert game.pos[(6, 3)][0].id == pw.id
+    assert game.pos[(1, 4)] == [pb]
+
+
+# ---------------------------------------------------------------------------
+#                            MOVE GENERATION
+# ---------------------------------------------------------------------------
+
+
+def test_legal_commands_opening_position():
+    game = _sim_game()
+    cmds = game.legal_commands("W")
+    moves = {(c.piece_id[:2], tuple(c.params[0]), tuple(c.params[1])) for c in cmds if c.type == "move"}
+    jumps = [c for c in cmds if c.type == "jump"]
+
+    # 8 pawns x 2 pushes + 2 knights x 2 hops; everything else is blocked
+    assert len(moves) == 20
+    assert ("PW", (6, 0), (4, 0)) in moves
+    assert ("NW", (7, 1), (5, 2)) in moves
+    assert len(jumps) == 16
+    assert all(c.player == 1 for c in cmds)
+
+
+def test_legal_commands_are_accepted_and_skip_resting_pieces():
+    game = _sim_game()
+    pw = game.pos[(6, 4)][0]
+    cmd = next(c for c in game.legal_commands("W")
+               if c.piece_id == pw.id and c.type == "move" and c.params[1] == (4, 4))
+
+    game.user_input_queue.put(cmd)
+    game.step()
+    assert pw.state.name == "move"
+    assert not any(c.piece_id == pw.id for c in game.legal_commands("W"))
+
+    # the bishop behind the pawn now has an open diagonal
+    game.simulate(10_000)
+    bishop_moves = {tuple(c.params[1]) for c in game.legal_commands("W")
+                    if c.piece_id.startswith("BW") and c.params[0] == (7, 5) and c.type == "move"}
+    assert bishop_moves == {(6, 4), (5, 3), (4, 2), (3, 1), (2, 0)}
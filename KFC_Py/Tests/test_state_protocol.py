@@ -0,0 +1,156 @@
+import asyncio
+import json
+import pathlib
+
+import pytest
+
+from GraphicsFactory import MockImgFactory
+from Command import Command
+from Clock import VirtualClock
+from GameFactory import create_game
+import StateProtocol
+from StateProtocol import BINARY, JSON, BinaryDecoder, BinaryEncoder
+
+PIECES_ROOT = pathlib.Path(__file__).parent.parent.parent / "pieces"
+
+
+def _sim_game():
+    game = create_game(PIECES_ROOT, MockImgFactory(), clock=VirtualClock())
+    game.start_simulation()
+    return game
+
+
+def _play(game, sent, encoder, event, seq):
+    """Diff *game* against *sent* the way ServerGameObserver does; return
+    the new state and the delta in both encodings."""
+    current = StateProtocol.capture(game.pieces)
+    ops = StateProtocol.diff(sent, current)
+    return current, (json.loads(StateProtocol.delta_message(seq, event, ops)),
+                     encoder.delta(seq, event, ops))
+
+
+# ---------------------------------------------------------------------------
+#                        JSON AND BINARY AGREE
+# ---------------------------------------------------------------------------
+
+
+def test_binary_round_trip_matches_json():
+    game = _sim_game()
+    encoder, decoder = BinaryEncoder(), BinaryDecoder()
+    sent = StateProtocol.capture(game.pieces)
+
+    snapshot = encoder.snapshot(0, sent)
+    assert decoder.decode(snapshot) == json.loads(StateProtocol.snapshot_message(0, sent))
+    assert len(snapshot) < len(StateProtocol.snapshot_message(0, sent))
+
+    pw, pb = game.pos[(6, 3)][0], game.pos[(1, 4)][0]
+    script = [("move", pw, [(6, 3), (4, 3)]), ("move", pb, [(1, 4), (3, 4)]),
+              ("state_changed", None, 6_000), ("move", pb, [(3, 4), (4, 3)]),
+              ("state_changed", None, 6_000)]
+    kinds = set()
+    for seq, (event, piece, arg) in enumerate(script, start=1):
+        if piece is None:
+            game.simulate(arg, dt_ms=None)
+        else:
+            game.submit(Command(game.game_time_ms(), piece.id, event, arg))
+            game.step()
+        sent, (expected, encoded) = _play(game, sent, encoder, event, seq)
+        assert decoder.decode(encoded) == expected
+        kinds.update(op["op"] for op in expected["ops"])
+        kinds.update("motion" for op in expected["ops"] if "motion" in op)
+
+    # the script exercised every kind of op, including a capture
+    assert kinds == {"move", "state", "remove", "motion"}
+    assert pw not in game.pieces
+
+    # pieces appearing mid-game (e.g. a promotion) introduce their id
+    added = {"QW_new": (0, 3, "idle", None)}
+    ops = StateProtocol.diff({}, added)
+    assert decoder.decode(encoder.delta(len(script) + 1, "pawn_promoted", ops)) == \
+        json.loads(StateProtocol.delta_message(len(script) + 1, "pawn_promoted", ops))
+
+
+def test_stale_deltas_decode_without_ops():
+    game = _sim_game()
+    encoder, decoder = BinaryEncoder(), BinaryDecoder()
+    sent = StateProtocol.capture(game.pieces)
+    pw = game.pos[(6, 0)][0]
+    game.submit(Command(game.game_time_ms(), pw.id, "move", [(6, 0), (4, 0)]))
+    game.step()
+    sent, (_, delta) = _play(game, sent, encoder, "move", 1)
+
+    # a snapshot at seq 1 already covers delta 1
+    decoder.decode(encoder.snapshot(1, sent))
+    assert decoder.decode(delta)["ops"] == []
+
+
+# ---------------------------------------------------------------------------
+#                             LATE JOINERS
+# ---------------------------------------------------------------------------
+
+
+def test_late_joiner_decodes_snapshot_after_interning():
+    game = _sim_game()
+    encoder = BinaryEncoder()
+    early = BinaryDecoder()
+    sent = StateProtocol.capture(game.pieces)
+    early.decode(encoder.snapshot(0, sent))
+
+    # deltas intern new state names ("move", "long_rest", ...) as they go
+    pw = game.pos[(6, 0)][0]
+    game.submit(Command(game.game_time_ms(), pw.id, "move", [(6, 0), (4, 0)]))
+    game.step()
+    sent, (_, delta) = _play(game, sent, encoder, "move", 1)
+    early.decode(delta)
+    game.simulate(3_000, dt_ms=None)
+    sent, (_, delta) = _play(game, sent, encoder, "state_changed", 2)
+    early.decode(delta)
+
+    late = BinaryDecoder()
+    assert late.decode(encoder.snapshot(2, sent)) == json.loads(StateProtocol.snapshot_message(2, sent))
+
+    # both decoders follow the next delta, which reuses interned codes
+    pn = game.pos[(7, 1)][0]
+    game.submit(Command(game.game_time_ms(), pn.id, "move", [(7, 1), (5, 2)]))
+    game.step()
+    sent, (expected, delta) = _play(game, sent, encoder, "move", 3)
+    assert late.decode(delta) == early.decode(delta) == expected
+    assert expected["ops"]
+
+
+# ---------------------------------------------------------------------------
+#                        WIRE FORMAT NEGOTIATION
+# ---------------------------------------------------------------------------
+
+
+def test_select_wire_format_prefers_binary():
+    select = StateProtocol.select_wire_format
+    assert select(None, [BINARY, JSON]) == BINARY
+    assert select(None, [JSON, BINARY]) == BINARY
+    assert select(None, [JSON]) == JSON
+
+
+def test_select_wire_format_falls_back_when_nothing_is_offered():
+    select = StateProtocol.select_wire_format
+    # no subprotocol is negotiated and the server sends JSON text
+    assert select(None, []) is None
+    assert select(None, ["chat.v2"]) is None
+
+
+def test_websocket_handshake_negotiates_wire_format():
+    websockets = pytest.importorskip("websockets")
+
+    async def negotiate(offered):
+        async def handler(websocket):
+            await websocket.send(websocket.subprotocol or JSON)
+
+        async with websockets.serve(handler, "localhost", 0,
+                                    select_subprotocol=StateProtocol.select_wire_format) as server:
+            port = server.sockets[0].getsockname()[1]
+            async with websockets.connect(f"ws://localhost:{port}", subprotocols=offered) as ws:
+                return ws.subprotocol, await ws.recv()
+
+    assert asyncio.run(negotiate([BINARY, JSON])) == (BINARY, BINARY)
+    assert asyncio.run(negotiate([JSON])) == (JSON, JSON)
+    # an old client offering nothing still connects and is served JSON
+    assert asyncio.run(negotiate(None)) == (None, JSON)
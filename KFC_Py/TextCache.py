@@ -0,0 +1,98 @@
+# KFC_Py/TextCache.py
+
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+from img import Img
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+class TextCache:
+    """Rasterised text labels, rendered once and blitted afterwards.
+
+    `sprite()` draws a string with ``cv2.putText`` into a coverage mask the
+    first time it is asked for and keeps its inked bounding box as a BGRA
+    `Img` with the blend planes already filled in, so redrawing a label is
+    a single blend with the same colour pixels ``putText`` would produce.
+    `measure()` memoises ``cv2.getTextSize``.  Score and move-list strings
+    change rarely, so a small LRU keeps every label on screen resident.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._sprites: "OrderedDict[tuple, Tuple[Img, int, int]]" = OrderedDict()
+        self._sizes: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._sprites.clear()
+            self._sizes.clear()
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+    def measure(self, text: str, font_size: float, thickness: int) -> Tuple[Tuple[int, int], int]:
+        """Memoised ``cv2.getTextSize``: ``((w, h), baseline)``."""
+        key = (text, font_size, thickness)
+        with self._lock:
+            size = self._sizes.get(key)
+            if size is None:
+                size = self._sizes[key] = cv2.getTextSize(text, FONT, font_size, thickness)
+                if len(self._sizes) > self.max_entries:
+                    self._sizes.popitem(last=False)
+            return size
+
+    def sprite(self, text: str, font_size: float, color: Tuple[int, ...], thickness: int) -> Tuple[Img, int, int]:
+        """Return ``(sprite, dx, dy)``: draw *sprite* at ``(x + dx, y + dy)``
+        to match ``put_text(text, x, y, ...)``."""
+        key = (text, font_size, tuple(color), thickness)
+        with self._lock:
+            entry = self._sprites.get(key)
+            if entry is not None:
+                self._sprites.move_to_end(key)
+                return entry
+        entry = self._rasterise(text, font_size, color, thickness)
+        with self._lock:
+            self._sprites[key] = entry
+            if len(self._sprites) > self.max_entries:
+                self._sprites.popitem(last=False)
+        return entry
+
+    def _rasterise(self, text, font_size, color, thickness) -> Tuple[Img, int, int]:
+        (text_w, text_h), baseline = self.measure(text, font_size, thickness)
+        pad = thickness + 2  # stroke width plus anti-aliasing
+        mask = np.zeros((text_h + baseline + 2 * pad, text_w + 2 * pad), np.uint8)
+        cv2.putText(mask, text, (pad, pad + text_h), FONT, font_size, 255, thickness, cv2.LINE_AA)
+        # blending cost is per pixel: keep only the inked bounding box
+        x0, y0, w, h = cv2.boundingRect(mask)
+        if w == 0:
+            x0 = y0 = 0
+            w = h = 1
+        mask = mask[y0:y0 + h, x0:x0 + w]
+
+        # Blend planes follow cv2.putText on a BGRA image: coverage decides
+        # the mix and the colour's alpha is just the value of the 4th channel.
+        colour = tuple(color) + (255,) * (4 - len(color))
+        cover = cv2.merge([mask] * 4)
+        premul = cv2.multiply(cover, colour, scale=1 / 255)
+        inv_cover = cv2.subtract(np.full_like(cover, 255), cover)
+        pixels = np.empty_like(cover)
+        pixels[...] = colour
+        pixels[..., 3] = premul[..., 3]
+        for arr in (pixels, premul, inv_cover):
+            arr.setflags(write=False)
+
+        sprite = Img()
+        sprite.img = pixels
+        sprite._blend = (pixels, premul, inv_cover, False)
+        return sprite, x0 - pad, y0 - pad - text_h
+
+
+# Shared by every game in the process.
+TEXT_CACHE = TextCache()
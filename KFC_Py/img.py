@@ -6,6 +6,13 @@ import numpy as np
 
 
 class Img:
+    # (source pixels, premultiplied BGRA, 255 - alpha, opaque) computed by
+    # _blend_planes() the first time this image is drawn
+    _blend = None
+    # (4-channel premul it came from, contiguous BGR premul, BGR 255 - alpha)
+    # built by _colour_planes() the first time this image is drawn on BGR
+    _blend3 = None
+
     def __init__(self):
         self.img = None
     
@@ -74,16 +81,56 @@ class Img:
         new_img.img = self.img.copy()
         return new_img
 
+    def _blend_planes(self):
+        """Premultiplied colour and inverse alpha of this image, built once.
+
+        Sprites are immutable after loading, so the per-pixel alpha maths is
+        paid on first draw instead of on every frame.  Rebuilt automatically
+        if `self.img` is replaced.
+        """
+        blend = self._blend
+        if blend is not None and blend[0] is self.img:
+            return blend
+
+        src = self.img
+        if src.shape[2] == 3:  # If source is BGR, convert to BGRA (alpha=255)
+            src = cv2.cvtColor(src, cv2.COLOR_BGR2BGRA)
+        alpha = cv2.merge([src[..., 3]] * 4)
+        premul = cv2.multiply(src, alpha, scale=1 / 255)
+        inv_alpha = cv2.subtract(np.full_like(alpha, 255), alpha)
+        opaque = not inv_alpha.any()
+        self._blend = blend = (self.img, premul, inv_alpha, opaque)
+        return blend
+
+    def _colour_planes(self, premul, inv_alpha):
+        """Contiguous colour-only copies of the blend planes, built once.
+
+        ``premul[..., :3]`` is a strided view that cv2 would copy on every
+        draw onto a 3-channel destination.  Rebuilt whenever the 4-channel
+        planes are.
+        """
+        blend3 = self._blend3
+        if blend3 is None or blend3[0] is not premul:
+            blend3 = self._blend3 = (premul, np.ascontiguousarray(premul[..., :3]),
+                                     np.ascontiguousarray(inv_alpha[..., :3]))
+        return blend3[1], blend3[2]
+
+    def sub_image(self, x: int, y: int, w: int, h: int) -> "Img":
+        """Zero-copy view of a rectangle of this image (for clipped draws)."""
+        _, premul, inv_alpha, opaque = self._blend_planes()
+        sub = Img()
+        sub.img = self.img[y:y + h, x:x + w]
+        sub._blend = (sub.img, premul[y:y + h, x:x + w], inv_alpha[y:y + h, x:x + w], opaque)
+        if self._blend3 is not None and self._blend3[0] is premul:
+            # row/column slices of the BGR planes stay contiguous per pixel
+            sub._blend3 = (sub._blend[1],) + tuple(p[y:y + h, x:x + w] for p in self._blend3[1:])
+        return sub
+
     def draw_on(self, other_img, x, y):
         if self.img is None or other_img.img is None:
             raise ValueError("Both images must be loaded before drawing.")
 
-        # Ensure consistent channel count for alpha blending
-        src_img_rgba = self.img
-        if src_img_rgba.shape[2] == 3: # If source is BGR, convert to BGRA (alpha=255)
-            src_img_rgba = cv2.cvtColor(self.img, cv2.COLOR_BGR2BGRA)
-
-        h, w = src_img_rgba.shape[:2]
+        h, w = self.img.shape[:2]
         H, W = other_img.img.shape[:2]
 
         if h == 0 or w == 0:
@@ -95,20 +142,23 @@ class Img:
             # print(f"[WARN] Skipping draw at ({x},{y}): roi size {(h, w)} exceeds board {(H, W)}") # Commented out
             return
 
-        # Get region of interest on the destination image
+        _, premul, inv_alpha, opaque = self._blend_planes()
+
+        # Region of interest on the destination image; a 3-channel
+        # destination only takes the colour planes.
+        channels = other_img.img.shape[2]
         roi = other_img.img[y:y + h, x:x + w]
+        if channels == 3:
+            premul, inv_alpha = self._colour_planes(premul, inv_alpha)
 
-        # Split source image into channels and get alpha mask
-        b, g, r, a = cv2.split(src_img_rgba)
-        mask = a / 255.0
+        if opaque:
+            roi[...] = premul
+            return
 
-        # Perform alpha blending for each color channel
-        for c in range(3): # BGR channels
-            roi[..., c] = (1 - mask) * roi[..., c] + mask * src_img_rgba[..., c]
-        
-        # Also blend the alpha channel if the destination has one
-        if other_img.img.shape[2] == 4:
-            other_img.img[y:y+h, x:x+w, 3] = (1 - mask) * other_img.img[y:y+h, x:x+w, 3] + mask * src_img_rgba[..., 3]
+        # dst = dst * (255 - a) / 255 + src * a / 255, on every channel
+        # (alpha included), as two saturating uint8 ops written in place
+        cv2.multiply(roi, inv_alpha, dst=roi, scale=1 / 255)
+        cv2.add(roi, premul, dst=roi)
 
 
     def put_text(self, txt, x, y, font_size, color=(255, 255, 255, 255), thickness=1):
@@ -1,62 +1,64 @@
 import asyncio
-import json
 import os
 import sys
-from typing import List, Dict
+import threading
+from typing import Dict, Optional
 from EventSystem import Observer
 from Game import Game
+import StateProtocol
+from Broadcast import Broadcaster
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.join(current_dir, 'KFC_Py')
 sys.path.append(project_root)
 
 class ServerGameObserver(Observer):
-    def __init__(self, game_instance: Game, clients_set: set, loop: asyncio.AbstractEventLoop):
+    def __init__(self, game_instance: Game, loop: asyncio.AbstractEventLoop):
         self.game = game_instance
-        self.clients = clients_set 
         self.loop = loop 
+        # board state as of the last delta sent, and that delta's number
+        self._lock = threading.Lock()
+        self.seq = 0
+        self._sent: StateProtocol.BoardState = StateProtocol.capture(self.game.pieces)
+        self._binary = StateProtocol.BinaryEncoder()
+        self._snapshots: Dict[str, tuple] = {}  # wire format -> (seq, encoded snapshot)
+        # per-client outboxes; only touched on the event loop thread
+        self.broadcaster = Broadcaster(self.snapshot_message)
         self.game.subscribe(self) 
         print("ServerGameObserver initialized and subscribed to game events.")
 
     def update(self, event_type: str, **kwargs):
         print(f"ServerGameObserver received event: {event_type} with details: {kwargs}")
         
-        if event_type in ["move", "jump", "piece_captured", "pawn_promoted", "game_start", "game_end"]:
-            board_state = self._get_current_board_state_for_serialization()
-            self.loop.call_soon_threadsafe(self._schedule_broadcast_task, board_state)
+        if event_type in ["move", "jump", "state_changed", "piece_captured", "pawn_promoted", "game_start", "game_end"]:
+            message = self._next_delta(event_type)
+            if message is not None:
+                self.loop.call_soon_threadsafe(self.broadcaster.publish, message)
 
-    def _get_current_board_state_for_serialization(self) -> List[Dict]:
-        serialized_pieces = []
-        for piece in self.game.pieces:
-            row, col = piece.current_cell()
-            serialized_pieces.append({
-                "piece_id": piece.id,
-                "current_pos": [row, col], 
-                "type": piece.id[0], 
-                "side": piece.id[1] 
-            })
-        return serialized_pieces
+    def _next_delta(self, event_type: str) -> Optional[Dict[str, StateProtocol.Payload]]:
+        """Diff the game against the last broadcast state and encode it once
+        per wire format; None if nothing changed."""
+        with self._lock:
+            current = StateProtocol.capture(self.game.pieces)
+            ops = StateProtocol.diff(self._sent, current)
+            if not ops and event_type not in ("game_start", "game_end"):
+                return None
+            self.seq += 1
+            self._sent = current
+            # the binary encoder interns ids in seq order, so encode here
+            # under the lock rather than per client
+            return {StateProtocol.JSON: StateProtocol.delta_message(self.seq, event_type, ops),
+                    StateProtocol.BINARY: self._binary.delta(self.seq, event_type, ops)}
 
-    async def _broadcast_state_to_clients(self, board_state: List[Dict]):
-        if not self.clients:
-            print("No clients connected to send board update.")
-            return
-
-        message = json.dumps({"event_type": "board_update", "state": board_state})
-        
-        send_tasks = []
-        for websocket in list(self.clients):
-            try:
-                send_tasks.append(websocket.send(message))
-            except Exception as e:
-                print(f"Error preparing send to client {websocket.remote_address}: {e}")
-                self.clients.discard(websocket)
-        
-        if send_tasks:
-            await asyncio.gather(*send_tasks, return_exceptions=True)
-            print(f"Board state sent to {len(send_tasks)} clients.")
-        else:
-            print("No active send tasks.")
-
-    def _schedule_broadcast_task(self, board_state: List[Dict]):
-        self.loop.create_task(self._broadcast_state_to_clients(board_state))
\ No newline at end of file
+    def snapshot_message(self, wire_format: str = StateProtocol.JSON) -> StateProtocol.Payload:
+        """Full state for a (re)connecting client, consistent with `seq`:
+        the next delta it receives is ``seq + 1``."""
+        with self._lock:
+            cached = self._snapshots.get(wire_format)
+            if cached is None or cached[0] != self.seq:
+                if wire_format == StateProtocol.BINARY:
+                    encoded = self._binary.snapshot(self.seq, self._sent)
+                else:
+                    encoded = StateProtocol.snapshot_message(self.seq, self._sent)
+                cached = self._snapshots[wire_format] = (self.seq, encoded)
+            return cached[1]
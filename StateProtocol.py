@@ -0,0 +1,406 @@
+# StateProtocol.py
+"""Board state messages exchanged between server and clients.
+
+A client receives one full ``snapshot`` when it connects and then a stream
+of ``delta`` messages, each carrying a sequence number and only the pieces
+that changed since the previous one:
+
+    {"event_type": "snapshot", "seq": 7, "state": [<piece>, ...]}
+    {"event_type": "delta", "seq": 8, "event": "move", "ops": [<op>, ...]}
+
+where a piece is ``{"piece_id", "current_pos", "type", "side", "state"}``
+and an op is one of
+
+    {"op": "add", **piece}
+    {"op": "remove", "piece_id": ...}
+    {"op": "move", "piece_id": ..., "current_pos": [row, col]}
+    {"op": "state", "piece_id": ..., "state": ...[, "motion": ...]}
+
+A piece that is sliding between cells also carries
+``"motion": {"to": [row, col], "start_ms": ..., "speed": ...}`` (see
+`MovePhysics.motion()`), and its ``current_pos`` stays the cell the move
+started from until it lands: clients replay the move locally instead of
+being sent every cell it crosses.
+
+A client whose next delta does not carry ``seq + 1`` has missed one and
+sends ``{"command_type": "RESYNC"}``; the server answers with a fresh
+snapshot.
+
+Clients estimate the room's game clock NTP-style (`ClockSync`): they send
+``{"command_type": "CLOCK_SYNC", "t0": <local ms>}`` and the server echoes
+``t0`` with its game time in ``{"event_type": "clock_sync", ...}``.  Once
+synced, commands carry ``"timestamp"``, the game time the player acted at.
+
+The same messages have a compact binary form (`BinaryEncoder` /
+`BinaryDecoder`), chosen per connection through the websocket subprotocol:
+a client offering ``kfc.bin`` gets binary frames, any other client JSON
+text.  Piece ids and state names are interned to small integers; a
+snapshot carries the full tables and an ``add`` op (or a name
+definition) introduces each new entry before it is used.
+"""
+
+import json
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+RESYNC = "RESYNC"
+CLOCK_SYNC = "CLOCK_SYNC"
+CLOCK_SYNC_REPLY = "clock_sync"
+
+# wire formats, named after the websocket subprotocol that selects them
+JSON = "kfc.json"
+BINARY = "kfc.bin"
+
+Payload = Union[str, bytes]
+
+# (end row, end col, start ms, speed m/s) of a piece sliding between cells
+Motion = Tuple[int, int, int, float]
+# piece id -> (row, col, state name, motion or None)
+BoardState = Dict[str, Tuple[int, int, str, Optional[Motion]]]
+
+
+def capture(pieces) -> BoardState:
+    """The protocol-relevant part of every piece of a game."""
+    state = {}
+    for p in pieces:
+        physics = p.state.physics
+        if physics.is_in_motion():
+            (row, col), end, start_ms, speed = physics.motion()
+            state[p.id] = (row, col, p.state.name, (end[0], end[1], start_ms, speed))
+        else:
+            row, col = p.current_cell()
+            state[p.id] = (row, col, p.state.name, None)
+    return state
+
+
+def motion_dict(motion: Motion) -> Dict:
+    end_row, end_col, start_ms, speed = motion
+    return {"to": [end_row, end_col], "start_ms": start_ms, "speed": speed}
+
+
+def piece_dict(piece_id: str, record: Tuple[int, int, str, Optional[Motion]]) -> Dict:
+    row, col, state, motion = record
+    piece = {"piece_id": piece_id, "current_pos": [row, col],
+             "type": piece_id[0], "side": piece_id[1], "state": state}
+    if motion is not None:
+        piece["motion"] = motion_dict(motion)
+    return piece
+
+
+def _state_op(piece_id: str, state: str, motion: Optional[Motion]) -> Dict:
+    op = {"op": "state", "piece_id": piece_id, "state": state}
+    if motion is not None:
+        op["motion"] = motion_dict(motion)
+    return op
+
+
+def diff(old: BoardState, new: BoardState) -> List[Dict]:
+    """Ops turning *old* into *new*."""
+    ops = []
+    for piece_id, record in new.items():
+        before = old.get(piece_id)
+        if before is None:
+            ops.append({"op": "add", **piece_dict(piece_id, record)})
+            continue
+        if before[:2] != record[:2]:
+            ops.append({"op": "move", "piece_id": piece_id, "current_pos": [record[0], record[1]]})
+        if before[2:] != record[2:]:
+            ops.append(_state_op(piece_id, record[2], record[3]))
+    for piece_id in old.keys() - new.keys():
+        ops.append({"op": "remove", "piece_id": piece_id})
+    return ops
+
+
+def select_wire_format(connection, subprotocols: Sequence[str]) -> Optional[str]:
+    """``select_subprotocol`` hook for `websockets.serve`: binary when the
+    client offers it; clients offering nothing get JSON."""
+    for wire_format in (BINARY, JSON):
+        if wire_format in subprotocols:
+            return wire_format
+    return None
+
+
+def snapshot_message(seq: int, state: BoardState) -> str:
+    return json.dumps({"event_type": SNAPSHOT, "seq": seq,
+                       "state": [piece_dict(pid, rec) for pid, rec in state.items()]})
+
+
+def delta_message(seq: int, event: str, ops: List[Dict]) -> str:
+    return json.dumps({"event_type": DELTA, "seq": seq, "event": event, "ops": ops})
+
+
+# ─── binary form ─────────────────────────────────────────────────────────
+_HEADER = struct.Struct("<BI")  # kind, seq
+_COUNT = struct.Struct("<H")
+_PIECE = struct.Struct("<HBBB")  # id, row, col, state name
+_MOTION = struct.Struct("<BBif")  # end row, end col, start ms, speed
+_K_SNAPSHOT, _K_DELTA = 1, 2
+_OP_ADD, _OP_REMOVE, _OP_MOVE, _OP_STATE, _OP_NAME, _OP_MOTION = 1, 2, 3, 4, 5, 6
+_OP_ID = struct.Struct("<BH")
+_OP_MOVE_S = struct.Struct("<BHBB")
+_OP_STATE_S = struct.Struct("<BHB")
+_EVENTS = ("move", "jump", "piece_captured", "pawn_promoted", "game_start", "game_end", "state_changed")
+_NO_EVENT = 255
+
+
+def _put_str(out: bytearray, text: str):
+    raw = text.encode()
+    out.append(len(raw))
+    out += raw
+
+
+def _get_str(data: bytes, at: int) -> Tuple[str, int]:
+    end = at + 1 + data[at]
+    return data[at + 1:end].decode(), end
+
+
+def _put_motion(out: bytearray, motion: Optional[Motion]):
+    if motion is None:
+        out.append(0)
+    else:
+        out.append(1)
+        out += _MOTION.pack(*motion)
+
+
+def _get_motion(data: bytes, at: int) -> Tuple[Optional[Motion], int]:
+    if not data[at]:
+        return None, at + 1
+    return _MOTION.unpack_from(data, at + 1), at + 1 + _MOTION.size
+
+
+def _motion_of(op: Dict) -> Optional[Motion]:
+    motion = op.get("motion")
+    if motion is None:
+        return None
+    return (motion["to"][0], motion["to"][1], motion["start_ms"], motion["speed"])
+
+
+class BinaryEncoder:
+    """Server side of the binary form; one per room, fed in `seq` order."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: Dict[str, int] = {}
+
+    def _name(self, out: Optional[bytearray], name: str) -> Tuple[int, int]:
+        """Code of *name*, plus the number of definition ops written to *out*."""
+        code = self.names.get(name)
+        if code is not None:
+            return code, 0
+        code = self.names[name] = len(self.names)
+        if out is None:
+            return code, 0
+        out += bytes((_OP_NAME, code))
+        _put_str(out, name)
+        return code, 1
+
+    def _id(self, piece_id: str) -> int:
+        # clients learn codes from snapshots and add ops, which always
+        # spell the id out, so assigning one here needs no definition
+        return self.ids.setdefault(piece_id, len(self.ids))
+
+    def snapshot(self, seq: int, state: BoardState) -> bytes:
+        # every name goes in the table, so later deltas only define new ones
+        for _, _, name, _ in state.values():
+            self._name(None, name)
+        out = bytearray(_HEADER.pack(_K_SNAPSHOT, seq))
+        out += _COUNT.pack(len(self.names))
+        for name in self.names:  # in code order
+            _put_str(out, name)
+        out += _COUNT.pack(len(state))
+        for piece_id, (row, col, name, motion) in state.items():
+            out += _PIECE.pack(self._id(piece_id), row, col, self.names[name])
+            _put_str(out, piece_id)
+            _put_motion(out, motion)
+        return bytes(out)
+
+    def delta(self, seq: int, event: str, ops: List[Dict]) -> bytes:
+        out = bytearray(_HEADER.pack(_K_DELTA, seq))
+        out.append(_EVENTS.index(event) if event in _EVENTS else _NO_EVENT)
+        count_at = len(out)
+        out += b"\0\0"
+        count = 0
+        for op in ops:
+            kind = op["op"]
+            if kind == "remove":
+                out += _OP_ID.pack(_OP_REMOVE, self._id(op["piece_id"]))
+            elif kind == "move":
+                row, col = op["current_pos"]
+                out += _OP_MOVE_S.pack(_OP_MOVE, self._id(op["piece_id"]), row, col)
+            else:
+                name, defined = self._name(out, op["state"])
+                count += defined
+                motion = _motion_of(op)
+                if kind == "state":
+                    out += _OP_STATE_S.pack(_OP_STATE if motion is None else _OP_MOTION,
+                                            self._id(op["piece_id"]), name)
+                    if motion is not None:
+                        out += _MOTION.pack(*motion)
+                else:
+                    row, col = op["current_pos"]
+                    out.append(_OP_ADD)
+                    out += _PIECE.pack(self._id(op["piece_id"]), row, col, name)
+                    _put_str(out, op["piece_id"])
+                    _put_motion(out, motion)
+            count += 1
+        _COUNT.pack_into(out, count_at, count)
+        return bytes(out)
+
+
+class BinaryDecoder:
+    """Client side of the binary form: turns frames back into the same
+    dictionaries as the JSON messages.
+
+    Must see every frame of its connection.  Deltas a snapshot already
+    covers may mention pieces it no longer lists, so their ops are skipped
+    (`ClientBoard` ignores them anyway).
+    """
+
+    def __init__(self):
+        self.seq: Optional[int] = None
+        self.ids: Dict[int, str] = {}
+        self.names: List[str] = []
+
+    def decode(self, data: bytes) -> Dict:
+        kind, seq = _HEADER.unpack_from(data)
+        at = _HEADER.size
+        if kind == _K_SNAPSHOT:
+            (n,) = _COUNT.unpack_from(data, at)
+            at += _COUNT.size
+            self.names = []
+            for _ in range(n):
+                name, at = _get_str(data, at)
+                self.names.append(name)
+            (n,) = _COUNT.unpack_from(data, at)
+            at += _COUNT.size
+            pieces = []
+            for _ in range(n):
+                code, row, col, name = _PIECE.unpack_from(data, at)
+                piece_id, at = _get_str(data, at + _PIECE.size)
+                motion, at = _get_motion(data, at)
+                self.ids[code] = piece_id
+                pieces.append(piece_dict(piece_id, (row, col, self.names[name], motion)))
+            self.seq = seq
+            return {"event_type": SNAPSHOT, "seq": seq, "state": pieces}
+
+        event = data[at]
+        (n,) = _COUNT.unpack_from(data, at + 1)
+        at += 1 + _COUNT.size
+        ops = []
+        if self.seq is None or seq <= self.seq:
+            n = 0
+        else:
+            self.seq = seq
+        for _ in range(n):
+            kind = data[at]
+            if kind == _OP_NAME:
+                code = data[at + 1]
+                name, at = _get_str(data, at + 2)
+                self.names[code:code + 1] = [name]
+            elif kind == _OP_ADD:
+                code, row, col, name = _PIECE.unpack_from(data, at + 1)
+                piece_id, at = _get_str(data, at + 1 + _PIECE.size)
+                motion, at = _get_motion(data, at)
+                self.ids[code] = piece_id
+                ops.append({"op": "add", **piece_dict(piece_id, (row, col, self.names[name], motion))})
+            elif kind == _OP_REMOVE:
+                _, code = _OP_ID.unpack_from(data, at)
+                at += _OP_ID.size
+                ops.append({"op": "remove", "piece_id": self.ids[code]})
+            elif kind == _OP_MOVE:
+                _, code, row, col = _OP_MOVE_S.unpack_from(data, at)
+                at += _OP_MOVE_S.size
+                ops.append({"op": "move", "piece_id": self.ids[code], "current_pos": [row, col]})
+            else:
+                _, code, name = _OP_STATE_S.unpack_from(data, at)
+                at += _OP_STATE_S.size
+                motion = None
+                if kind == _OP_MOTION:
+                    motion = _MOTION.unpack_from(data, at)
+                    at += _MOTION.size
+                ops.append(_state_op(self.ids[code], self.names[name], motion))
+        return {"event_type": DELTA, "seq": seq,
+                "event": _EVENTS[event] if event != _NO_EVENT else "", "ops": ops}
+
+
+class ClientBoard:
+    """Client-side replica of the board, fed with snapshot/delta messages.
+
+    `apply()` returns True when the replica changed, False for stale or
+    pre-snapshot deltas, and None when a gap was detected – the caller
+    should then request a resync.
+    """
+
+    def __init__(self):
+        self.seq: Optional[int] = None
+        self.pieces: Dict[str, Dict] = {}
+
+    def apply(self, message: Dict) -> Optional[bool]:
+        kind = message.get("event_type")
+        if kind == SNAPSHOT:
+            self.seq = message["seq"]
+            self.pieces = {p["piece_id"]: p for p in message["state"]}
+            return True
+        if kind != DELTA or self.seq is None or message["seq"] <= self.seq:
+            return False
+        if message["seq"] != self.seq + 1:
+            return None
+
+        for op in message["ops"]:
+            kind, piece_id = op["op"], op["piece_id"]
+            if kind == "add":
+                self.pieces[piece_id] = {k: v for k, v in op.items() if k != "op"}
+            elif kind == "remove":
+                self.pieces.pop(piece_id, None)
+            elif piece_id not in self.pieces:
+                continue
+            elif kind == "move":
+                self.pieces[piece_id]["current_pos"] = op["current_pos"]
+            else:
+                piece = self.pieces[piece_id]
+                piece["state"] = op["state"]
+                if "motion" in op:
+                    piece["motion"] = op["motion"]
+                else:
+                    piece.pop("motion", None)
+        self.seq = message["seq"]
+        return True
+
+
+class ClockSync:
+    """Client-side estimate of the server's game clock.
+
+    Each round trip gives ``offset = server_ms - (t0 + t1) / 2`` with an
+    error of at most half its round-trip time; the estimate keeps the
+    sample with the smallest round trip among the last *window*, so a few
+    requests right after connecting are enough and jittery replies are
+    ignored.
+    """
+
+    def __init__(self, window: int = 8):
+        self.window = window
+        self._samples: List[Tuple[float, float]] = []  # (rtt ms, offset ms)
+
+    def request(self, now_ms: float) -> Dict:
+        return {"command_type": CLOCK_SYNC, "t0": now_ms}
+
+    def on_reply(self, message: Dict, now_ms: float):
+        t0, server_ms = message["t0"], message["server_ms"]
+        self._samples.append((now_ms - t0, server_ms - (t0 + now_ms) / 2))
+        del self._samples[:-self.window]
+
+    @property
+    def synced(self) -> bool:
+        return bool(self._samples)
+
+    @property
+    def rtt_ms(self) -> Optional[float]:
+        return min(self._samples)[0] if self._samples else None
+
+    def server_time(self, now_ms: float) -> Optional[int]:
+        """Server game time at local time *now_ms*, or None before any reply."""
+        if not self._samples:
+            return None
+        return int(now_ms + min(self._samples)[1])
@@ -8,7 +8,7 @@ import os # נצטרך את זה לטיפול בנתיבים
 # ייבוא עבור רינדור גרפי וניהול לוח מקומי
 import cv2 # נצטרך את OpenCV לרינדור
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 # וודא שנתיב KFC_Py מתווסף ל-sys.path גם בלקוח אם הוא לא נמצא באותה תיקייה
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -24,10 +24,45 @@ from img import  Img # ImgFactory האמיתי מגיע מ-Img.py
 from Piece import Piece # נצטרך את מחלקת Piece
 from KeyboardInput import KeyboardProcessor, KeyboardProducer
 from Game import Game # נצטרך מופע Game חלקי בלקוח עבור KeyboardProducer.game.running
+from PieceFactory import PieceFactory
+from AssetRegistry import ASSET_REGISTRY
+from StateMachine import PieceRecord
+from Renderer import blit
+from StateProtocol import BINARY, CLOCK_SYNC_REPLY, JSON, BinaryDecoder, ClientBoard, ClockSync, RESYNC
 # הגדרות גלובליות בצד הלקוח (לצורך הרינדור)
 client_board: Board = None
 client_canvas: Img = None
 client_pieces: Dict[str, Piece] = {} # מילון של אובייקטי Piece בצד הלקוח
+# built once by initialize_client_graphics(); sprites come from the shared
+# ASSET_REGISTRY atlas, so a piece only holds its own playback state
+client_piece_factory: Optional[PieceFactory] = None
+# replica entry each piece was last put into: piece id -> (state, pos, motion)
+client_piece_keys: Dict[str, tuple] = {}
+# what the window showed last: (piece id, sprite, x, y) per piece
+client_frame_key: Optional[tuple] = None
+RENDER_FPS = 60
+# offered at connect time; the server picks binary frames when it supports them
+WIRE_FORMATS = [BINARY, JSON]
+# clock-sync round trips sent right after connecting
+CLOCK_SYNC_ROUNDS = 5
+CLOCK_SYNC_INTERVAL_S = 0.05
+
+
+def local_ms() -> float:
+    return time.monotonic() * 1000
+
+
+async def sync_clock(websocket, clock_sync: ClockSync):
+    """Estimate the server's game clock so commands can carry the time the
+    player acted at instead of the time they happened to arrive."""
+    for _ in range(CLOCK_SYNC_ROUNDS):
+        await websocket.send(json.dumps(clock_sync.request(local_ms())))
+        await asyncio.sleep(CLOCK_SYNC_INTERVAL_S)
+
+
+def stamped(command: Dict, clock_sync: ClockSync) -> Dict:
+    server_ms = clock_sync.server_time(local_ms())
+    return command if server_ms is None else {**command, "timestamp": server_ms}
 
 # הגדרות רינדור (צריך להתאים לגודל הלוח והתמונה שלך)
 BOARD_OFFSET_X = 308 
@@ -39,7 +74,7 @@ BOARD_H_CELLS = 8
 
 async def initialize_client_graphics():
     """Initializes the board and graphics objects on the client side."""
-    global client_board, client_canvas
+    global client_board, client_canvas, client_piece_factory
 
     # טען את תמונת הלוח המקורית (board.png)
     # נתיב ל-board.png
@@ -51,18 +86,27 @@ async def initialize_client_graphics():
     img_factory_instance = ImgFactory() # השתמש ב-ImgFactory האמיתי
     graphics_factory_instance = GraphicsFactory(img_factory_instance)
 
-    board_img = img_factory_instance(str(board_png_path), (CELL_PX*BOARD_W_CELLS, CELL_PX*BOARD_H_CELLS), keep_aspect=False)
+    board_img = ASSET_REGISTRY.image(board_png_path, (CELL_PX*BOARD_W_CELLS, CELL_PX*BOARD_H_CELLS), img_factory_instance)
     client_board = Board(CELL_PX, CELL_PX, BOARD_W_CELLS, BOARD_H_CELLS, board_img)
 
+    # decode every sprite once into the shared atlas; pieces built later by
+    # the factory only reference its frames
+    ASSET_REGISTRY.atlas(pieces_root_path, (CELL_PX, CELL_PX), img_factory_instance)
+    client_piece_factory = PieceFactory(client_board, pieces_root_path, graphics_factory=graphics_factory_instance)
+
     # טען את תמונת הרקע המלאה (full.jpg) עבור ה-canvas הראשי
     full_bg_path = pieces_root_path / "full.jpg"
     if not full_bg_path.exists():
         print(f"Error: full.jpg not found at {full_bg_path}")
         return
 
-    client_canvas = img_factory_instance.read(str(full_bg_path), size=None, keep_aspect=False)
-    # שמור עותק של תמונת הרקע המקורית לציור מחדש בכל פריימ
-    client_canvas.initial_img_data = client_canvas.img.copy() 
+    background = ASSET_REGISTRY.image(full_bg_path, None, img_factory_instance)
+    client_canvas = Img()
+    client_canvas.img = background.img.copy()
+    # the empty board never changes: compose it onto the background once
+    # and start every frame from a copy of that
+    board_img.draw_on(client_canvas, BOARD_OFFSET_X, BOARD_OFFSET_Y)
+    client_canvas.initial_img_data = client_canvas.img.copy()
 
     # צור חלון תצוגה
     cv2.namedWindow("KungFu Chess Client", cv2.WINDOW_AUTOSIZE)
@@ -70,94 +114,151 @@ async def initialize_client_graphics():
     print("Client graphics initialized.")
 
 
-async def draw_board_state(board_state: List[Dict]):
+def client_piece(data: Dict, now_ms: int) -> Piece:
+    """The rendered `Piece` for replica entry *data*.
+
+    Pieces are built by `client_piece_factory` the first time their id is
+    seen and kept for the rest of the game; when the server reports a new
+    state, position or motion the piece is put into that state with
+    `Piece.restore()`, which restarts its animation and physics.
+    """
+    piece_id = data["piece_id"]
+    pos = tuple(data["current_pos"])
+    motion = data.get("motion")
+    key = (data["state"], pos, None if motion is None else (tuple(motion["to"]), motion["start_ms"]))
+
+    piece = client_pieces.get(piece_id)
+    if piece is None:
+        piece = client_piece_factory.create_piece(data["type"] + data["side"], pos)
+        piece.id = piece_id
+        client_pieces[piece_id] = piece
+    if client_piece_keys.get(piece_id) != key:
+        if motion is None:
+            start_ms, end = now_ms, pos
+        else:
+            start_ms, end = motion["start_ms"], tuple(motion["to"])
+        try:
+            piece.restore(PieceRecord(piece_id, data["state"], start_ms, pos, end, 0))
+        except ValueError as e:
+            print(f"Client: {e}")
+        client_piece_keys[piece_id] = key
+    return piece
+
+
+def piece_position_px(piece: Piece, now_ms: int) -> Tuple[int, int]:
+    """Top-left pixel of *piece* relative to the board at server time *now_ms*.
+
+    A sliding piece runs the same `MovePhysics` as on the server, so it
+    glides at the frame rate instead of jumping when an update arrives.
+    States are only ever changed by the server: a move that finishes
+    before its landing delta arrives holds the piece on its destination.
+    """
+    physics = piece.state.physics
+    done = physics.update(now_ms)
+    if done is not None and physics.is_in_motion():
+        return client_board.m_to_pix(client_board.cell_to_m(physics.motion()[1]))
+    return physics.get_pos_pix()
+
+
+def client_now_ms(clock_sync: ClockSync) -> int:
+    """Estimated server game time; local time until the clock is synced."""
+    server_ms = clock_sync.server_time(local_ms())
+    return int(local_ms()) if server_ms is None else server_ms
+
+
+async def draw_board_state(board_state: List[Dict], now_ms: int) -> bool:
     """
     Draws the current board state on the client's window.
+
+    The window is only redrawn when some sprite moved or changed frame
+    since the last call; returns whether it was.
     """
-    global client_canvas, client_board, client_pieces
+    global client_canvas, client_board, client_frame_key
 
     if client_canvas is None or client_board is None:
         print("Client graphics not initialized for drawing.")
-        return
+        return False
 
-    # 1. צייר מחדש את הרקע והלוח הריק
-    client_canvas.img = client_canvas.initial_img_data.copy()
-    client_board.img.draw_on(client_canvas, BOARD_OFFSET_X, BOARD_OFFSET_Y)
-
-    # 2. עדכן ויזואלית את הכלים
-    # יצירת מילון זמני לכלים חדשים/מעודכנים
-    updated_pieces_map = {}
-    for piece_data in board_state:
-        piece_id = piece_data['piece_id']
-        current_pos = tuple(piece_data['current_pos'])
-        piece_type = piece_data['type']
-        piece_side = piece_data['side']
-        
-        # אם הכלי כבר קיים אצלנו, נעדכן את מיקומו
-        if piece_id in client_pieces:
-            piece = client_pieces[piece_id]
-            piece.set_current_cell(current_pos) # נניח שקיימת מתודה כזו ב-Piece
-            # print(f"Client: Updating existing piece {piece_id} to {current_pos}")
-        else:
-            # אם הכלי חדש (לדוגמה, לאחר קידום רגלי), ניצור אותו
-            # זה דורש יצירת PieceFactory גם בצד הלקוח, או פשוט Piece עם ספירט דמה
-            # לצורך הדגמה, נדפיס אזהרה. יצירת Pieces בצד הלקוח מורכבת יותר.
-            print(f"Client: New piece {piece_id} at {current_pos} ({piece_type}{piece_side}) - NOT YET RENDERED FULLY.")
-            # TODO: אם הכלי חדש, יהיה צורך ליצור אובייקט Piece מלא כאן
-            # באמצעות PieceFactory מקומי בצד הלקוח.
-            # זה יצריך גם לוודא שכל המידע הדרוש ל-PieceFactory זמין.
-            # בינתיים, נשמור רק את ה-ID והמיקום.
-            piece = Piece(piece_id, current_pos, None, None) # Mock Piece, יצריך תיקון
-            client_pieces[piece_id] = piece
-        
-        updated_pieces_map[piece_id] = piece # שמור התייחסות לכלי מעודכן
-
-    # הסר כלים שנעלמו מהלוח (נלכדו)
-    pieces_to_remove = [p_id for p_id in client_pieces if p_id not in updated_pieces_map]
-    for p_id in pieces_to_remove:
-        del client_pieces[p_id]
-        print(f"Client: Piece {p_id} removed (captured).")
-
-    # 3. צייר את כל הכלים הפעילים
-    for piece_id, piece in client_pieces.items():
-        # וודא שלחפץ Piece יש את תכונת current_pos או מתודה לקבלת מיקום
-        # וודא שיש לו sprite שניתן לצייר
+    # 1. קדם את כל הכלים ובחר את פריים האנימציה של המצב הנוכחי
+    sprites = []
+    for data in board_state:
+        piece_id = data["piece_id"]
         try:
-            r, c = piece.current_cell() # קבל את המיקום הנוכחי
-            x_pix = c * client_board.cell_W_pix + BOARD_OFFSET_X
-            y_pix = r * client_board.cell_H_pix + BOARD_OFFSET_Y
-            
-            # TODO: כאן תצטרך לטעון את הספירט של הכלי (piece.state.graphics.get_img())
-            # ולצייר אותו על ה-canvas. זה דורש אתחול נכון של Graphics ו-State ב-Piece המקומי.
-            # בינתיים, נצייר רק ריבוע placeholder.
-            # print(f"Client: Drawing piece {piece_id} at {x_pix}, {y_pix}")
-            color = (0, 0, 255) if 'B' in piece_id else (255, 0, 0) # כחול לשחור, אדום ללבן
-            cv2.rectangle(client_canvas.img, (x_pix, y_pix), 
-                          (x_pix + client_board.cell_W_pix, y_pix + client_board.cell_H_pix), 
-                          color, 2)
-            cv2.putText(client_canvas.img, piece_id, (x_pix + 5, y_pix + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
-
+            piece = client_piece(data, now_ms)
+            x, y = piece_position_px(piece, now_ms)
+            piece.state.graphics.update(now_ms)
+            sprites.append((piece_id, piece.state.graphics.get_img(), x, y))
         except Exception as e:
             print(f"Client: Error drawing piece {piece_id}: {e}")
 
-    # 4. הצג את החלון
+    # הסר כלים שנעלמו מהלוח (נלכדו)
+    if len(client_pieces) > len(board_state):
+        on_board = {data["piece_id"] for data in board_state}
+        for piece_id in [p_id for p_id in client_pieces if p_id not in on_board]:
+            del client_pieces[piece_id]
+            client_piece_keys.pop(piece_id, None)
+            print(f"Client: Piece {piece_id} removed (captured).")
+
+    frame_key = tuple((piece_id, id(sprite), x, y) for piece_id, sprite, x, y in sprites)
+    if frame_key == client_frame_key:
+        return False
+    client_frame_key = frame_key
+
+    # 2. צייר מחדש את הרקע והלוח הריק, ואת הכלים מעליהם
+    client_canvas.img[...] = client_canvas.initial_img_data
+    for _, sprite, x, y in sprites:
+        blit(sprite, client_canvas, x + BOARD_OFFSET_X, y + BOARD_OFFSET_Y)
+
+    # 3. הצג את החלון
     cv2.imshow("KungFu Chess Client", client_canvas.img)
     cv2.waitKey(1) # נדרש לעדכון חלון OpenCV
+    return True
+
+
+async def render_loop(replica: ClientBoard, clock_sync: ClockSync):
+    """Draws *replica* at up to RENDER_FPS, advancing sprite animations and
+    the pieces in flight; frames in which nothing visible changed are not
+    redrawn."""
+    while True:
+        if replica.seq is not None:
+            await draw_board_state(list(replica.pieces.values()), client_now_ms(clock_sync))
+        await asyncio.sleep(1 / RENDER_FPS)
 
 
-async def receive_and_process_messages(websocket, client_id):
-    """Handles receiving and processing messages from the server."""
+async def receive_and_process_messages(websocket, client_id, clock_sync: ClockSync = None,
+                                       replica: Optional[ClientBoard] = None):
+    """Handles receiving and processing messages from the server.
+
+    *replica* (and *clock_sync*) belong to this connection alone: sequence
+    numbers and clock offsets are per connection.
+    """
+    if replica is None:
+        replica = ClientBoard()
+    # board updates arrive as binary frames when the kfc.bin format was
+    # negotiated; status replies are always JSON text
+    decoder = BinaryDecoder()
     try:
         async for response_json in websocket:
             try:
-                response = json.loads(response_json)
+                if isinstance(response_json, bytes):
+                    response = decoder.decode(response_json)
+                else:
+                    response = json.loads(response_json)
                 
                 if "event_type" in response:
                     event_type = response["event_type"]
-                    if event_type == "initial_board_state" or event_type == "board_update":
-                        board_state = response["state"]
-                        print(f"Client {client_id} received board update of type '{event_type}'. Drawing...")
-                        await draw_board_state(board_state) # קריאה לפונקציית הרינדור החדשה
+                    if event_type == CLOCK_SYNC_REPLY:
+                        if clock_sync is not None:
+                            clock_sync.on_reply(response, local_ms())
+                    elif event_type in ("snapshot", "delta"):
+                        changed = replica.apply(response)
+                        if changed is None:
+                            # a delta went missing: ask for a full snapshot
+                            print(f"Client {client_id} missed a delta before seq {response['seq']}; resyncing.")
+                            await websocket.send(json.dumps({"command_type": RESYNC}))
+                        elif changed:
+                            # drawn by render_loop()
+                            print(f"Client {client_id} applied {event_type} seq {replica.seq}.")
                     else:
                         print(f"Client {client_id} received unknown event: {response}")
                 elif "status" in response:
@@ -183,10 +284,12 @@ async def connect_and_send(piece_id, from_coords, to_coords, client_id):
     """
     uri = "ws://localhost:8765" 
     try:
-        async with websockets.connect(uri) as websocket:
+        async with websockets.connect(uri, subprotocols=WIRE_FORMATS) as websocket:
             print(f"Client {client_id} connected.")
             
-            receive_task = asyncio.create_task(receive_and_process_messages(websocket, client_id))
+            clock_sync = ClockSync()
+            receive_task = asyncio.create_task(receive_and_process_messages(websocket, client_id, clock_sync))
+            asyncio.create_task(sync_clock(websocket, clock_sync))
 
             # Send commands after a short delay to allow initial board state to be received
             await asyncio.sleep(1) 
@@ -196,7 +299,7 @@ async def connect_and_send(piece_id, from_coords, to_coords, client_id):
                 "command_type": "MOVE_PIECE",
                 "to_pos": list(to_coords)
             }
-            await websocket.send(json.dumps(command_message))
+            await websocket.send(json.dumps(stamped(command_message, clock_sync)))
             print(f"Client {client_id} sending: {command_message}")
 
             await receive_task 
@@ -260,11 +363,14 @@ async def main_client():
     async def connect_and_manage_client(piece_id, from_coords, to_coords, client_id):
         uri = "ws://localhost:8765" 
         try:
-            async with websockets.connect(uri) as websocket:
+            async with websockets.connect(uri, subprotocols=WIRE_FORMATS) as websocket:
                 print(f"Client {client_id} connected.")
                 
                 # Task לקבלת הודעות
-                receive_task = asyncio.create_task(receive_and_process_messages(websocket, client_id))
+                replica, clock_sync = client_views[client_id]
+                receive_task = asyncio.create_task(
+                    receive_and_process_messages(websocket, client_id, clock_sync, replica))
+                asyncio.create_task(sync_clock(websocket, clock_sync))
 
                 # יצירת KeyboardProducer ספציפי ללקוח הזה
                 # הוא צריך גישה ל-client_game_instance (עבור .running ו-.pieces) ולחיבור ה-WebSocket
@@ -297,7 +403,8 @@ async def main_client():
                             cmd_data_from_kb = await local_command_queue.get() 
                             
                             # שלח את הפקודה לשרת
-                            await websocket.send(json.dumps(cmd_data_from_kb))
+                            # board updates confirm the move, so skip the ack
+                            await websocket.send(json.dumps(stamped({**cmd_data_from_kb, "ack": False}, clock_sync)))
                             print(f"Client {client_id} sending command from KB: {cmd_data_from_kb}")
                             
                         except asyncio.CancelledError:
@@ -324,12 +431,18 @@ async def main_client():
                 kb_producer.join(timeout=1) # ניסיון לסיים את התהליכון
 
 
+    # every connection keeps its own replica and clock estimate; the window
+    # shows what client 1 sees
+    client_views = {client_id: (ClientBoard(), ClockSync()) for client_id in (1, 2)}
+    render_task = asyncio.create_task(render_loop(*client_views[1]))
+
     # הרצת שני הלקוחות במקביל עם הפונקציה המותאמת
     await asyncio.gather(
         connect_and_manage_client(1, (6,4), (4,4), 1), 
         connect_and_manage_client(2, (1,2), (3,2), 2)  
     )
 
+    render_task.cancel()
     print("All client tasks finished. Keeping client window alive. Press ESC to close.")
     while True:
         key = cv2.waitKey(1) & 0xFF
@@ -34,9 +34,10 @@ from GraphicsFactory import GraphicsFactory
 from EventSystem import Publisher, Observer 
 from Command import Command 
 from ServerGameObserver import ServerGameObserver
+import StateProtocol
 
 from mock_img import mock_graphics_image_loader 
-from GameFactory import create_game 
+from GameRooms import GameRoomManager, room_id_from_path
 
 class MockImgFactory:
     def __init__(self):
@@ -49,38 +50,93 @@ class MockImgFactory:
         return mock_graphics_image_loader(path, size, keep_aspect)
 
 
-game_instance: Game = None
-# Global set of connected clients, used for broadcasting
-connected_clients: set = set() 
+# Hosts every match of this process; clients pick a room by URL path,
+# e.g. ws://localhost:8765/rooms/<room_id>
+room_manager: GameRoomManager = None
 
 
+class AckBatcher:
+    """Coalesces "received" acks for one connection.
 
+    Commands acknowledged during one pass of the event loop (a burst of
+    keystrokes read back to back) are answered with a single status
+    message, sent without holding up the read loop.  Clients that do not
+    need acks send ``"ack": false`` with their commands.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.pending: List[str] = []
+
+    def ack(self, text: str):
+        if not self.pending:
+            asyncio.get_running_loop().call_soon(self._flush)
+        self.pending.append(text)
+
+    def _flush(self):
+        texts, self.pending = self.pending, []
+        if len(texts) == 1:
+            text = texts[0]
+        else:
+            text = f"Server: {len(texts)} commands received for processing. Waiting for board update..."
+        task = asyncio.ensure_future(self.websocket.send(
+            json.dumps({"status": "received", "message": text, "count": len(texts)})))
+        # a closed socket is handled by the read loop
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
 
-async def game_handler(websocket, path=None): 
-    global game_instance
-    connected_clients.add(websocket) 
-    print(f"New client connected. Total connected clients: {len(connected_clients)}")
 
-    try:
-        global server_observer 
-        initial_board_state = server_observer._get_current_board_state_for_serialization()
-        await websocket.send(json.dumps({"event_type": "initial_board_state", "state": initial_board_state}))
-        print(f"Initial board state sent to client {websocket.remote_address}")
 
 
+def _is_cell(value) -> bool:
+    """A ``[row, col]`` pair of plain ints, as clients send it."""
+    return (isinstance(value, (list, tuple)) and len(value) == 2
+            and all(isinstance(v, int) and not isinstance(v, bool) for v in value))
+
+
+async def game_handler(websocket, path=None): 
+    if path is None:
+        request = getattr(websocket, "request", None)
+        path = request.path if request is not None else getattr(websocket, "path", None)
+    # negotiated by StateProtocol.select_wire_format during the handshake
+    wire_format = getattr(websocket, "subprotocol", None) or StateProtocol.JSON
+    room = room_manager.join(room_id_from_path(path), websocket, wire_format)
+    game_instance = room.game
+    acks = AckBatcher(websocket)
+    print(f"New {wire_format} client connected to room '{room.room_id}'. Clients in room: {len(room.clients)}, rooms: {len(room_manager.rooms)}")
+
+    try:
         async for message in websocket:
             print(f"Message received from client: {message}")
             
             try:
                 command_data = json.loads(message)
+                if command_data.get('command_type') == StateProtocol.CLOCK_SYNC:
+                    # answered straight away, ahead of any queued board messages
+                    await websocket.send(json.dumps({"event_type": StateProtocol.CLOCK_SYNC_REPLY,
+                                                     "t0": command_data.get('t0'),
+                                                     "server_ms": game_instance.game_time_ms()}))
+                    continue
+                if command_data.get('command_type') == StateProtocol.RESYNC:
+                    # the client missed a delta; start it over from a snapshot
+                    room.observer.broadcaster.resync(websocket)
+                    print(f"Resync snapshot queued for client {websocket.remote_address}")
+                    continue
+
                 piece_id = command_data['piece_id']
                 command_type_str = command_data['command_type'] 
                 to_pos_list = command_data['to_pos'] 
+                # checked here: a bad command must not reach the shared scheduler
+                if not isinstance(piece_id, str) or not _is_cell(to_pos_list):
+                    raise ValueError("'piece_id' must be a string and 'to_pos' two integers")
                 
                 command_type_for_command_obj = command_type_str.lower().replace("_piece", "")
                 
-                current_game_time = game_instance.game_time_ms() 
+                # the client's stamp of when the player acted, kept within
+                # the tolerance window; arrival time for unsynced clients
+                current_game_time = game_instance.accept_time(command_data.get('timestamp'))
                 
+                # the source cell is filled in by the game when the command is
+                # applied: the pieces belong to the scheduler thread
                 params_for_command_obj = [None, tuple(to_pos_list)] 
                 
                 command = Command(
@@ -93,12 +149,14 @@ async def game_handler(websocket, path=None):
                 print(f"Message parsed as command: {command}")
 
                 if game_instance:
-                    await asyncio.to_thread(game_instance.user_input_queue.put, command) 
+                    # non-blocking: the scheduler thread picks it up on its next pass
+                    room_manager.submit(room, command)
                     print("Command sent for processing by game instance.")
-                    
-                    response_message = f"Server: Move '{command.piece_id}' to '{command.params[1]}' received for processing. Waiting for board update..."
-                    await websocket.send(json.dumps({"status": "received", "message": response_message}))
-                    print(f"Response sent to client: {response_message}")
+
+                    if command_data.get('ack', True):
+                        response_message = f"Server: Move '{command.piece_id}' to '{command.params[1]}' received for processing. Waiting for board update..."
+                        acks.ack(response_message)
+                        print(f"Response queued for client: {response_message}")
 
             except json.JSONDecodeError:
                 error_message = f"Server: Error: Invalid JSON message format: {message}"
@@ -112,19 +170,22 @@ async def game_handler(websocket, path=None):
                 error_message = f"Server: Error: Missing required field in JSON: {e}. Message: {message}"
                 print(error_message)
                 await websocket.send(json.dumps({"status": "error", "message": error_message}))
+            except ValueError as e:
+                error_message = f"Server: Error: Invalid command: {e}. Message: {message}"
+                print(error_message)
+                await websocket.send(json.dumps({"status": "error", "message": error_message}))
 
     except websockets.exceptions.ConnectionClosedOK:
         print("Client connection closed successfully.")
     except Exception as e:
         print(f"Error handling connection: {e}")
     finally:
-        connected_clients.discard(websocket) 
-        print(f"Client disconnected. Total connected clients: {len(connected_clients)}")
+        room_manager.leave(room, websocket)
+        print(f"Client disconnected from room '{room.room_id}'. Clients in room: {len(room.clients)}, rooms: {len(room_manager.rooms)}")
 
 
 async def main():
-    global game_instance
-    global server_observer 
+    global room_manager
 
     try:
         import cv2 
@@ -162,38 +223,15 @@ async def main():
     # 2. Initialize helper objects
     mock_img_factory_instance = MockImgFactory()
     
-    # 3. Initialize game instance using create_game function
+    # 3. Initialize the room manager; games are created per room on first connect
     try:
-        game_instance = create_game( 
-            pieces_root=pieces_root_path,
-            img_factory=mock_img_factory_instance 
-        )
-        print("Game instance successfully initialized using create_game (from GameFactory.py).")
-
-        if game_instance._is_win():
-            print("!!! WARNING: Game is in an immediate win state after initialization. Game loop will terminate immediately. !!!")
-
-        game_instance.start_user_input_thread = lambda: None 
-        
-        # Initialize the ServerGameObserver here!
-        main_loop = asyncio.get_running_loop() 
-        server_observer = ServerGameObserver(game_instance, connected_clients, main_loop)
-        
-        print("Attempting to create and run Game loop Task in a separate thread...")
-        game_task = asyncio.create_task(asyncio.to_thread(game_instance.run, is_with_graphics=False)) 
-        print("Game loop Task launched asynchronously on server (in separate thread and without graphics/keyboard input).")
-
-        def game_task_done_callback(fut):
-            try:
-                fut.result() 
-            except asyncio.CancelledError:
-                print("Game task cancelled.")
-            except Exception as e:
-                print(f"!!! Critical error in Game loop Task: {type(e).__name__}: {e} !!!")
-                import traceback
-                traceback.print_exc() 
+        if not board_csv_path.exists():
+            raise FileNotFoundError(board_csv_path)
 
-        game_task.add_done_callback(game_task_done_callback)
+        main_loop = asyncio.get_running_loop() 
+        room_manager = GameRoomManager(pieces_root_path, mock_img_factory_instance, main_loop)
+        room_manager.start()
+        print("Game room manager started: all rooms are ticked from one shared scheduler thread.")
 
     except FileNotFoundError as e:
         print(f"Error: Required file not found. Ensure 'pieces_root' and 'board.csv' paths are correct. {e}")
@@ -215,7 +253,8 @@ async def main():
     # 4. Start WebSocket server
     print("Attempting to start WebSocket server...")
     try:
-        async with websockets.serve(game_handler, "localhost", 8765):
+        async with websockets.serve(game_handler, "localhost", 8765,
+                                    select_subprotocol=StateProtocol.select_wire_format):
             print("WebSocket server activated and listening on port 8765...")
             await asyncio.sleep(float('inf')) 
     except Exception as e: